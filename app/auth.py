@@ -1,8 +1,11 @@
 from __future__ import annotations
 
-from fastapi import Depends, Header, HTTPException, status
+import hmac
+from typing import Mapping
 
-from .config import Settings, get_settings
+from fastapi import HTTPException, Request, status
+
+from .config import get_settings
 
 
 def get_bearer_token(authorization: str | None) -> str | None:
@@ -14,12 +17,18 @@ def get_bearer_token(authorization: str | None) -> str | None:
     return None
 
 
-def require_token(
-    settings: Settings = Depends(get_settings),
-    private_token: str | None = Header(default=None, alias="PRIVATE-TOKEN"),
-    authorization: str | None = Header(default=None, alias="Authorization"),
-) -> None:
-    expected = settings.mock_token
-    provided = private_token or get_bearer_token(authorization)
-    if provided != expected:
+def has_private_token(headers: Mapping[str, str]) -> bool:
+    """Whether ``PRIVATE-TOKEN`` or a bearer ``Authorization`` header carries the mock token."""
+    provided = headers.get("private-token") or get_bearer_token(headers.get("authorization"))
+    if provided is None:
+        return False
+    # Constant time, so response timing does not reveal how much of a guess matched.
+    return hmac.compare_digest(provided.encode("utf-8"), get_settings().mock_token.encode("utf-8"))
+
+
+async def require_token(request: Request) -> None:
+    # Reads the headers directly: ``Header`` parameters would be validated
+    # into a model on every request. Resolved inline rather than via Depends,
+    # since a sync sub-dependency would be dispatched to the threadpool.
+    if not has_private_token(request.headers):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or missing token")
@@ -0,0 +1,130 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from .tenants import current_tenant
+
+
+class Clock:
+    """Source of "now" for status computation and timestamps.
+
+    Starts on the wall clock. Freezing, advancing, jumping or changing the
+    speed switches it to virtual time: an instant anchored at the last change
+    plus the real time elapsed since, multiplied by ``speed``. Virtual time
+    never moves backwards, except by returning to the wall clock.
+
+    Sleepers (the event scheduler, long-polls) convert virtual deadlines to
+    real delays with :meth:`seconds_until` and are woken through listeners
+    whenever the clock is changed.
+    """
+
+    def __init__(self) -> None:
+        self._virtual = False
+        self._speed = 1.0
+        self._anchor = datetime.now(timezone.utc)
+        self._anchor_real = time.monotonic()
+        self._listeners: set[Callable[[], None]] = set()
+
+    @property
+    def virtual(self) -> bool:
+        return self._virtual
+
+    @property
+    def speed(self) -> float:
+        return self._speed if self._virtual else 1.0
+
+    def now(self) -> datetime:
+        if not self._virtual:
+            return datetime.now(timezone.utc)
+        if not self._speed:
+            return self._anchor
+        return self._anchor + timedelta(seconds=(time.monotonic() - self._anchor_real) * self._speed)
+
+    def seconds_until(self, instant: datetime) -> Optional[float]:
+        """Real seconds until the clock reads ``instant``; ``None`` while frozen before it."""
+        remaining = (instant - self.now()).total_seconds()
+        if remaining <= 0:
+            return 0.0
+        if not self.speed:
+            return None
+        return remaining / self.speed
+
+    def freeze(self) -> None:
+        self.set_speed(0.0)
+
+    def set_speed(self, speed: float) -> None:
+        """Run virtual time ``speed`` times faster than real time; ``0`` freezes it."""
+        if speed < 0:
+            raise ValueError("The clock speed cannot be negative")
+        self._rebase()
+        self._speed = speed
+        self._notify()
+
+    def advance(self, seconds: float) -> None:
+        if seconds < 0:
+            raise ValueError("The clock cannot move backwards")
+        self._rebase()
+        self._anchor += timedelta(seconds=seconds)
+        self._notify()
+
+    def set_time(self, instant: datetime) -> None:
+        if instant.tzinfo is None:
+            instant = instant.replace(tzinfo=timezone.utc)
+        if instant < self._rebase():
+            raise ValueError("The clock cannot move backwards")
+        self._anchor = instant.astimezone(timezone.utc)
+        self._notify()
+
+    def use_wall_clock(self) -> None:
+        self._virtual = False
+        self._speed = 1.0
+        self._notify()
+
+    def add_listener(self, callback: Callable[[], None]) -> None:
+        """Call ``callback`` on the event loop thread after every change."""
+        self._listeners.add(callback)
+
+    def remove_listener(self, callback: Callable[[], None]) -> None:
+        self._listeners.discard(callback)
+
+    async def sleep(self, seconds: Optional[float]) -> None:
+        """Sleep ``seconds`` of real time (``None``: until woken), returning early on a change."""
+        woken = asyncio.Event()
+        self.add_listener(woken.set)
+        try:
+            async with asyncio.timeout(seconds):
+                await woken.wait()
+        except TimeoutError:
+            pass
+        finally:
+            self.remove_listener(woken.set)
+
+    def _rebase(self) -> datetime:
+        current = self.now()
+        self._virtual = True
+        self._anchor = current
+        self._anchor_real = time.monotonic()
+        return current
+
+    def _notify(self) -> None:
+        for callback in list(self._listeners):
+            callback()
+
+
+_clock = Clock()
+
+
+def init_clock(clock: Clock | None = None) -> Clock:
+    """Install ``clock`` (a fresh wall clock by default) as the process clock."""
+    global _clock
+    _clock = clock or Clock()
+    return _clock
+
+
+def get_clock() -> Clock:
+    """The clock of the current namespace, or the process clock outside one."""
+    tenant = current_tenant()
+    return tenant.clock if tenant is not None else _clock
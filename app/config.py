@@ -12,6 +12,13 @@ def _env_bool(key: str, default: bool = False) -> bool:
     return raw.lower() in {"1", "true", "yes", "on"}
 
 
+def _env_int(key: str, default: int) -> int:
+    raw = os.getenv(key)
+    if raw is None or raw == "":
+        return default
+    return int(raw)
+
+
 @dataclass(slots=True)
 class Settings:
     """Application configuration derived from environment variables."""
@@ -19,6 +26,24 @@ class Settings:
     database_url: str = field(default_factory=lambda: os.getenv("DATABASE_URL", "sqlite:///./mock.db"))
     mock_token: str = field(default_factory=lambda: os.getenv("MOCK_TOKEN", "MOCK_SUPER_SECRET"))
     allow_reset: bool = field(default_factory=lambda: _env_bool("MOCK_ALLOW_RESET", False))
+    persist_status_on_read: bool = field(default_factory=lambda: _env_bool("MOCK_PERSIST_STATUS_ON_READ", True))
+    max_wait_seconds: int = field(default_factory=lambda: _env_int("MOCK_MAX_WAIT_SECONDS", 120))
+    materialize_interval_seconds: int = field(default_factory=lambda: _env_int("MOCK_MATERIALIZE_INTERVAL_SECONDS", 0))
+    retention_max_age_seconds: int = field(default_factory=lambda: _env_int("MOCK_RETENTION_MAX_AGE_SECONDS", 0))
+    retention_max_per_project: int = field(default_factory=lambda: _env_int("MOCK_RETENTION_MAX_PER_PROJECT", 0))
+    retention_max_rows: int = field(default_factory=lambda: _env_int("MOCK_RETENTION_MAX_ROWS", 0))
+    retention_interval_seconds: int = field(default_factory=lambda: _env_int("MOCK_RETENTION_INTERVAL_SECONDS", 60))
+    retention_batch_size: int = field(default_factory=lambda: _env_int("MOCK_RETENTION_BATCH_SIZE", 1000))
+    tenant_capacity: int = field(default_factory=lambda: _env_int("MOCK_TENANT_CAPACITY", 4096))
+    workers: int = field(default_factory=lambda: _env_int("MOCK_WORKERS", 1))
+    coherence_interval_ms: int = field(default_factory=lambda: _env_int("MOCK_COHERENCE_INTERVAL_MS", 50))
+    trigger_token_cache_size: int = field(default_factory=lambda: _env_int("MOCK_TRIGGER_TOKEN_CACHE_SIZE", 10_000))
+    trigger_token_cache_ttl_seconds: int = field(default_factory=lambda: _env_int("MOCK_TRIGGER_TOKEN_CACHE_TTL_SECONDS", 60))
+    sqlite_profile: str = field(default_factory=lambda: os.getenv("MOCK_SQLITE_PROFILE", "performance"))
+    sqlite_cache_size_kib: int = field(default_factory=lambda: _env_int("MOCK_SQLITE_CACHE_SIZE_KIB", 64 * 1024))
+    sqlite_mmap_size: int = field(default_factory=lambda: _env_int("MOCK_SQLITE_MMAP_SIZE", 256 * 1024 * 1024))
+    sqlite_busy_timeout_ms: int = field(default_factory=lambda: _env_int("MOCK_SQLITE_BUSY_TIMEOUT_MS", 5000))
+    db_read_pool_size: int = field(default_factory=lambda: _env_int("MOCK_DB_READ_POOL_SIZE", 16))
 
 
 @lru_cache(maxsize=1)
@@ -1,35 +1,193 @@
 from __future__ import annotations
 
-from contextlib import contextmanager
-from typing import Iterator
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator
 
-from sqlalchemy import Engine, create_engine, event
+from sqlalchemy import AsyncAdaptedQueuePool, Engine, QueuePool, create_engine, event, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
+from .metrics import instrument_engine
+
 _engine: Engine | None = None
 _SessionLocal: sessionmaker[Session] | None = None
+_async_engine: AsyncEngine | None = None
+_AsyncSessionLocal: async_sessionmaker[AsyncSession] | None = None
+_async_read_engine: AsyncEngine | None = None
+_AsyncReadSessionLocal: async_sessionmaker[AsyncSession] | None = None
+# Holds a shared-cache in-memory database open for the life of the process.
+_memory_anchor: object | None = None
+
+# Async drivers used for the request path, keyed by the plain dialect name.
+_ASYNC_DRIVERS = {"sqlite": "aiosqlite", "postgresql": "asyncpg", "mysql": "aiomysql"}
+
+# PRAGMA sets applied to every SQLite connection, per tuning profile.
+SQLITE_PROFILES: dict[str, dict[str, str]] = {
+    "safe": {"journal_mode": "DELETE", "synchronous": "FULL"},
+    "performance": {"journal_mode": "WAL", "synchronous": "NORMAL", "temp_store": "MEMORY"},
+    "unsafe": {"journal_mode": "MEMORY", "synchronous": "OFF", "temp_store": "MEMORY"},
+}
 
 
 class Base(DeclarativeBase):
     pass
 
 
-def init_engine(database_url: str) -> None:
-    """Initialise the SQLAlchemy engine and session factory."""
-    global _engine, _SessionLocal
+@dataclass(slots=True)
+class SqliteTuning:
+    """Connection-level knobs for SQLite databases; ignored for other dialects."""
+
+    profile: str = "performance"
+    cache_size_kib: int = 64 * 1024
+    mmap_size: int = 256 * 1024 * 1024
+    busy_timeout_ms: int = 5000
+    read_pool_size: int = 16
+
+    def pragmas(self, in_memory: bool = False) -> dict[str, str]:
+        try:
+            # ``auto_vacuum`` only takes effect on a new file, before WAL mode is set.
+            pragmas = {"auto_vacuum": "INCREMENTAL", **SQLITE_PROFILES[self.profile]}
+        except KeyError:
+            raise ValueError(f"Unknown SQLite profile {self.profile!r}; expected one of {sorted(SQLITE_PROFILES)}") from None
+        pragmas.update(
+            foreign_keys="ON",
+            busy_timeout=str(self.busy_timeout_ms),
+            cache_size=str(-self.cache_size_kib),
+            mmap_size=str(self.mmap_size),
+        )
+        if in_memory:
+            # WAL does not apply to memory databases.
+            pragmas["journal_mode"] = "MEMORY"
+            if self.profile == "unsafe":
+                # Shared-cache readers skip table locks and so may see the
+                # writer's uncommitted rows; other profiles read on the writer.
+                pragmas["read_uncommitted"] = "1"
+        return pragmas
+
+    def shares_writer(self, in_memory: bool) -> bool:
+        """Whether reads must go through the writer connection.
+
+        Connections to a shared-cache memory database lock whole tables and
+        fail with ``SQLITE_LOCKED`` at once, ignoring ``busy_timeout``. Unless
+        dirty reads are allowed, reads queue for the writer instead.
+        """
+        return in_memory and self.profile != "unsafe"
+
+
+def _sync_url(database_url: str) -> str:
+    url = make_url(database_url)
+    if url.get_backend_name() in _ASYNC_DRIVERS and url.get_driver_name() == _ASYNC_DRIVERS[url.get_backend_name()]:
+        url = url.set(drivername=url.get_backend_name())
+    return url.render_as_string(hide_password=False)
+
+
+def _async_url(database_url: str) -> str:
+    url = make_url(database_url)
+    backend = url.get_backend_name()
+    if backend in _ASYNC_DRIVERS:
+        url = url.set(drivername=f"{backend}+{_ASYNC_DRIVERS[backend]}")
+    return url.render_as_string(hide_password=False)
+
+
+def _shared_memory_url(database_url: str) -> str | None:
+    """Rewrite ``sqlite://`` / ``:memory:`` URLs to a named shared-cache database.
 
-    connect_args = {"check_same_thread": False} if database_url.startswith("sqlite") else {}
-    engine = create_engine(database_url, connect_args=connect_args, future=True)
+    A plain ``:memory:`` database is private to one connection, so pooled
+    connections (and the sync/async engine pair) would each see an empty DB.
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() != "sqlite" or url.database not in (None, "", ":memory:"):
+        return None
+    name = f"file:mock-{uuid.uuid4().hex}?mode=memory&cache=shared&uri=true"
+    return f"{url.drivername}:///{name}"
 
-    if database_url.startswith("sqlite"):
-        @event.listens_for(engine, "connect")
-        def _set_sqlite_pragma(dbapi_connection, connection_record):  # type: ignore[unused-ignore]
-            cursor = dbapi_connection.cursor()
-            cursor.execute("PRAGMA foreign_keys=ON")
-            cursor.close()
 
+def _apply_sqlite_pragmas(engine: Engine, pragmas: dict[str, str]) -> None:
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragma(dbapi_connection, connection_record):  # type: ignore[unused-ignore]
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+
+def _begin_immediate(engine: Engine) -> None:
+    """Take the write lock when a transaction starts rather than at its first write.
+
+    A deferred transaction that read before writing cannot wait for the lock
+    held by another process: SQLite fails it with ``SQLITE_BUSY`` at once,
+    ignoring ``busy_timeout``. Starting with ``BEGIN IMMEDIATE`` makes writers
+    queue on the lock instead. The driver's own transaction handling is
+    switched off so SQLAlchemy can emit the ``BEGIN``.
+    """
+
+    @event.listens_for(engine, "connect")
+    def _disable_driver_transactions(dbapi_connection, connection_record):  # type: ignore[unused-ignore]
+        dbapi_connection.isolation_level = None
+
+    @event.listens_for(engine, "begin")
+    def _begin(connection):  # type: ignore[unused-ignore]
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+def init_engine(database_url: str, tuning: SqliteTuning | None = None) -> None:
+    """Initialise the SQLAlchemy engines and session factories.
+
+    A synchronous engine is kept for schema creation, seeding and tooling; the
+    request path uses async engines so DB waits never block the event loop.
+    For SQLite, writes go through a single-connection writer pool (SQLite only
+    ever admits one writer) whose transactions start with ``BEGIN IMMEDIATE``,
+    while reads use a separate, larger pool, except on memory databases
+    outside the ``unsafe`` profile (see :meth:`SqliteTuning.shares_writer`).
+    """
+    global _engine, _SessionLocal, _async_engine, _AsyncSessionLocal, _async_read_engine, _AsyncReadSessionLocal
+    global _memory_anchor
+
+    tuning = tuning or SqliteTuning()
+    is_sqlite = make_url(database_url).get_backend_name() == "sqlite"
+    memory_url = _shared_memory_url(database_url) if is_sqlite else None
+    if memory_url is not None:
+        database_url = memory_url
+
+    if is_sqlite:
+        pragmas = tuning.pragmas(in_memory=memory_url is not None)
+        connect_args = {"check_same_thread": False}
+        engine = create_engine(_sync_url(database_url), connect_args=connect_args, poolclass=QueuePool, future=True)
+        async_engine = create_async_engine(
+            _async_url(database_url),
+            connect_args=connect_args,
+            poolclass=AsyncAdaptedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+        )
+        if tuning.shares_writer(in_memory=memory_url is not None):
+            async_read_engine = async_engine
+        else:
+            async_read_engine = create_async_engine(
+                _async_url(database_url),
+                connect_args=connect_args,
+                poolclass=AsyncAdaptedQueuePool,
+                pool_size=tuning.read_pool_size,
+                max_overflow=0,
+            )
+        for target in {engine, async_engine.sync_engine, async_read_engine.sync_engine}:
+            _apply_sqlite_pragmas(target, pragmas)
+        _begin_immediate(async_engine.sync_engine)
+    else:
+        engine = create_engine(_sync_url(database_url), future=True)
+        async_engine = async_read_engine = create_async_engine(_async_url(database_url))
+    for target in {engine, async_engine.sync_engine, async_read_engine.sync_engine}:
+        instrument_engine(target)
+
+    _memory_anchor = engine.raw_connection() if memory_url is not None else None
     _engine = engine
     _SessionLocal = sessionmaker(bind=_engine, autoflush=False, autocommit=False, expire_on_commit=False, future=True)
+    _async_engine = async_engine
+    _AsyncSessionLocal = async_sessionmaker(bind=_async_engine, autoflush=False, expire_on_commit=False)
+    _async_read_engine = async_read_engine
+    _AsyncReadSessionLocal = async_sessionmaker(bind=_async_read_engine, autoflush=False, expire_on_commit=False)
 
 
 def get_engine() -> Engine:
@@ -44,6 +202,24 @@ def get_session_factory() -> sessionmaker[Session]:
     return _SessionLocal
 
 
+def get_async_engine() -> AsyncEngine:
+    if _async_engine is None:
+        raise RuntimeError("Database engine has not been initialised. Call init_engine() first.")
+    return _async_engine
+
+
+def get_async_session_factory() -> async_sessionmaker[AsyncSession]:
+    if _AsyncSessionLocal is None:
+        raise RuntimeError("Session factory has not been initialised. Call init_engine() first.")
+    return _AsyncSessionLocal
+
+
+def get_async_read_session_factory() -> async_sessionmaker[AsyncSession]:
+    if _AsyncReadSessionLocal is None:
+        raise RuntimeError("Session factory has not been initialised. Call init_engine() first.")
+    return _AsyncReadSessionLocal
+
+
 @contextmanager
 def session_scope() -> Iterator[Session]:
     factory = get_session_factory()
@@ -58,6 +234,20 @@ def session_scope() -> Iterator[Session]:
         session.close()
 
 
+@asynccontextmanager
+async def async_session_scope() -> AsyncIterator[AsyncSession]:
+    factory = get_async_session_factory()
+    session = factory()
+    try:
+        yield session
+        await session.commit()
+    except Exception:
+        await session.rollback()
+        raise
+    finally:
+        await session.close()
+
+
 def get_db() -> Iterator[Session]:
     """FastAPI dependency that yields a SQLAlchemy session."""
     factory = get_session_factory()
@@ -66,3 +256,23 @@ def get_db() -> Iterator[Session]:
         yield session
     finally:
         session.close()
+
+
+@asynccontextmanager
+async def async_read_session_scope() -> AsyncIterator[AsyncSession]:
+    """Read-only session drawn from the reader pool; nothing is committed."""
+    session = get_async_read_session_factory()()
+    try:
+        yield session
+    finally:
+        await session.close()
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Async FastAPI dependency that yields an ``AsyncSession``."""
+    factory = get_async_session_factory()
+    session = factory()
+    try:
+        yield session
+    finally:
+        await session.close()
@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import json
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+from .clock import Clock, get_clock
+from .logic import compute_status, compute_terminal_at, now_utc, pipeline_to_dict
+from .models import Pipeline
+from .schemas import Pipeline as PipelineSchema
+from .storage import PipelineFilters, get_storage
+from .tenants import current_tenant
+from .timeline import IN_FLIGHT_STATUSES
+
+_QUEUE_SIZE = 1000
+
+
+class PipelineEvent:
+    """A project-scoped pipeline event, rendered lazily per base URL."""
+
+    __slots__ = ("id", "kind", "project_id", "payload", "_frames")
+
+    def __init__(self, event_id: int, kind: str, project_id: int, payload: dict[str, object]) -> None:
+        self.id = event_id
+        self.kind = kind
+        self.project_id = project_id
+        self.payload = payload
+        self._frames: dict[str, str] = {}
+
+    def render(self, base_url: str) -> str:
+        frame = self._frames.get(base_url)
+        if frame is None:
+            data = dict(self.payload)
+            if "web_url" in data:
+                data["web_url"] = f"{base_url}{data['web_url']}"
+            frame = f"id: {self.id}\nevent: {self.kind}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+            self._frames[base_url] = frame
+        return frame
+
+
+class Subscriber:
+    __slots__ = ("project_id", "base_url", "queue")
+
+    def __init__(self, project_id: int, base_url: str) -> None:
+        self.project_id = project_id
+        self.base_url = base_url
+        # ``None`` is the close sentinel pushed when a subscriber falls behind.
+        self.queue: asyncio.Queue[PipelineEvent | None] = asyncio.Queue(maxsize=_QUEUE_SIZE)
+
+
+class _Tracked:
+    __slots__ = ("project_id", "scenario_id", "deadline")
+
+    def __init__(self, project_id: int, scenario_id: Optional[int], deadline: Optional[datetime]) -> None:
+        self.project_id = project_id
+        self.scenario_id = scenario_id
+        self.deadline = deadline
+
+
+def _event_payload(pipeline: Pipeline, status: str) -> dict[str, object]:
+    # Serialised with an empty base URL; ``PipelineEvent.render`` prefixes it.
+    schema = PipelineSchema.model_validate(pipeline_to_dict(pipeline, base_url="", status=status))
+    return schema.model_dump(mode="json")
+
+
+class EventHub:
+    """Fan-out of pipeline transitions to per-project subscribers.
+
+    Only projects with at least one subscriber are tracked. Their running
+    pipelines sit in a single min-heap keyed on the computed terminal
+    deadline, and one scheduler task sleeps until the earliest deadline. The
+    cost is therefore one timer for the whole process, however many
+    subscribers or pipelines there are, and no per-client polling.
+
+    With ``shared=True`` pipelines are also created by other processes, so
+    ``created`` events come from :meth:`catch_up` instead of
+    :meth:`pipeline_created`: it publishes every pipeline above the last id
+    seen in each watched project, in id order, wherever it was created.
+    Deletions made by other processes are not announced.
+    """
+
+    def __init__(self, shared: bool = False) -> None:
+        self.shared = shared
+        self._subscribers: dict[int, set[Subscriber]] = {}
+        self._tracked: dict[int, _Tracked] = {}
+        # Highest pipeline id published per watched project, for ``catch_up``.
+        self._last_seen: dict[int, int] = {}
+        # Exact datetimes rather than epoch floats, so "due" here always agrees
+        # with ``compute_status`` and a due pipeline is never re-queued.
+        self._deadlines: list[tuple[datetime, int]] = []
+        self._sequence = itertools.count(1)
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._clock: Clock | None = None
+
+    def is_watched(self, project_id: int) -> bool:
+        return project_id in self._subscribers
+
+    async def subscribe(self, project_id: int, base_url: str) -> Subscriber:
+        self._ensure_scheduler()
+        subscriber = Subscriber(project_id, base_url)
+        first = project_id not in self._subscribers
+        self._subscribers.setdefault(project_id, set()).add(subscriber)
+        if first:
+            last_seen = 0
+            async for pipeline in get_storage().iter_pipelines(PipelineFilters(project_id=project_id)):
+                self._track(pipeline)
+                last_seen = pipeline.id
+            if project_id in self._subscribers:
+                self._last_seen[project_id] = last_seen
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber) -> None:
+        subscribers = self._subscribers.get(subscriber.project_id)
+        if subscribers is None:
+            return
+        subscribers.discard(subscriber)
+        if not subscribers:
+            del self._subscribers[subscriber.project_id]
+            self._last_seen.pop(subscriber.project_id, None)
+            # Heap entries for these pipelines are skipped once untracked.
+            for pipeline_id in [pid for pid, entry in self._tracked.items() if entry.project_id == subscriber.project_id]:
+                del self._tracked[pipeline_id]
+
+    async def stream(self, subscriber: Subscriber, heartbeat: float) -> AsyncIterator[str]:
+        """Yield SSE frames for ``subscriber``, with comment heartbeats."""
+        try:
+            while True:
+                try:
+                    async with asyncio.timeout(heartbeat):
+                        event = await subscriber.queue.get()
+                except TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                if event is None:
+                    return
+                yield event.render(subscriber.base_url)
+        finally:
+            self.unsubscribe(subscriber)
+
+    def pipeline_created(self, pipeline: Pipeline) -> None:
+        if self.shared or not self.is_watched(pipeline.project_id):
+            return
+        current = compute_status(pipeline)
+        self._publish("created", pipeline.project_id, _event_payload(pipeline, current))
+        self._track(pipeline)
+
+    def pipeline_deleted(self, pipeline_id: int, project_id: int) -> None:
+        self._tracked.pop(pipeline_id, None)
+        if self.is_watched(project_id):
+            self._publish("deleted", project_id, {"id": pipeline_id, "project_id": project_id})
+
+    def scenario_changed(self, scenario_id: int) -> None:
+        """Re-read tracked pipelines of a scenario whose timing may have moved."""
+        affected = [pid for pid, entry in self._tracked.items() if entry.scenario_id == scenario_id]
+        if affected and self._task is not None:
+            asyncio.get_running_loop().create_task(self._resync(affected))
+
+    async def catch_up(self) -> None:
+        """Publish pipelines created since the last call in each watched project."""
+        storage = get_storage()
+        for project_id, last_seen in list(self._last_seen.items()):
+            async for pipeline in storage.iter_pipelines(PipelineFilters(project_id=project_id, id_after=last_seen)):
+                if project_id not in self._last_seen:
+                    break
+                self._publish("created", project_id, _event_payload(pipeline, compute_status(pipeline)))
+                self._track(pipeline)
+                self._last_seen[project_id] = pipeline.id
+
+    def scenarios_changed(self) -> None:
+        """Re-read every tracked pipeline after scenarios changed in another process."""
+        if self._tracked and self._task is not None:
+            asyncio.get_running_loop().create_task(self._resync(list(self._tracked)))
+
+    def reset(self) -> None:
+        """Forget every tracked pipeline after the store was wiped; subscribers stay."""
+        self._tracked.clear()
+        self._deadlines.clear()
+        # Pipeline ids start over once the table is empty.
+        self._last_seen = dict.fromkeys(self._last_seen, 0)
+
+    async def close(self) -> None:
+        if self._clock is not None:
+            self._clock.remove_listener(self._clock_changed)
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for subscribers in self._subscribers.values():
+            for subscriber in subscribers:
+                self._offer(subscriber, None)
+
+    def _ensure_scheduler(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            self._clock = get_clock()
+            self._clock.add_listener(self._clock_changed)
+
+    def _clock_changed(self) -> None:
+        # Deadlines are virtual instants; re-plan the timer against the new time.
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _track(self, pipeline: Pipeline) -> None:
+        if compute_status(pipeline) not in IN_FLIGHT_STATUSES:
+            self._tracked.pop(pipeline.id, None)
+            return
+        deadline = compute_terminal_at(pipeline)
+        self._tracked[pipeline.id] = _Tracked(pipeline.project_id, pipeline.scenario_id, deadline)
+        if deadline is None:
+            return
+        heapq.heappush(self._deadlines, (deadline, pipeline.id))
+        if self._deadlines[0][1] == pipeline.id and self._wakeup is not None:
+            self._wakeup.set()
+
+    def _publish(self, kind: str, project_id: int, payload: dict[str, object]) -> None:
+        event = PipelineEvent(next(self._sequence), kind, project_id, payload)
+        for subscriber in list(self._subscribers.get(project_id, ())):
+            self._offer(subscriber, event)
+
+    def _offer(self, subscriber: Subscriber, event: PipelineEvent | None) -> None:
+        try:
+            subscriber.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # A subscriber that cannot keep up is disconnected rather than
+            # letting its backlog grow without bound.
+            self.unsubscribe(subscriber)
+            while not subscriber.queue.empty():
+                subscriber.queue.get_nowait()
+            subscriber.queue.put_nowait(None)
+
+    async def _resync(self, pipeline_ids: list[int]) -> None:
+        storage = get_storage()
+        for pipeline_id in pipeline_ids:
+            entry = self._tracked.get(pipeline_id)
+            if entry is None:
+                continue
+            pipeline = await storage.get_pipeline(pipeline_id)
+            if pipeline is None:
+                self._tracked.pop(pipeline_id, None)
+            else:
+                self._fire_or_track(pipeline)
+
+    def _fire_or_track(self, pipeline: Pipeline, reference_time: datetime | None = None) -> None:
+        current = compute_status(pipeline, reference_time=reference_time)
+        if current in IN_FLIGHT_STATUSES:
+            self._track(pipeline)
+            return
+        self._tracked.pop(pipeline.id, None)
+        self._publish("terminal", pipeline.project_id, _event_payload(pipeline, current))
+
+    async def _run(self) -> None:
+        assert self._wakeup is not None
+        loop = asyncio.get_running_loop()
+        storage = get_storage()
+        while True:
+            # A timer handle rather than ``wait_for``: the latter can swallow a
+            # cancellation that races with the wakeup event on Python 3.11.
+            timer = None
+            delay = get_clock().seconds_until(self._deadlines[0][0]) if self._deadlines else None
+            if delay is not None:
+                timer = loop.call_later(delay, self._wakeup.set)
+            try:
+                await self._wakeup.wait()
+            finally:
+                if timer is not None:
+                    timer.cancel()
+            self._wakeup.clear()
+
+            now = now_utc()
+            while self._deadlines and self._deadlines[0][0] <= now:
+                deadline, pipeline_id = heapq.heappop(self._deadlines)
+                entry = self._tracked.get(pipeline_id)
+                if entry is None or entry.deadline != deadline:
+                    continue
+                pipeline = await storage.get_pipeline(pipeline_id)
+                if pipeline is None:
+                    self._tracked.pop(pipeline_id, None)
+                    continue
+                self._fire_or_track(pipeline, reference_time=now)
+
+
+_hub: EventHub | None = None
+
+
+def init_event_hub(shared: bool = False) -> EventHub:
+    global _hub
+    _hub = EventHub(shared=shared)
+    return _hub
+
+
+def get_event_hub() -> EventHub:
+    tenant = current_tenant()
+    if tenant is not None:
+        return tenant.hub
+    if _hub is None:
+        raise RuntimeError("Event hub has not been initialised. Call init_event_hub() first.")
+    return _hub
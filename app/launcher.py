@@ -0,0 +1,78 @@
+"""Serve the mock from several worker processes sharing one database.
+
+    python -m app.launcher --workers 4 --port 8000
+
+The schema is created and migrated once, here, before any worker starts, so
+workers never race each other on DDL. Each worker runs with ``MOCK_WORKERS``
+set, which makes storage and the event hub poll for writes made by the other
+workers (see ``SqlStorage.poll_external_changes`` and ``EventHub.catch_up``).
+"""
+
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+from typing import Sequence
+
+import uvicorn
+from sqlalchemy import make_url
+
+from .config import Settings, get_settings
+from .database import get_engine
+from .storage import init_storage
+
+logger = logging.getLogger(__name__)
+
+
+def check_shared_database(settings: Settings) -> None:
+    """Raise ``ValueError`` unless ``settings.database_url`` can be shared by several processes."""
+    if settings.database_url.startswith("memory:"):
+        raise ValueError("memory:// keeps state inside one process; use a SQLite file or a database server")
+    url = make_url(settings.database_url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        raise ValueError("an in-memory SQLite database cannot be shared between processes; use a file")
+    if url.get_backend_name() == "sqlite" and settings.sqlite_profile != "performance":
+        logger.warning("MOCK_SQLITE_PROFILE=%s has no WAL: readers in every worker wait while one writes", settings.sqlite_profile)
+
+
+def prepare_database(settings: Settings) -> None:
+    """Create and migrate the schema, then drop this process's connections before forking."""
+    init_storage(settings)
+    get_engine().dispose()
+
+
+def main(argv: Sequence[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=int(os.getenv("MOCK_WORKERS") or os.cpu_count() or 1))
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--log-level", default="info")
+    parser.add_argument("--no-access-log", dest="access_log", action="store_false")
+    args = parser.parse_args(argv)
+    if args.workers < 1:
+        parser.error("--workers must be at least 1")
+
+    # Inherited by the workers, which read it through ``get_settings``.
+    os.environ["MOCK_WORKERS"] = str(args.workers)
+    get_settings.cache_clear()
+    settings = get_settings()
+    if args.workers > 1:
+        try:
+            check_shared_database(settings)
+        except ValueError as exc:
+            parser.error(str(exc))
+        prepare_database(settings)
+
+    uvicorn.run(
+        "app.main:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        log_level=args.log_level,
+        access_log=args.access_log,
+    )
+
+
+if __name__ == "__main__":
+    main()
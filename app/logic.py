@@ -1,25 +1,90 @@
 from __future__ import annotations
 
+import hashlib
 import json
 import secrets
-from datetime import datetime, timezone
-from typing import Dict, Optional
+from array import array
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from types import MappingProxyType
+from typing import TYPE_CHECKING, Any, Dict, Mapping, Optional, Sequence
 
+from .clock import get_clock
 from .models import Pipeline, Scenario
+from .timeline import JOB_ID_STRIDE, CompiledTimeline, compile_timeline
+
+if TYPE_CHECKING:
+    from .storage.base import PipelineBatch
+
+_UNLOADED: Any = object()
+# Optional (``pip install .[fast]``). Imported on first use rather than at
+# start-up, which it would slow down by tens of milliseconds.
+np: Any = _UNLOADED
+
+
+def _numpy() -> Any:
+    global np
+    if np is _UNLOADED:
+        try:
+            import numpy
+        except ImportError:  # pragma: no cover - exercised when numpy is absent
+            numpy = None
+        np = numpy
+    return np
 
 
 def now_utc() -> datetime:
-    return datetime.now(timezone.utc)
+    """Current instant on the process clock, virtual or real (see ``app.clock``)."""
+    return get_clock().now()
+
+
+def format_timestamp(value: datetime) -> str:
+    """ISO 8601 in the same shape pydantic renders aware UTC datetimes."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
 
 
 def generate_fake_sha() -> str:
     return secrets.token_hex(20)
 
 
+# GitLab's prefix for pipeline trigger tokens.
+TRIGGER_TOKEN_PREFIX = "glptt-"
+
+
+def generate_trigger_token() -> str:
+    return TRIGGER_TOKEN_PREFIX + secrets.token_hex(20)
+
+
+def hash_trigger_token(token: str) -> str:
+    """Digest under which a trigger token is stored and looked up."""
+    return hashlib.sha256(token.encode("utf-8")).hexdigest()
+
+
+# ``json.dumps(..., sort_keys=True)`` builds an encoder per call; reuse one.
+_VARIABLES_ENCODER = json.JSONEncoder(sort_keys=True)
+
+
 def serialise_variables(variables: Dict[str, str] | None) -> str | None:
     if not variables:
         return None
-    return json.dumps(variables, sort_keys=True)
+    return _VARIABLES_ENCODER.encode(variables)
+
+
+@lru_cache(maxsize=16384)
+def load_variables(raw: str | None) -> Mapping[str, str]:
+    """Read-only decoded ``variables_json``; cached per distinct document.
+
+    Polling a pipeline, filtering on its variables and indexing it all share
+    one decode.
+    """
+    return MappingProxyType(deserialise_variables(raw))
+
+
+def variable_rows(pipeline_id: int, raw: str | None) -> list[tuple[int, str, str]]:
+    """``(pipeline_id, key, value)`` rows of the variables side table for one pipeline."""
+    return [(pipeline_id, key, value) for key, value in load_variables(raw).items()]
 
 
 def deserialise_variables(raw: str | None) -> Dict[str, str]:
@@ -45,18 +110,55 @@ def compute_effective_settings(pipeline: Pipeline) -> tuple[Optional[int], str,
     return terminal_after, terminal_status, never_complete
 
 
-def compute_status(pipeline: Pipeline, reference_time: datetime | None = None) -> str:
-    terminal_after, terminal_status, never_complete = compute_effective_settings(pipeline)
+def terminal_deadline(created_at: datetime, terminal_after: Optional[int], never_complete: bool) -> Optional[datetime]:
+    """Return the instant a pipeline with these settings turns terminal.
 
+    ``None`` means it never completes; a value in the past means it already has.
+    """
     if never_complete:
-        return "running"
+        return None
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    return created_at + timedelta(seconds=terminal_after or 0)
+
 
+def compute_terminal_at(pipeline: Pipeline) -> Optional[datetime]:
+    terminal_after, _, never_complete = compute_effective_settings(pipeline)
+    return terminal_deadline(pipeline.created_at, terminal_after, never_complete)
+
+
+def compute_timeline(pipeline: Pipeline) -> Optional[CompiledTimeline]:
+    scenario: Optional[Scenario] = pipeline.scenario
+    if scenario is None or not scenario.timeline_json:
+        return None
+    return compile_timeline(scenario.timeline_json)
+
+
+def initial_status(pipeline: Pipeline) -> str:
+    """Status reported by the trigger response, before any time has passed."""
+    timeline = compute_timeline(pipeline)
+    return timeline.states[0] if timeline is not None else "running"
+
+
+def _elapsed(pipeline: Pipeline, reference_time: datetime | None) -> float:
     reference_time = reference_time or now_utc()
     created_at = pipeline.created_at
     if created_at.tzinfo is None:
         created_at = created_at.replace(tzinfo=timezone.utc)
+    return (reference_time - created_at).total_seconds()
+
+
+def compute_status(pipeline: Pipeline, reference_time: datetime | None = None) -> str:
+    timeline = compute_timeline(pipeline)
+    if timeline is not None:
+        return timeline.status_at(_elapsed(pipeline, reference_time))
 
-    elapsed = (reference_time - created_at).total_seconds()
+    terminal_after, terminal_status, never_complete = compute_effective_settings(pipeline)
+
+    if never_complete:
+        return "running"
+
+    elapsed = _elapsed(pipeline, reference_time)
 
     if terminal_after is None:
         return terminal_status
@@ -66,24 +168,132 @@ def compute_status(pipeline: Pipeline, reference_time: datetime | None = None) -
     return "running"
 
 
-def update_pipeline_status(pipeline: Pipeline, reference_time: datetime | None = None) -> None:
-    pipeline.status = compute_status(pipeline, reference_time=reference_time)
+def bulk_compute_statuses(
+    created_at: Sequence[float],
+    terminal_after: Sequence[float],
+    never_complete: Sequence[bool],
+    terminal_codes: Sequence[int],
+    reference_time: float,
+) -> Sequence[int]:
+    """Vectorised ``compute_status`` over columnar inputs.
+
+    ``created_at`` and ``reference_time`` are epoch seconds, ``terminal_after``
+    is the effective delay (``0`` where it is unset) and ``terminal_codes``
+    indexes each row's terminal status in a caller-owned label list. Returns
+    ``0`` for rows still running and the row's terminal code otherwise, so
+    code ``0`` must be reserved for ``running``. Uses NumPy when installed and
+    a plain loop over ``array`` buffers otherwise.
+    """
+    np = _numpy()
+    if np is not None:
+        created = np.asarray(created_at, dtype=np.float64)
+        done = (reference_time - created) >= np.asarray(terminal_after, dtype=np.float64)
+        done &= ~np.asarray(never_complete, dtype=bool)
+        return np.where(done, np.asarray(terminal_codes, dtype=np.int32), 0)
+    return array(
+        "i",
+        [
+            code if not never and reference_time - created >= after else 0
+            for created, after, never, code in zip(created_at, terminal_after, never_complete, terminal_codes)
+        ],
+    )
+
+
+def compute_batch_statuses(batch: PipelineBatch, reference_time: datetime) -> list[str]:
+    """``compute_status`` for every row of a columnar ``PipelineBatch``."""
+    labels = {"running": 0}
+    codes = [labels.setdefault(status, len(labels)) for status in batch.terminal_status]
+    reference = reference_time.timestamp()
+    result = bulk_compute_statuses(
+        batch.created_epoch,
+        [after or 0 for after in batch.terminal_after],
+        batch.never_complete,
+        codes,
+        reference,
+    )
+    names = list(labels)
+    statuses = [names[code] for code in result.tolist()]
+    # Timeline scenarios are not a single threshold; each is one bisect.
+    for index, raw in enumerate(batch.timeline_json):
+        if raw is not None:
+            statuses[index] = compile_timeline(raw).status_at(reference - batch.created_epoch[index])
+    return statuses
+
+
+def update_pipeline_status(pipeline: Pipeline, reference_time: datetime | None = None) -> bool:
+    """Apply the computed status to ``pipeline`` and report whether it changed.
+
+    ``updated_at`` is only stamped on an actual transition so callers can skip
+    the write entirely when nothing moved.
+    """
+    status = compute_status(pipeline, reference_time=reference_time)
+    if status == pipeline.status:
+        return False
+    pipeline.status = status
     pipeline.updated_at = now_utc()
+    return True
+
+
+def pipeline_jobs_to_dicts(
+    pipeline: Pipeline, base_url: str, reference_time: datetime | None = None
+) -> list[Dict[str, object]]:
+    """Render the scenario timeline's jobs as seen at ``reference_time``.
+
+    Pipelines without a timeline have no jobs.
+    """
+    timeline = compute_timeline(pipeline)
+    if timeline is None:
+        return []
+    elapsed = _elapsed(pipeline, reference_time)
+    created_at = pipeline.created_at
+    summary = {
+        "id": pipeline.id,
+        "project_id": pipeline.project_id,
+        "ref": pipeline.ref,
+        "sha": pipeline.sha,
+        "status": timeline.status_at(elapsed),
+    }
+    jobs: list[Dict[str, object]] = []
+    for position, job in enumerate(timeline.jobs, start=1):
+        job_id = pipeline.id * JOB_ID_STRIDE + position
+        started = job.started is not None and elapsed >= job.started
+        finished = job.finished is not None and elapsed >= job.finished
+        queued_duration = None
+        if job.queued is not None and elapsed >= job.queued:
+            queued_duration = min(elapsed, job.started) - job.queued
+        jobs.append(
+            {
+                "id": job_id,
+                "name": job.name,
+                "stage": job.stage,
+                "status": job.status_at(elapsed),
+                "ref": pipeline.ref,
+                "allow_failure": job.allow_failure,
+                "created_at": created_at,
+                "started_at": created_at + timedelta(seconds=job.started) if started else None,
+                "finished_at": created_at + timedelta(seconds=job.finished) if finished else None,
+                "duration": min(elapsed, job.finished) - job.started if started else None,
+                "queued_duration": queued_duration,
+                "web_url": f"{base_url}/projects/{pipeline.project_id}/jobs/{job_id}",
+                "pipeline": summary,
+            }
+        )
+    return jobs
 
 
-def pipeline_to_dict(pipeline: Pipeline, base_url: str) -> Dict[str, object]:
+def pipeline_to_dict(pipeline: Pipeline, base_url: str, status: str | None = None) -> Dict[str, object]:
     terminal_after, terminal_status, _ = compute_effective_settings(pipeline)
     return {
         "id": pipeline.id,
         "project_id": pipeline.project_id,
         "ref": pipeline.ref,
         "sha": pipeline.sha,
-        "status": pipeline.status,
+        "status": status or pipeline.status,
         "web_url": f"{base_url}/projects/{pipeline.project_id}/pipelines/{pipeline.id}",
         "source": "trigger",
         "created_at": pipeline.created_at,
         "updated_at": pipeline.updated_at,
-        "variables": deserialise_variables(pipeline.variables_json),
+        "variables": load_variables(pipeline.variables_json),
         "scenario_id": pipeline.scenario_id,
         "terminal_after_seconds": terminal_after,
         "terminal_status": terminal_status,
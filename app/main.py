@@ -4,25 +4,52 @@ from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
+from .clock import Clock, init_clock
 from .config import get_settings
-from .database import Base, get_engine, init_engine, session_scope
+from .events import EventHub, get_event_hub, init_event_hub
+from .metrics import MetricsMiddleware, init_metrics
 from .openapi import attach_custom_openapi
-from .routes import pipelines, scenarios
-from .seeding import seed_scenarios
+from .routes import admin, events, pipelines, scenarios, stats, triggers
+from .storage import MemoryStorage, get_storage, init_storage
+from .tasks import Retention, claim_maintenance, get_retention, init_retention, start_coherence, start_materializer, start_retention
+from .tenants import Tenant, TenantMiddleware, get_tenants, init_tenants
 
 
 @asynccontextmanager
 async def _lifespan(app: FastAPI):
-    with session_scope() as session:
-        seed_scenarios(session)
+    await get_storage().seed_scenarios()
+    settings = get_settings()
+    background = [start_coherence(get_storage(), get_event_hub(), settings)]
+    if claim_maintenance(settings):
+        background += [
+            start_materializer(get_storage(), settings.materialize_interval_seconds),
+            start_retention(get_retention(), settings.retention_interval_seconds),
+        ]
     yield
+    for task in background:
+        if task is not None:
+            task.cancel()
+    await get_retention().close()
+    await get_event_hub().close()
+    await get_tenants().close()
+
+
+def _new_tenant(name: str) -> Tenant:
+    # Always in memory, with the built-in scenarios shared rather than copied.
+    # Retention follows the process-wide policy, but only ever on demand:
+    # the background loop prunes the default storage alone.
+    storage = MemoryStorage(seeded=True)
+    default = get_retention()
+    return Tenant(name, storage, EventHub(), Clock(), Retention(storage, default.policy, default.batch_size))
 
 
 def create_app() -> FastAPI:
     settings = get_settings()
-    init_engine(settings.database_url)
-    engine = get_engine()
-    Base.metadata.create_all(bind=engine)
+    init_clock()
+    init_retention(init_storage(settings), settings)
+    init_event_hub(shared=settings.workers > 1)
+    metrics = init_metrics()
+    tenants = init_tenants(_new_tenant, settings.tenant_capacity)
 
     app = FastAPI(
         title="Mock GitLab Pipeline Trigger Service",
@@ -31,12 +58,27 @@ def create_app() -> FastAPI:
         lifespan=_lifespan,
     )
 
+    app.add_middleware(TenantMiddleware, registry=tenants, enabled=settings.workers <= 1)
+    app.add_middleware(MetricsMiddleware, metrics=metrics)
+
     app.include_router(pipelines.router)
+    app.include_router(triggers.router)
     app.include_router(scenarios.router)
+    app.include_router(events.router)
+    app.include_router(stats.router)
+    app.include_router(admin.router)
 
     attach_custom_openapi(app)
 
     return app
 
 
-app = create_app()
+def __getattr__(name: str) -> FastAPI:
+    # ``app.main:app`` is built on first access, not at import, so importing
+    # this module has no side effects; ``uvicorn --factory app.main:create_app``
+    # skips the module attribute altogether.
+    if name != "app":
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    global app
+    app = create_app()
+    return app
@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+from typing import Iterable, Optional
+
+from sqlalchemy import Engine, event
+
+# Upper bounds, in seconds, of request and query latency histograms.
+DURATION_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Route label for requests that matched no route, to keep label cardinality bounded.
+UNMATCHED_ROUTE = "unmatched"
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+Sample = tuple[tuple[tuple[str, str], ...], float]
+
+
+class _Histogram:
+    __slots__ = ("counts", "total")
+
+    def __init__(self) -> None:
+        # One slot per bucket plus the +Inf overflow; not cumulative.
+        self.counts = [0] * (len(DURATION_BUCKETS) + 1)
+        self.total = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(DURATION_BUCKETS, value)] += 1
+        self.total += value
+
+    def merge(self, other: _Histogram) -> None:
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.total += other.total
+
+
+class _Shard:
+    """Counters written by one thread only, so recording takes no lock."""
+
+    __slots__ = ("requests", "durations", "db_seconds", "db_queries", "in_flight", "queries")
+
+    def __init__(self) -> None:
+        self.requests: dict[tuple[str, str, str], int] = {}
+        self.durations: dict[tuple[str, str], _Histogram] = {}
+        self.db_seconds: dict[tuple[str, str], float] = {}
+        self.db_queries: dict[tuple[str, str], int] = {}
+        self.in_flight: dict[str, int] = {}
+        self.queries = _Histogram()
+
+
+class _RequestTiming:
+    __slots__ = ("db_seconds", "queries")
+
+    def __init__(self) -> None:
+        self.db_seconds = 0.0
+        self.queries = 0
+
+
+# Database time of the request being served; SQLAlchemy's asyncio greenlets
+# inherit it, so cursor events on the loop thread see the right request.
+_current_request: ContextVar[Optional[_RequestTiming]] = ContextVar("mock_request_timing", default=None)
+
+
+class Metrics:
+    """Request and database counters kept in per-thread shards and merged on scrape.
+
+    The hot path touches only the calling thread's shard: a ``threading.local``
+    lookup and a few dict updates. ``render`` sums the shards; copies are
+    taken with ``list(dict.items())``, which the GIL keeps atomic.
+    """
+
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._shards: list[_Shard] = []
+        self._lock = threading.Lock()
+
+    def _shard(self) -> _Shard:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = _Shard()
+            with self._lock:
+                self._shards.append(shard)
+            return shard
+
+    def request_started(self, method: str) -> None:
+        in_flight = self._shard().in_flight
+        in_flight[method] = in_flight.get(method, 0) + 1
+
+    def request_finished(self, method: str, route: str, status: int, seconds: float, timing: _RequestTiming) -> None:
+        shard = self._shard()
+        shard.in_flight[method] = shard.in_flight.get(method, 0) - 1
+        key = (method, route, str(status))
+        shard.requests[key] = shard.requests.get(key, 0) + 1
+        histogram = shard.durations.get(key[:2])
+        if histogram is None:
+            histogram = shard.durations[key[:2]] = _Histogram()
+        histogram.observe(seconds)
+        shard.db_seconds[key[:2]] = shard.db_seconds.get(key[:2], 0.0) + timing.db_seconds
+        shard.db_queries[key[:2]] = shard.db_queries.get(key[:2], 0) + timing.queries
+
+    def query_finished(self, seconds: float) -> None:
+        self._shard().queries.observe(seconds)
+        timing = _current_request.get()
+        if timing is not None:
+            timing.db_seconds += seconds
+            timing.queries += 1
+
+    def render(self) -> str:
+        with self._lock:
+            shards = list(self._shards)
+        requests: dict[tuple[str, str, str], int] = {}
+        durations: dict[tuple[str, str], _Histogram] = {}
+        db_seconds: dict[tuple[str, str], float] = {}
+        db_queries: dict[tuple[str, str], int] = {}
+        in_flight: dict[str, int] = {}
+        queries = _Histogram()
+        for shard in shards:
+            for key, count in list(shard.requests.items()):
+                requests[key] = requests.get(key, 0) + count
+            for key, histogram in list(shard.durations.items()):
+                durations.setdefault(key, _Histogram()).merge(histogram)
+            for key, seconds in list(shard.db_seconds.items()):
+                db_seconds[key] = db_seconds.get(key, 0.0) + seconds
+            for key, count in list(shard.db_queries.items()):
+                db_queries[key] = db_queries.get(key, 0) + count
+            for method, count in list(shard.in_flight.items()):
+                in_flight[method] = in_flight.get(method, 0) + count
+            queries.merge(shard.queries)
+
+        def labels(key: tuple[str, ...], names: tuple[str, ...] = ("method", "route", "status")) -> tuple[tuple[str, str], ...]:
+            return tuple(zip(names, key))
+
+        handler_seconds = {key: histogram.total - db_seconds.get(key, 0.0) for key, histogram in durations.items()}
+        parts = [
+            format_family(
+                "mock_http_requests_total",
+                "counter",
+                "HTTP requests by route and status code.",
+                [(labels(key), count) for key, count in sorted(requests.items())],
+            ),
+            format_family(
+                "mock_http_requests_in_flight",
+                "gauge",
+                "HTTP requests currently being served.",
+                [(labels((method,)), count) for method, count in sorted(in_flight.items())],
+            ),
+            _format_histogram(
+                "mock_http_request_duration_seconds",
+                "HTTP request latency, until the last body byte is sent.",
+                [(labels(key), histogram) for key, histogram in sorted(durations.items())],
+            ),
+            format_family(
+                "mock_http_request_db_seconds_total",
+                "counter",
+                "Time spent executing SQL statements while serving requests.",
+                [(labels(key), seconds) for key, seconds in sorted(db_seconds.items())],
+            ),
+            format_family(
+                "mock_http_request_handler_seconds_total",
+                "counter",
+                "Request time not spent in SQL statements.",
+                [(labels(key), seconds) for key, seconds in sorted(handler_seconds.items())],
+            ),
+            format_family(
+                "mock_http_request_db_queries_total",
+                "counter",
+                "SQL statements executed while serving requests.",
+                [(labels(key), count) for key, count in sorted(db_queries.items())],
+            ),
+            _format_histogram("mock_db_query_duration_seconds", "SQL statement latency, including background tasks.", [((), queries)]),
+        ]
+        return "".join(parts)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Iterable[tuple[str, str]]) -> str:
+    rendered = ",".join(f'{name}="{_escape(value)}"' for name, value in labels)
+    return f"{{{rendered}}}" if rendered else ""
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def format_family(name: str, kind: str, help_text: str, samples: Iterable[Sample]) -> str:
+    """Render one metric family in the Prometheus text exposition format."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    lines += [f"{name}{_format_labels(labels)} {_format_value(value)}" for labels, value in samples]
+    return "\n".join(lines) + "\n"
+
+
+def _format_histogram(name: str, help_text: str, series: Iterable[tuple[tuple[tuple[str, str], ...], _Histogram]]) -> str:
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    for labels, histogram in series:
+        cumulative = 0
+        for bound, count in zip((*DURATION_BUCKETS, "+Inf"), histogram.counts):
+            cumulative += count
+            lines.append(f"{name}_bucket{_format_labels((*labels, ('le', str(bound))))} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {histogram.total!r}")
+        lines.append(f"{name}_count{_format_labels(labels)} {cumulative}")
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording per-route request metrics into :class:`Metrics`.
+
+    Written against raw ASGI rather than ``BaseHTTPMiddleware`` so streamed
+    bodies pass straight through; the route label is the matched path
+    template, which FastAPI stores in ``scope["route"]`` during routing.
+    """
+
+    def __init__(self, app, metrics: Metrics) -> None:
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        status_code = 500
+
+        async def send_wrapper(message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        timing = _RequestTiming()
+        token = _current_request.set(timing)
+        self.metrics.request_started(method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            label = getattr(route, "path_format", None) or getattr(route, "path", None) or UNMATCHED_ROUTE
+            self.metrics.request_finished(method, label, status_code, time.perf_counter() - started, timing)
+            _current_request.reset(token)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Time every statement run on ``engine`` (for async engines, pass ``sync_engine``)."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):  # type: ignore[unused-ignore]
+        # Kept on the execution context, so a failed statement leaves nothing behind.
+        context.mock_query_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):  # type: ignore[unused-ignore]
+        get_metrics().query_finished(time.perf_counter() - context.mock_query_started)
+
+
+_metrics = Metrics()
+
+
+def init_metrics() -> Metrics:
+    global _metrics
+    _metrics = Metrics()
+    return _metrics
+
+
+def get_metrics() -> Metrics:
+    return _metrics
@@ -1,12 +1,36 @@
 from __future__ import annotations
 
-from datetime import datetime
-from typing import Optional
+from datetime import datetime, timezone
+from typing import Any, Optional
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.types import TypeDecorator
 
+from .clock import get_clock
 from .database import Base
+from .timeline import load_timeline
+
+
+class UTCDateTime(TypeDecorator[datetime]):
+    """Store naive UTC timestamps and always hand back timezone-aware values.
+
+    SQLite drops ``tzinfo`` on the way in, which would otherwise make freshly
+    created rows and reloaded rows serialise differently.
+    """
+
+    impl = DateTime
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[datetime], dialect) -> Optional[datetime]:  # type: ignore[override]
+        if value is not None and value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    def process_result_value(self, value: Optional[datetime], dialect) -> Optional[datetime]:  # type: ignore[override]
+        if value is not None and value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value
 
 
 class Scenario(Base):
@@ -17,23 +41,83 @@ class Scenario(Base):
     terminal_after_seconds: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     terminal_status: Mapped[str] = mapped_column(String, nullable=False, default="success")
     never_complete: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    # Optional multi-stage timeline (see ``app.timeline``); when set, the
+    # terminal_* columns are derived from it.
+    timeline_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
 
     pipelines: Mapped[list["Pipeline"]] = relationship(back_populates="scenario")
 
+    @property
+    def timeline(self) -> Optional[dict[str, Any]]:
+        return load_timeline(self.timeline_json)
+
 
 class Pipeline(Base):
     __tablename__ = "pipelines"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     project_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
-    ref: Mapped[str] = mapped_column(String, nullable=False)
+    ref: Mapped[str] = mapped_column(String, nullable=False, index=True)
     sha: Mapped[str] = mapped_column(String, nullable=False)
     status: Mapped[str] = mapped_column(String, nullable=False, default="running")
     variables_json: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
-    scenario_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("scenarios.scenario_id", ondelete="SET NULL"), nullable=True)
+    scenario_id: Mapped[Optional[int]] = mapped_column(Integer, ForeignKey("scenarios.scenario_id", ondelete="SET NULL"), nullable=True, index=True)
     terminal_after_seconds: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
     terminal_status: Mapped[Optional[str]] = mapped_column(String, nullable=True)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
-    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, default=datetime.utcnow)
+    created_at: Mapped[datetime] = mapped_column(UTCDateTime(), nullable=False, default=lambda: get_clock().now(), index=True)
+    updated_at: Mapped[datetime] = mapped_column(UTCDateTime(), nullable=False, default=lambda: get_clock().now())
+    # Denormalised deadline from the effective scenario/inline settings; NULL
+    # means the pipeline never completes. Kept in sync on scenario changes.
+    terminal_at: Mapped[Optional[datetime]] = mapped_column(UTCDateTime(), nullable=True)
 
     scenario: Mapped[Optional[Scenario]] = relationship(back_populates="pipelines")
+
+    __table_args__ = (Index("ix_pipelines_status_terminal_at", "status", "terminal_at"), Index("ix_pipelines_terminal_at", "terminal_at"))
+
+
+class PipelineVariable(Base):
+    """One CI variable of a pipeline, for indexed ``variables[KEY]=VALUE`` lookups.
+
+    ``Pipeline.variables_json`` stays the copy that is rendered; these rows
+    mirror it and are written in the same transaction.
+    """
+
+    __tablename__ = "pipeline_variables"
+
+    pipeline_id: Mapped[int] = mapped_column(Integer, ForeignKey("pipelines.id", ondelete="CASCADE"), primary_key=True)
+    key: Mapped[str] = mapped_column(String, primary_key=True)
+    value: Mapped[str] = mapped_column(String, nullable=False)
+
+    # Covering: a lookup reads pipeline ids straight from the index.
+    __table_args__ = (Index("ix_pipeline_variables_key_value", "key", "value", "pipeline_id"),)
+
+
+class CacheGeneration(Base):
+    """Change counter of a cached table, bumped in the transaction that changes it.
+
+    Processes sharing the database compare it with the generation they last
+    loaded to tell whether their in-memory copy went stale.
+    """
+
+    __tablename__ = "cache_generations"
+
+    name: Mapped[str] = mapped_column(String, primary_key=True)
+    generation: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+class TriggerToken(Base):
+    """Pipeline trigger token of a project.
+
+    Only a SHA-256 digest of the token is stored; verification looks the
+    digest up through its unique index.
+    """
+
+    __tablename__ = "trigger_tokens"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
+    project_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+    description: Mapped[Optional[str]] = mapped_column(String, nullable=True)
+    token_hash: Mapped[str] = mapped_column(String, nullable=False, unique=True)
+    # First characters of the token, shown in listings the way GitLab does.
+    token_prefix: Mapped[str] = mapped_column(String, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(UTCDateTime(), nullable=False, default=lambda: get_clock().now())
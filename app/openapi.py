@@ -39,6 +39,165 @@ def _scenario_schema() -> dict:
             "terminal_after_seconds": {"type": "integer", "nullable": True, "example": 300},
             "terminal_status": {"type": "string", "example": "success"},
             "never_complete": {"type": "boolean", "example": False},
+            "timeline": {"allOf": [{"$ref": "#/components/schemas/ScenarioTimeline"}], "nullable": True},
+        },
+    }
+
+
+def _scenario_timeline_schema() -> dict:
+    job = {
+        "type": "object",
+        "required": ["name"],
+        "properties": {
+            "name": {"type": "string", "example": "unit"},
+            "queued_seconds": {"type": "integer", "minimum": 0, "default": 0},
+            "duration_seconds": {"type": "integer", "minimum": 0, "default": 0, "example": 30},
+            "status": {"type": "string", "enum": ["success", "failed", "canceled", "skipped"], "default": "success"},
+            "allow_failure": {"type": "boolean", "default": False},
+        },
+    }
+    stage = {
+        "type": "object",
+        "required": ["name", "jobs"],
+        "properties": {
+            "name": {"type": "string", "example": "test"},
+            "jobs": {"type": "array", "minItems": 1, "items": job},
+        },
+    }
+    return {
+        "type": "object",
+        "required": ["stages"],
+        "description": "Stages run in order, jobs within a stage in parallel. When set, the scenario's terminal_* fields are derived from it.",
+        "properties": {
+            "created_seconds": {"type": "integer", "minimum": 0, "default": 0},
+            "stages": {"type": "array", "minItems": 1, "items": stage},
+        },
+    }
+
+
+def _job_schema() -> dict:
+    return {
+        "type": "object",
+        "required": ["id", "name", "stage", "status", "created_at", "pipeline"],
+        "properties": {
+            "id": {"type": "integer", "example": 101003},
+            "name": {"type": "string", "example": "unit"},
+            "stage": {"type": "string", "example": "test"},
+            "status": {"type": "string", "example": "running"},
+            "ref": {"type": "string", "example": "main"},
+            "allow_failure": {"type": "boolean"},
+            "created_at": {"type": "string", "format": "date-time"},
+            "started_at": {"type": "string", "format": "date-time", "nullable": True},
+            "finished_at": {"type": "string", "format": "date-time", "nullable": True},
+            "duration": {"type": "number", "nullable": True},
+            "queued_duration": {"type": "number", "nullable": True},
+            "web_url": {"type": "string"},
+            "pipeline": {
+                "type": "object",
+                "properties": {
+                    "id": {"type": "integer"},
+                    "project_id": {"type": "integer"},
+                    "ref": {"type": "string"},
+                    "sha": {"type": "string"},
+                    "status": {"type": "string"},
+                },
+            },
+        },
+    }
+
+
+def _pipeline_stats_schema() -> dict:
+    counts = {"type": "object", "additionalProperties": {"type": "integer"}, "example": {"running": 3, "success": 7}}
+    return {
+        "type": "object",
+        "required": ["reference_time", "total", "by_status", "by_project", "by_scenario", "time_to_terminal"],
+        "properties": {
+            "reference_time": {"type": "string", "format": "date-time"},
+            "total": {"type": "integer", "example": 10},
+            "by_status": counts,
+            "by_project": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"project_id": {"type": "integer"}, "total": {"type": "integer"}, "by_status": counts},
+                },
+            },
+            "by_scenario": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "scenario_id": {"type": "integer", "nullable": True},
+                        "total": {"type": "integer"},
+                        "by_status": counts,
+                    },
+                },
+            },
+            "time_to_terminal": {
+                "type": "object",
+                "properties": {
+                    "buckets": {
+                        "type": "array",
+                        "items": {
+                            "type": "object",
+                            "properties": {
+                                "lt_seconds": {"type": "integer", "nullable": True, "example": 60},
+                                "count": {"type": "integer"},
+                            },
+                        },
+                    },
+                    "never": {"type": "integer"},
+                },
+            },
+        },
+    }
+
+
+def _retention_status_schema() -> dict:
+    return {
+        "type": "object",
+        "required": ["policy", "runs", "pipelines_deleted", "bytes_reclaimed", "last_run_at", "last_run_seconds"],
+        "properties": {
+            "policy": {
+                "type": "object",
+                "description": "`0` disables a limit.",
+                "properties": {
+                    "max_age_seconds": {"type": "integer", "example": 86400},
+                    "max_per_project": {"type": "integer", "example": 0},
+                    "max_rows": {"type": "integer", "example": 1000000},
+                },
+            },
+            "runs": {"type": "integer"},
+            "pipelines_deleted": {"type": "integer"},
+            "bytes_reclaimed": {"type": "integer"},
+            "last_run_at": {"type": "string", "format": "date-time", "nullable": True},
+            "last_run_seconds": {"type": "number"},
+        },
+    }
+
+
+def _clock_state_schema() -> dict:
+    return {
+        "type": "object",
+        "required": ["mode", "now", "speed"],
+        "properties": {
+            "mode": {"type": "string", "enum": ["wall", "virtual"]},
+            "now": {"type": "string", "format": "date-time"},
+            "speed": {"type": "number", "description": "Virtual seconds per real second; `0` while frozen.", "example": 60},
+        },
+    }
+
+
+def _clock_update_schema() -> dict:
+    return {
+        "type": "object",
+        "description": "Applied in field order; omitted fields are left alone. Virtual time never moves backwards.",
+        "properties": {
+            "wall": {"type": "boolean", "default": False, "description": "Return to real time; other fields are ignored."},
+            "now": {"type": "string", "format": "date-time", "description": "Jump forward to this instant."},
+            "advance_seconds": {"type": "number", "minimum": 0, "example": 300},
+            "speed": {"type": "number", "minimum": 0, "description": "`0` freezes the clock.", "example": 60},
+            "freeze": {"type": "boolean", "default": False},
         },
     }
 
@@ -62,6 +221,52 @@ def _trigger_request_schema() -> dict:
     }
 
 
+def _trigger_token_schema() -> dict:
+    return {
+        "type": "object",
+        "required": ["id", "token", "created_at"],
+        "properties": {
+            "id": {"type": "integer", "example": 10},
+            "description": {"type": "string", "nullable": True, "example": "deploy"},
+            "token": {
+                "type": "string",
+                "description": "The whole token in the creation response; its first 4 characters in listings.",
+                "example": "glptt-0123456789abcdef0123456789abcdef01234567",
+            },
+            "created_at": {"type": "string", "format": "date-time"},
+        },
+    }
+
+
+def _trigger_token_create_schema() -> dict:
+    return {
+        "type": "object",
+        "properties": {
+            "description": {"type": "string", "nullable": True, "example": "deploy"},
+            "token": {"type": "string", "minLength": 1, "description": "Token to register; generated when omitted."},
+        },
+    }
+
+
+def _batch_trigger_item_schema() -> dict:
+    schema = _trigger_request_schema()
+    schema["required"] = ["project_id", "token", "ref"]
+    schema["properties"] = {"project_id": {"type": "integer", "example": 123}, **schema["properties"]}
+    return schema
+
+
+def _batch_trigger_result_schema() -> dict:
+    return {
+        "type": "object",
+        "required": ["status"],
+        "properties": {
+            "status": {"type": "integer", "example": 201},
+            "pipeline": {"allOf": [{"$ref": "#/components/schemas/Pipeline"}], "nullable": True},
+            "detail": {"type": "string", "nullable": True, "example": "Scenario not found"},
+        },
+    }
+
+
 def build_openapi_schema() -> dict:
     return {
         "openapi": "3.0.3",
@@ -79,15 +284,24 @@ def build_openapi_schema() -> dict:
             "schemas": {
                 "Pipeline": _pipeline_schema(),
                 "Scenario": _scenario_schema(),
+                "ScenarioTimeline": _scenario_timeline_schema(),
+                "Job": _job_schema(),
+                "PipelineStats": _pipeline_stats_schema(),
+                "RetentionStatus": _retention_status_schema(),
+                "ClockState": _clock_state_schema(),
+                "ClockUpdate": _clock_update_schema(),
                 "TriggerRequest": _trigger_request_schema(),
+                "TriggerToken": _trigger_token_schema(),
+                "TriggerTokenCreate": _trigger_token_create_schema(),
             },
         },
         "paths": {
             "/projects/{project_id}/trigger/pipeline": {
                 "post": {
                     "summary": "Trigger pipeline",
+                    "description": "A registered trigger token of the project in `token` needs no other credentials.",
                     "tags": ["pipelines"],
-                    "security": [{"PrivateToken": []}, {"Bearer": []}],
+                    "security": [{"PrivateToken": []}, {"Bearer": []}, {}],
                     "parameters": [
                         {
                             "name": "project_id",
@@ -125,11 +339,59 @@ def build_openapi_schema() -> dict:
                                 }
                             },
                         },
+                        "401": {"description": "Not a trigger token of the project, and no valid private token"},
                         "404": {"description": "Scenario not found"},
                         "422": {"description": "Validation error"},
                     },
                 }
             },
+            "/projects/{project_id}/triggers": {
+                "get": {
+                    "summary": "List trigger tokens",
+                    "tags": ["triggers"],
+                    "security": [{"PrivateToken": []}, {"Bearer": []}],
+                    "parameters": [{"name": "project_id", "in": "path", "required": True, "schema": {"type": "integer"}}],
+                    "responses": {
+                        "200": {
+                            "description": "Trigger tokens of the project, tokens truncated",
+                            "content": {
+                                "application/json": {
+                                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/TriggerToken"}}
+                                }
+                            },
+                        }
+                    },
+                },
+                "post": {
+                    "summary": "Create trigger token",
+                    "tags": ["triggers"],
+                    "security": [{"PrivateToken": []}, {"Bearer": []}],
+                    "parameters": [{"name": "project_id", "in": "path", "required": True, "schema": {"type": "integer"}}],
+                    "requestBody": {
+                        "required": True,
+                        "content": {"application/json": {"schema": {"$ref": "#/components/schemas/TriggerTokenCreate"}}},
+                    },
+                    "responses": {
+                        "201": {
+                            "description": "Created; the only response carrying the whole token",
+                            "content": {"application/json": {"schema": {"$ref": "#/components/schemas/TriggerToken"}}},
+                        },
+                        "409": {"description": "Token already in use"},
+                    },
+                },
+            },
+            "/projects/{project_id}/triggers/{trigger_id}": {
+                "delete": {
+                    "summary": "Delete trigger token",
+                    "tags": ["triggers"],
+                    "security": [{"PrivateToken": []}, {"Bearer": []}],
+                    "parameters": [
+                        {"name": "project_id", "in": "path", "required": True, "schema": {"type": "integer"}},
+                        {"name": "trigger_id", "in": "path", "required": True, "schema": {"type": "integer"}},
+                    ],
+                    "responses": {"204": {"description": "Deleted"}, "404": {"description": "Not found"}},
+                }
+            },
             "/projects/{project_id}/pipelines/{pipeline_id}": {
                 "get": {
                     "summary": "Get pipeline",
@@ -138,6 +400,13 @@ def build_openapi_schema() -> dict:
                     "parameters": [
                         {"name": "project_id", "in": "path", "required": True, "schema": {"type": "integer"}},
                         {"name": "pipeline_id", "in": "path", "required": True, "schema": {"type": "integer"}},
+                        {
+                            "name": "wait",
+                            "in": "query",
+                            "required": False,
+                            "description": "Long-poll: block up to this many seconds for a terminal status.",
+                            "schema": {"type": "number", "minimum": 0},
+                        },
                     ],
                     "responses": {
                         "200": {
@@ -152,11 +421,53 @@ def build_openapi_schema() -> dict:
                     },
                 }
             },
+            "/projects/{project_id}/pipelines/{pipeline_id}/jobs": {
+                "get": {
+                    "summary": "List pipeline jobs",
+                    "description": "Jobs of the scenario timeline as of now; empty for pipelines without a timeline.",
+                    "tags": ["pipelines"],
+                    "security": [{"PrivateToken": []}, {"Bearer": []}],
+                    "parameters": [
+                        {"name": "project_id", "in": "path", "required": True, "schema": {"type": "integer"}},
+                        {"name": "pipeline_id", "in": "path", "required": True, "schema": {"type": "integer"}},
+                    ],
+                    "responses": {
+                        "200": {
+                            "description": "Pipeline jobs",
+                            "content": {
+                                "application/json": {
+                                    "schema": {"type": "array", "items": {"$ref": "#/components/schemas/Job"}}
+                                }
+                            },
+                        },
+                        "404": {"description": "Pipeline not found"},
+                    },
+                }
+            },
             "/_mock/pipelines": {
                 "get": {
                     "summary": "List pipelines",
                     "tags": ["pipelines"],
                     "security": [{"PrivateToken": []}, {"Bearer": []}],
+                    "parameters": [
+                        {"name": "project_id", "in": "query", "required": False, "schema": {"type": "integer"}},
+                        {"name": "ref", "in": "query", "required": False, "schema": {"type": "string"}},
+                        {"name": "status", "in": "query", "required": False, "schema": {"type": "string"}},
+                        {"name": "scenario_id", "in": "query", "required": False, "schema": {"type": "integer"}},
+                        {"name": "created_after", "in": "query", "required": False, "schema": {"type": "string", "format": "date-time"}},
+                        {"name": "created_before", "in": "query", "required": False, "schema": {"type": "string", "format": "date-time"}},
+                        {"name": "id_after", "in": "query", "required": False, "schema": {"type": "integer"}},
+                        {
+                            "name": "variables",
+                            "in": "query",
+                            "required": False,
+                            "description": "`variables[KEY]=VALUE`: only pipelines triggered with every given variable set to that value.",
+                            "style": "deepObject",
+                            "explode": True,
+                            "schema": {"type": "object", "additionalProperties": {"type": "string"}},
+                        },
+                        {"name": "per_page", "in": "query", "required": False, "schema": {"type": "integer", "minimum": 1}},
+                    ],
                     "responses": {
                         "200": {
                             "description": "List of pipelines",
@@ -172,6 +483,97 @@ def build_openapi_schema() -> dict:
                     },
                 }
             },
+            "/_mock/pipelines/export": {
+                "get": {
+                    "summary": "Export pipelines",
+                    "description": "Every matching pipeline as NDJSON: one listing object per line, streamed from a server-side cursor.",
+                    "tags": ["pipelines"],
+                    "security": [{"PrivateToken": []}, {"Bearer": []}],
+                    "parameters": [
+                        {"name": "project_id", "in": "query", "required": False, "schema": {"type": "integer"}},
+                        {"name": "ref", "in": "query", "required": False, "schema": {"type": "string"}},
+                        {"name": "status", "in": "query", "required": False, "schema": {"type": "string"}},
+                        {"name": "scenario_id", "in": "query", "required": False, "schema": {"type": "integer"}},
+                        {"name": "created_after", "in": "query", "required": False, "schema": {"type": "string", "format": "date-time"}},
+                        {"name": "created_before", "in": "query", "required": False, "schema": {"type": "string", "format": "date-time"}},
+                        {"name": "id_after", "in": "query", "required": False, "schema": {"type": "integer"}},
+                        {
+                            "name": "variables",
+                            "in": "query",
+                            "required": False,
+                            "description": "`variables[KEY]=VALUE`: only pipelines triggered with every given variable set to that value.",
+                            "style": "deepObject",
+                            "explode": True,
+                            "schema": {"type": "object", "additionalProperties": {"type": "string"}},
+                        },
+                    ],
+                    "responses": {
+                        "200": {
+                            "description": "One pipeline per line",
+                            "content": {"application/x-ndjson": {"schema": {"$ref": "#/components/schemas/Pipeline"}}},
+                        }
+                    },
+                }
+            },
+            "/_mock/pipelines/import": {
+                "post": {
+                    "summary": "Import pipelines",
+                    "description": "Insert pipelines from NDJSON lines in the export shape; only `project_id` and `ref` are required. All or nothing.",
+                    "tags": ["pipelines"],
+                    "security": [{"PrivateToken": []}, {"Bearer": []}],
+                    "parameters": [
+                        {
+                            "name": "keep_ids",
+                            "in": "query",
+                            "required": False,
+                            "description": "Keep the `id` of each line; when false, every pipeline gets a new id.",
+                            "schema": {"type": "boolean", "default": True},
+                        }
+                    ],
+                    "requestBody": {
+                        "required": True,
+                        "content": {"application/x-ndjson": {"schema": {"$ref": "#/components/schemas/Pipeline"}}},
+                    },
+                    "responses": {
+                        "200": {
+                            "description": "Number of pipelines imported",
+                            "content": {
+                                "application/json": {
+                                    "schema": {"type": "object", "properties": {"imported": {"type": "integer", "example": 5000}}}
+                                }
+                            },
+                        },
+                        "409": {"description": "An id is already in use"},
+                        "422": {"description": "A line is invalid; the detail names it"},
+                    },
+                }
+            },
+            "/_mock/pipelines:batch": {
+                "post": {
+                    "summary": "Trigger pipelines in bulk",
+                    "tags": ["pipelines"],
+                    "security": [{"PrivateToken": []}, {"Bearer": []}],
+                    "requestBody": {
+                        "required": True,
+                        "content": {
+                            "application/json": {
+                                "schema": {"type": "array", "items": _batch_trigger_item_schema()}
+                            }
+                        },
+                    },
+                    "responses": {
+                        "200": {
+                            "description": "Per-item results in request order",
+                            "content": {
+                                "application/json": {
+                                    "schema": {"type": "array", "items": _batch_trigger_result_schema()}
+                                }
+                            },
+                        },
+                        "422": {"description": "Body is not a JSON array"},
+                    },
+                }
+            },
             "/_mock/pipelines/{pipeline_id}": {
                 "delete": {
                     "summary": "Delete pipeline",
@@ -183,6 +585,151 @@ def build_openapi_schema() -> dict:
                     "responses": {"204": {"description": "Deleted"}, "404": {"description": "Not found"}},
                 }
             },
+            "/_mock/stats": {
+                "get": {
+                    "summary": "Aggregate pipeline statistics",
+                    "description": "Counts by computed status, project and scenario, plus a time-to-terminal histogram of in-flight pipelines.",
+                    "tags": ["stats"],
+                    "security": [{"PrivateToken": []}, {"Bearer": []}],
+                    "responses": {
+                        "200": {
+                            "description": "Aggregated counts",
+                            "content": {"application/json": {"schema": {"$ref": "#/components/schemas/PipelineStats"}}},
+                        }
+                    },
+                }
+            },
+            "/_mock/reset": {
+                "post": {
+                    "summary": "Reset mock state",
+                    "description": "Delete every pipeline and scenario and re-seed the built-in scenarios. Requires `MOCK_ALLOW_RESET=1`.",
+                    "tags": ["admin"],
+                    "security": [{"PrivateToken": []}, {"Bearer": []}],
+                    "responses": {"204": {"description": "Reset"}, "403": {"description": "Reset is disabled"}},
+                }
+            },
+            "/_mock/snapshot": {
+                "get": {
+                    "summary": "Snapshot mock state",
+                    "description": "Scenarios, pipelines and the id sequence as an opaque blob for `/_mock/restore`.",
+                    "tags": ["admin"],
+                    "security": [{"PrivateToken": []}, {"Bearer": []}],
+                    "responses": {
+                        "200": {
+                            "description": "Snapshot",
+                            "content": {"application/octet-stream": {"schema": {"type": "string", "format": "binary"}}},
+                        },
+                        "501": {"description": "The database does not support snapshots"},
+                    },
+                }
+            },
+            "/_mock/restore": {
+                "post": {
+                    "summary": "Restore mock state",
+                    "description": "Replace the whole state with a `/_mock/snapshot` blob. Requires `MOCK_ALLOW_RESET=1`.",
+                    "tags": ["admin"],
+                    "security": [{"PrivateToken": []}, {"Bearer": []}],
+                    "requestBody": {
+                        "required": True,
+                        "content": {"application/octet-stream": {"schema": {"type": "string", "format": "binary"}}},
+                    },
+                    "responses": {
+                        "204": {"description": "Restored"},
+                        "403": {"description": "Restore is disabled"},
+                        "422": {"description": "Not a snapshot of this backend and schema"},
+                        "501": {"description": "The database does not support snapshots"},
+                    },
+                }
+            },
+            "/_mock/retention": {
+                "get": {
+                    "summary": "Retention status",
+                    "tags": ["admin"],
+                    "security": [{"PrivateToken": []}, {"Bearer": []}],
+                    "responses": {
+                        "200": {
+                            "description": "Retention policy and totals",
+                            "content": {"application/json": {"schema": {"$ref": "#/components/schemas/RetentionStatus"}}},
+                        }
+                    },
+                }
+            },
+            "/_mock/retention:run": {
+                "post": {
+                    "summary": "Run a retention pass",
+                    "description": "Delete finished pipelines beyond the retention policy and compact the database now.",
+                    "tags": ["admin"],
+                    "security": [{"PrivateToken": []}, {"Bearer": []}],
+                    "responses": {
+                        "200": {
+                            "description": "Retention policy and totals",
+                            "content": {"application/json": {"schema": {"$ref": "#/components/schemas/RetentionStatus"}}},
+                        }
+                    },
+                }
+            },
+            "/_mock/clock": {
+                "get": {
+                    "summary": "Clock state",
+                    "tags": ["admin"],
+                    "security": [{"PrivateToken": []}, {"Bearer": []}],
+                    "responses": {
+                        "200": {
+                            "description": "Current time and speed",
+                            "content": {"application/json": {"schema": {"$ref": "#/components/schemas/ClockState"}}},
+                        }
+                    },
+                },
+                "post": {
+                    "summary": "Control the clock",
+                    "description": "Freeze, advance, jump or speed up the time used for every status computation and timestamp.",
+                    "tags": ["admin"],
+                    "security": [{"PrivateToken": []}, {"Bearer": []}],
+                    "requestBody": {
+                        "required": True,
+                        "content": {"application/json": {"schema": {"$ref": "#/components/schemas/ClockUpdate"}}},
+                    },
+                    "responses": {
+                        "200": {
+                            "description": "Clock after the change",
+                            "content": {"application/json": {"schema": {"$ref": "#/components/schemas/ClockState"}}},
+                        },
+                        "409": {"description": "Several worker processes are running"},
+                        "422": {"description": "The change would move the clock backwards"},
+                    },
+                },
+            },
+            "/_mock/metrics": {
+                "get": {
+                    "summary": "Prometheus metrics",
+                    "description": "Request counts, latency histograms, in-flight gauges and SQL time per route, in the Prometheus text exposition format.",
+                    "tags": ["admin"],
+                    "security": [{"PrivateToken": []}, {"Bearer": []}],
+                    "responses": {
+                        "200": {
+                            "description": "Metrics",
+                            "content": {"text/plain": {"schema": {"type": "string"}}},
+                        }
+                    },
+                }
+            },
+            "/_mock/projects/{project_id}/events": {
+                "get": {
+                    "summary": "Stream pipeline events",
+                    "description": "Server-Sent Events stream of `created`, `terminal` and `deleted` events for the project's pipelines.",
+                    "tags": ["events"],
+                    "security": [{"PrivateToken": []}, {"Bearer": []}],
+                    "parameters": [
+                        {"name": "project_id", "in": "path", "required": True, "schema": {"type": "integer"}}
+                    ],
+                    "responses": {
+                        "200": {
+                            "description": "Event stream",
+                            "content": {"text/event-stream": {"schema": {"type": "string"}}},
+                        }
+                    },
+                }
+            },
             "/_mock/scenarios": {
                 "get": {
                     "summary": "List scenarios",
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+
+from ..auth import require_token
+from ..clock import Clock, get_clock
+from ..config import get_settings
+from ..events import get_event_hub
+from ..metrics import CONTENT_TYPE, format_family, get_metrics
+from ..schemas import ClockState, ClockUpdate, RetentionPolicy, RetentionStatus
+from ..storage import Storage, provide_storage
+from ..tasks import Retention, get_retention
+from ..tenants import TenantRegistry, current_tenant, get_tenants
+
+router = APIRouter(prefix="/_mock", tags=["admin"])
+
+
+def _retention_status(retention: Retention) -> RetentionStatus:
+    metrics = retention.metrics
+    return RetentionStatus(
+        policy=RetentionPolicy.model_validate(retention.policy),
+        runs=metrics.runs,
+        pipelines_deleted=metrics.pipelines_deleted,
+        bytes_reclaimed=metrics.bytes_reclaimed,
+        last_run_at=metrics.last_run_at,
+        last_run_seconds=metrics.last_run_seconds,
+    )
+
+
+@router.post("/reset", status_code=status.HTTP_204_NO_CONTENT)
+async def reset(
+    _: None = Depends(require_token),
+    storage: Storage = Depends(provide_storage),
+) -> Response:
+    if not get_settings().allow_reset:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Reset is disabled; set MOCK_ALLOW_RESET=1")
+    await storage.reset()
+    get_event_hub().reset()
+    if current_tenant() is None:
+        # The freed pages are returned after the response: a VACUUM can take
+        # a while on a big file and holds the write lock throughout.
+        get_retention().compact_soon()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/snapshot", response_class=Response)
+async def snapshot(
+    _: None = Depends(require_token),
+    storage: Storage = Depends(provide_storage),
+) -> Response:
+    try:
+        blob = await storage.snapshot()
+    except NotImplementedError as exc:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(exc)) from None
+    return Response(content=blob, media_type="application/octet-stream")
+
+
+@router.post("/restore", status_code=status.HTTP_204_NO_CONTENT)
+async def restore(
+    request: Request,
+    _: None = Depends(require_token),
+    storage: Storage = Depends(provide_storage),
+) -> Response:
+    if not get_settings().allow_reset:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Restore is disabled; set MOCK_ALLOW_RESET=1")
+    try:
+        await storage.restore(await request.body())
+    except NotImplementedError as exc:
+        raise HTTPException(status_code=status.HTTP_501_NOT_IMPLEMENTED, detail=str(exc)) from None
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from None
+    get_event_hub().reset()
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
+@router.get("/retention", response_model=RetentionStatus)
+async def retention_status(_: None = Depends(require_token)) -> RetentionStatus:
+    return _retention_status(get_retention())
+
+
+@router.post("/retention:run", response_model=RetentionStatus)
+async def run_retention(_: None = Depends(require_token)) -> RetentionStatus:
+    retention = get_retention()
+    await retention.run_once()
+    return _retention_status(retention)
+
+
+def _clock_state(clock: Clock) -> ClockState:
+    return ClockState(mode="virtual" if clock.virtual else "wall", now=clock.now(), speed=clock.speed)
+
+
+@router.get("/clock", response_model=ClockState)
+async def clock_state(_: None = Depends(require_token)) -> ClockState:
+    return _clock_state(get_clock())
+
+
+@router.post("/clock", response_model=ClockState)
+async def set_clock(update: ClockUpdate, _: None = Depends(require_token)) -> ClockState:
+    if get_settings().workers > 1:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="The virtual clock is kept per worker process; control it with a single worker",
+        )
+    clock = get_clock()
+    if update.wall:
+        clock.use_wall_clock()
+        return _clock_state(clock)
+    try:
+        if update.now is not None:
+            clock.set_time(update.now)
+        if update.advance_seconds is not None:
+            clock.advance(update.advance_seconds)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from None
+    if update.freeze:
+        clock.freeze()
+    elif update.speed is not None:
+        clock.set_speed(update.speed)
+    return _clock_state(clock)
+
+
+def _retention_families(retention: Retention) -> str:
+    metrics = retention.metrics
+    return "".join(
+        format_family(name, "counter", help_text, [((), value)])
+        for name, help_text, value in (
+            ("mock_retention_runs_total", "Retention passes completed.", metrics.runs),
+            ("mock_retention_pipelines_deleted_total", "Pipelines deleted by retention.", metrics.pipelines_deleted),
+            ("mock_retention_reclaimed_bytes_total", "Bytes returned to the filesystem by compaction.", metrics.bytes_reclaimed),
+        )
+    )
+
+
+def _tenant_families(tenants: TenantRegistry) -> str:
+    return format_family(
+        "mock_tenants", "gauge", "Namespaces currently held in memory.", [((), len(tenants))]
+    ) + format_family(
+        "mock_tenant_evictions_total", "counter", "Namespaces evicted to stay within capacity.", [((), tenants.evictions)]
+    )
+
+
+@router.get("/metrics", response_class=Response)
+async def metrics(_: None = Depends(require_token)) -> Response:
+    body = get_metrics().render() + _retention_families(get_retention()) + _tenant_families(get_tenants())
+    return Response(content=body, media_type=CONTENT_TYPE)
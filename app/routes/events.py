@@ -0,0 +1,26 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Request
+from fastapi.responses import StreamingResponse
+
+from ..auth import require_token
+from ..events import get_event_hub
+
+router = APIRouter(prefix="/_mock/projects", tags=["events"])
+
+_HEARTBEAT_SECONDS = 15.0
+
+
+@router.get("/{project_id}/events", response_class=StreamingResponse)
+async def stream_project_events(
+    project_id: int,
+    request: Request,
+    _: None = Depends(require_token),
+) -> StreamingResponse:
+    hub = get_event_hub()
+    subscriber = await hub.subscribe(project_id, base_url=str(request.base_url).rstrip("/"))
+    return StreamingResponse(
+        hub.stream(subscriber, heartbeat=_HEARTBEAT_SECONDS),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
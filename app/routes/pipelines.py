@@ -1,50 +1,108 @@
 from __future__ import annotations
 
-from typing import Dict, Optional
-
-from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
-from sqlalchemy import select
-from sqlalchemy.orm import Session
-
-from ..auth import require_token
-from ..database import get_db
+import asyncio
+import pickle
+import tempfile
+from datetime import datetime, timezone
+from itertools import repeat
+from json.encoder import encode_basestring as encode_json_string
+from typing import IO, AsyncIterator, Awaitable, Callable, Dict, Iterator, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from starlette.datastructures import FormData
+
+from ..auth import has_private_token, require_token
+from ..clock import get_clock
+from ..config import get_settings
+from ..events import get_event_hub
 from ..logic import (
+    compute_batch_statuses,
+    compute_status,
+    compute_terminal_at,
     generate_fake_sha,
+    hash_trigger_token,
+    initial_status,
     now_utc,
-    pipeline_to_dict,
+    pipeline_jobs_to_dicts,
     serialise_variables,
     update_pipeline_status,
 )
-from ..models import Pipeline, Scenario
+from ..models import Pipeline
+from ..schemas import BatchTriggerResult
+from ..schemas import Job as JobSchema
 from ..schemas import Pipeline as PipelineSchema
+from ..serialization import PIPELINE_TEMPLATE, JSONBytesResponse, dumps, loads, render_pipeline, variables_fragment
+from ..storage import PipelineBatch, PipelineFilters, Storage, provide_storage
+from ..storage.base import BATCH_SIZE
+from ..timeline import IN_FLIGHT_STATUSES
 
 router = APIRouter(tags=["pipelines"])
 
+# Upper bound on a single long-poll sleep, so scenario edits are noticed.
+_WAIT_RECHECK_SECONDS = 5.0
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+# Longest line ``/_mock/pipelines/import`` buffers before giving up on it.
+_MAX_IMPORT_LINE_BYTES = 1024 * 1024
+# Bodies that may carry a trigger ``token`` field, besides JSON.
+_FORM_CONTENT_TYPES = ("application/x-www-form-urlencoded", "multipart/form-data")
+# Stands in for a JSON trigger body that failed to decode.
+_UNDECODABLE = object()
+# ``BatchTriggerResult`` in its declared field order.
+_BATCH_RESULT = '{"status":%d,"pipeline":%s,"detail":%s}'
+
 
 def _base_url(request: Request) -> str:
     return str(request.base_url).rstrip("/")
 
 
-async def _parse_trigger_body(request: Request) -> Dict[str, object]:
-    content_type = request.headers.get("content-type", "")
+def _parse_trigger_json(payload: object) -> Dict[str, object]:
+    if not isinstance(payload, dict):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Invalid JSON payload")
+    variables = payload.get("variables") or {}
+    if not isinstance(variables, dict):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="variables must be an object")
+    return {
+        "token": payload.get("token"),
+        "ref": payload.get("ref"),
+        "variables": {str(k): str(v) for k, v in variables.items()},
+        "scenario_id": payload.get("scenario_id"),
+        "terminal_after_seconds": payload.get("terminal_after_seconds"),
+        "terminal_status": payload.get("terminal_status"),
+    }
+
+
+async def _read_trigger_body(request: Request) -> object:
+    """The decoded JSON or form body of a trigger; ``None`` for other content types.
 
+    Only decodes it: validation waits until the request is authorized, so
+    unauthenticated callers cannot probe it. Without a decodable body no
+    ``token`` field is present, and the private token decides alone.
+    """
+    content_type = request.headers.get("content-type", "")
     if "application/json" in content_type:
-        payload = await request.json()
-        if not isinstance(payload, dict):
-            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Invalid JSON payload")
-        variables = payload.get("variables") or {}
-        if not isinstance(variables, dict):
-            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="variables must be an object")
-        return {
-            "token": payload.get("token"),
-            "ref": payload.get("ref"),
-            "variables": {str(k): str(v) for k, v in variables.items()},
-            "scenario_id": payload.get("scenario_id"),
-            "terminal_after_seconds": payload.get("terminal_after_seconds"),
-            "terminal_status": payload.get("terminal_status"),
-        }
-
-    form = await request.form()
+        try:
+            return await request.json()
+        except ValueError:
+            return _UNDECODABLE
+    if content_type.startswith(_FORM_CONTENT_TYPES):
+        return await request.form()
+    return None
+
+
+def _trigger_token(body: object) -> object:
+    return body.get("token") if isinstance(body, (dict, FormData)) else None
+
+
+def _parse_trigger_body(body: object) -> Dict[str, object]:
+    if body is _UNDECODABLE:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid JSON body")
+    if body is None:
+        body = FormData()
+    return _parse_trigger_form(body) if isinstance(body, FormData) else _parse_trigger_json(body)
+
+
+def _parse_trigger_form(form: FormData) -> Dict[str, object]:
     variables: Dict[str, str] = {}
     simple_fields: Dict[str, object] = {}
 
@@ -76,19 +134,9 @@ def _ensure_int(value: object, field: str) -> Optional[int]:
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"{field} must be an integer") from None
 
 
-@router.post(
-    "/projects/{project_id}/trigger/pipeline",
-    response_model=PipelineSchema,
-    status_code=status.HTTP_201_CREATED,
-)
-async def trigger_pipeline(
-    project_id: int,
-    request: Request,
-    _: None = Depends(require_token),
-    db: Session = Depends(get_db),
-) -> PipelineSchema:
-    payload = await _parse_trigger_body(request)
-
+async def _build_pipeline_values(
+    project_id: int, payload: Dict[str, object], scenario_exists: Callable[[int], Awaitable[bool]]
+) -> Dict[str, object]:
     token = payload.get("token")
     ref = payload.get("ref")
 
@@ -99,11 +147,9 @@ async def trigger_pipeline(
     terminal_after_seconds = payload.get("terminal_after_seconds")
     terminal_status = payload.get("terminal_status")
 
-    scenario = None
     if scenario_id not in (None, "", b""):
         scenario_id_int = _ensure_int(scenario_id, "scenario_id")
-        scenario = db.get(Scenario, scenario_id_int)
-        if scenario is None:
+        if not await scenario_exists(scenario_id_int):
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Scenario not found")
         terminal_after_seconds = None
         terminal_status = None
@@ -117,75 +163,474 @@ async def trigger_pipeline(
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="variables must be a mapping")
 
     created_at = now_utc()
-    pipeline = Pipeline(
-        project_id=project_id,
-        ref=str(ref),
-        sha=generate_fake_sha(),
-        status="running",
-        variables_json=serialise_variables({str(k): str(v) for k, v in variables.items()}),
-        scenario_id=scenario_id_int,
-        terminal_after_seconds=terminal_after_seconds,
-        terminal_status=terminal_status,
-        created_at=created_at,
-        updated_at=created_at,
-    )
+    return {
+        "project_id": project_id,
+        "ref": str(ref),
+        "sha": generate_fake_sha(),
+        "status": "running",
+        "variables_json": serialise_variables({str(k): str(v) for k, v in variables.items()}),
+        "scenario_id": scenario_id_int,
+        "terminal_after_seconds": terminal_after_seconds,
+        "terminal_status": terminal_status,
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+
 
-    db.add(pipeline)
-    db.commit()
-    db.refresh(pipeline)
+async def _authorize_trigger(project_id: int, token: object, request: Request, storage: Storage) -> None:
+    """Accept a registered trigger token of the project, or else the mock token.
 
+    Projects without trigger tokens keep accepting any ``token`` alongside
+    the mock token; once a project has some, a wrong ``token`` is refused
+    even with the mock token.
+    """
+    verdict = await storage.check_trigger_token(project_id, hash_trigger_token(str(token))) if token else None
+    if verdict is True:
+        return
+    if verdict is False:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid trigger token")
+    if not has_private_token(request.headers):
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or missing token")
+
+
+@router.post(
+    "/projects/{project_id}/trigger/pipeline",
+    response_model=PipelineSchema,
+    status_code=status.HTTP_201_CREATED,
+)
+async def trigger_pipeline(
+    project_id: int,
+    request: Request,
+    storage: Storage = Depends(provide_storage),
+) -> JSONBytesResponse:
+    body = await _read_trigger_body(request)
+    await _authorize_trigger(project_id, _trigger_token(body), request, storage)
+    payload = _parse_trigger_body(body)
+
+    async def scenario_exists(scenario_id: int) -> bool:
+        return await storage.get_scenario(scenario_id) is not None
+
+    values = await _build_pipeline_values(project_id, payload, scenario_exists)
+    pipeline = await storage.create_pipeline(values)
+    get_event_hub().pipeline_created(pipeline)
+
+    body = render_pipeline(pipeline, _base_url(request), status=initial_status(pipeline))
+    return JSONBytesResponse(body, status_code=status.HTTP_201_CREATED)
+
+
+@router.post(
+    "/_mock/pipelines:batch",
+    response_model=list[BatchTriggerResult],
+)
+async def batch_trigger_pipelines(
+    request: Request,
+    _: None = Depends(require_token),
+    storage: Storage = Depends(provide_storage),
+) -> JSONBytesResponse:
+    items = await request.json()
+    if not isinstance(items, list):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Expected a JSON array of trigger payloads")
+
+    known_scenarios: Dict[int, bool] = {}
+
+    async def scenario_exists(scenario_id: int) -> bool:
+        if scenario_id not in known_scenarios:
+            known_scenarios[scenario_id] = await storage.get_scenario(scenario_id) is not None
+        return known_scenarios[scenario_id]
+
+    results: list[str | None] = []
+    pending: list[Dict[str, object]] = []
+    for item in items:
+        try:
+            payload = _parse_trigger_json(item)
+            project_id = _ensure_int(item.get("project_id"), "project_id")
+            if project_id is None:
+                raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="project_id is required")
+            pending.append(await _build_pipeline_values(project_id, payload, scenario_exists))
+            results.append(None)
+        except HTTPException as exc:
+            results.append(_BATCH_RESULT % (exc.status_code, "null", encode_json_string(str(exc.detail))))
+
+    created = iter(await storage.create_pipelines(pending) if pending else [])
+    hub = get_event_hub()
     base_url = _base_url(request)
-    return PipelineSchema.model_validate(pipeline_to_dict(pipeline, base_url=base_url))
+    for index, result in enumerate(results):
+        if result is None:
+            pipeline = next(created)
+            hub.pipeline_created(pipeline)
+            rendered = render_pipeline(pipeline, base_url, status=initial_status(pipeline))
+            results[index] = _BATCH_RESULT % (status.HTTP_201_CREATED, rendered, "null")
+    return JSONBytesResponse("[" + ",".join(results) + "]")  # type: ignore[arg-type]
 
 
 @router.get(
     "/projects/{project_id}/pipelines/{pipeline_id}",
     response_model=PipelineSchema,
 )
-def get_pipeline(
+async def get_pipeline(
     project_id: int,
     pipeline_id: int,
     request: Request,
+    wait: Optional[float] = Query(default=None, ge=0),
     _: None = Depends(require_token),
-    db: Session = Depends(get_db),
-) -> PipelineSchema:
-    stmt = select(Pipeline).where(Pipeline.id == pipeline_id, Pipeline.project_id == project_id)
-    pipeline = db.execute(stmt).scalar_one_or_none()
+    storage: Storage = Depends(provide_storage),
+) -> JSONBytesResponse:
+    pipeline = await storage.get_pipeline(pipeline_id, project_id=project_id)
     if pipeline is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pipeline not found")
 
-    update_pipeline_status(pipeline)
-    db.add(pipeline)
-    db.commit()
-    db.refresh(pipeline)
+    settings = get_settings()
+    if wait:
+        pipeline = await _wait_for_terminal(
+            storage, pipeline, project_id, min(wait, settings.max_wait_seconds), request
+        )
 
     base_url = _base_url(request)
-    return PipelineSchema.model_validate(pipeline_to_dict(pipeline, base_url=base_url))
+
+    # Polls vastly outnumber transitions, so only open a write transaction when
+    # the computed status actually differs from the stored one.
+    if not settings.persist_status_on_read:
+        return JSONBytesResponse(render_pipeline(pipeline, base_url, status=compute_status(pipeline)))
+
+    if update_pipeline_status(pipeline):
+        await storage.save_pipeline_status(pipeline)
+
+    return JSONBytesResponse(render_pipeline(pipeline, base_url))
+
+
+@router.get(
+    "/projects/{project_id}/pipelines/{pipeline_id}/jobs",
+    response_model=list[JobSchema],
+)
+async def list_pipeline_jobs(
+    project_id: int,
+    pipeline_id: int,
+    request: Request,
+    _: None = Depends(require_token),
+    storage: Storage = Depends(provide_storage),
+) -> list[JobSchema]:
+    pipeline = await storage.get_pipeline(pipeline_id, project_id=project_id)
+    if pipeline is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pipeline not found")
+    jobs = pipeline_jobs_to_dicts(pipeline, base_url=_base_url(request))
+    return [JobSchema.model_validate(job) for job in jobs]
+
+
+async def _wait_for_terminal(
+    storage: Storage, pipeline: Pipeline, project_id: int, timeout: float, request: Request
+) -> Pipeline:
+    """Sleep until ``pipeline`` leaves ``running`` or ``timeout`` seconds pass.
+
+    The terminal instant is known up front, so this normally wakes exactly
+    once. It still re-reads the row every ``_WAIT_RECHECK_SECONDS`` to notice
+    scenario edits, deletions and disconnected clients.
+    """
+    loop = asyncio.get_running_loop()
+    give_up_at = loop.time() + timeout
+    while compute_status(pipeline) in IN_FLIGHT_STATUSES:
+        remaining = give_up_at - loop.time()
+        if remaining <= 0 or await request.is_disconnected():
+            break
+        terminal_at = compute_terminal_at(pipeline)
+        delay = min(remaining, _WAIT_RECHECK_SECONDS)
+        if terminal_at is not None:
+            until = get_clock().seconds_until(terminal_at)
+            if until is not None:
+                delay = min(delay, until)
+        # Returns early when the clock is advanced or sped up.
+        await get_clock().sleep(delay)
+        refreshed = await storage.get_pipeline(pipeline.id, project_id=project_id)
+        if refreshed is None:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pipeline not found")
+        pipeline = refreshed
+    return pipeline
+
+
+def _normalise_timestamp(value: datetime | None) -> datetime | None:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _variable_filters(request: Request) -> Dict[str, str] | None:
+    """``variables[KEY]=VALUE`` query parameters, in the trigger form's encoding."""
+    variables = {
+        key[len("variables[") : -1]: value
+        for key, value in request.query_params.multi_items()
+        if key.startswith("variables[") and key.endswith("]")
+    }
+    return variables or None
+
+
+async def _render_batches(
+    batches: AsyncIterator[PipelineBatch],
+    reference_time: datetime,
+    base_url: str,
+    status_filter: str | None,
+    per_page: int | None,
+) -> AsyncIterator[list[str]]:
+    """Render listing rows straight from columnar batches, one list per batch.
+
+    Statuses for a whole batch come from one vectorised pass; rows are
+    formatted from a template instead of validating a model per row.
+    """
+    base = encode_json_string(base_url)[1:-1]
+    encoded: dict[str, str] = {}
+
+    def encode(column: list[str]) -> Iterator[str]:
+        # Refs and statuses repeat heavily; escape each distinct value once.
+        for value in set(column).difference(encoded):
+            encoded[value] = encode_json_string(value)
+        return map(encoded.__getitem__, column)
+
+    emitted = 0
+    async for batch in batches:
+        statuses = compute_batch_statuses(batch, reference_time)
+        # Timeline rows may only be narrowed in storage; refine here.
+        if status_filter is not None:
+            keep = [index for index, current in enumerate(statuses) if current == status_filter]
+            if len(keep) < len(statuses):
+                batch = batch.take(keep)
+                statuses = [status_filter] * len(keep)
+        if per_page is not None and emitted + len(batch) > per_page:
+            keep = range(per_page - emitted)
+            batch, statuses = batch.take(keep), statuses[: len(keep)]
+        if not batch:
+            continue
+        rows = zip(
+            batch.id,
+            batch.project_id,
+            encode(batch.ref),
+            map(encode_json_string, batch.sha),
+            encode(statuses),
+            repeat(base),
+            batch.project_id,
+            batch.id,
+            batch.created_at,
+            batch.updated_at,
+            map(variables_fragment, batch.variables_json),
+            ["null" if value is None else value for value in batch.scenario_id],
+            ["null" if value is None else value for value in batch.terminal_after],
+            encode(batch.terminal_status),
+        )
+        yield list(map(PIPELINE_TEMPLATE.__mod__, rows))
+        emitted += len(batch)
+        if per_page is not None and emitted >= per_page:
+            break
+
+
+async def _stream_pipelines(rendered: AsyncIterator[list[str]]) -> AsyncIterator[str]:
+    yield "["
+    separator = ""
+    async for rows in rendered:
+        yield separator + ",".join(rows)
+        separator = ","
+    yield "]"
+
+
+async def _stream_ndjson(rendered: AsyncIterator[list[str]]) -> AsyncIterator[str]:
+    async for rows in rendered:
+        yield "\n".join(rows) + "\n"
 
 
 @router.get(
     "/_mock/pipelines",
     response_model=list[PipelineSchema],
 )
-def list_pipelines(
+async def list_pipelines(
     request: Request,
+    project_id: Optional[int] = None,
+    ref: Optional[str] = None,
+    status_filter: Optional[str] = Query(default=None, alias="status"),
+    scenario_id: Optional[int] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    id_after: Optional[int] = None,
+    per_page: Optional[int] = Query(default=None, ge=1),
     _: None = Depends(require_token),
-    db: Session = Depends(get_db),
-) -> list[PipelineSchema]:
-    pipelines = list(db.execute(select(Pipeline)).scalars())
-    base_url = _base_url(request)
-
-    responses: list[PipelineSchema] = []
-    for pipeline in pipelines:
-        update_pipeline_status(pipeline)
-        db.add(pipeline)
-        responses.append(PipelineSchema.model_validate(pipeline_to_dict(pipeline, base_url=base_url)))
+    storage: Storage = Depends(provide_storage),
+) -> StreamingResponse:
+    # One reference instant for both the storage-side status filter and the
+    # rendered statuses, so a row can't match as running and render as done.
+    reference_time = now_utc()
+    filters = PipelineFilters(
+        project_id=project_id,
+        ref=ref,
+        scenario_id=scenario_id,
+        created_after=_normalise_timestamp(created_after),
+        created_before=_normalise_timestamp(created_before),
+        id_after=id_after,
+        variables=_variable_filters(request),
+        status=status_filter,
+        reference_time=reference_time,
+        limit=per_page,
+    )
+    batches = storage.iter_pipeline_batches(filters)
+    rendered = _render_batches(batches, reference_time, _base_url(request), status_filter, per_page)
+    return StreamingResponse(_stream_pipelines(rendered), media_type="application/json")
 
-    db.commit()
-    for pipeline in pipelines:
-        db.refresh(pipeline)
 
-    return responses
+@router.get("/_mock/pipelines/export", response_class=StreamingResponse)
+async def export_pipelines(
+    request: Request,
+    project_id: Optional[int] = None,
+    ref: Optional[str] = None,
+    status_filter: Optional[str] = Query(default=None, alias="status"),
+    scenario_id: Optional[int] = None,
+    created_after: Optional[datetime] = None,
+    created_before: Optional[datetime] = None,
+    id_after: Optional[int] = None,
+    _: None = Depends(require_token),
+    storage: Storage = Depends(provide_storage),
+) -> StreamingResponse:
+    """Every matching pipeline as NDJSON, one listing object per line.
+
+    Rows come from a server-side cursor in ``BATCH_SIZE`` batches, so memory
+    use does not grow with the size of the dump.
+    """
+    reference_time = now_utc()
+    filters = PipelineFilters(
+        project_id=project_id,
+        ref=ref,
+        scenario_id=scenario_id,
+        created_after=_normalise_timestamp(created_after),
+        created_before=_normalise_timestamp(created_before),
+        id_after=id_after,
+        variables=_variable_filters(request),
+        status=status_filter,
+        reference_time=reference_time,
+    )
+    batches = storage.iter_pipeline_batches(filters)
+    rendered = _render_batches(batches, reference_time, _base_url(request), status_filter, None)
+    return StreamingResponse(_stream_ndjson(rendered), media_type=NDJSON_MEDIA_TYPE)
+
+
+async def _ndjson_lines(request: Request) -> AsyncIterator[tuple[int, bytes]]:
+    """Numbered non-blank lines of the request body, as the body arrives."""
+    number = 0
+    pending = b""
+    async for received in request.stream():
+        lines = (pending + received).split(b"\n")
+        pending = lines.pop()
+        if len(pending) > _MAX_IMPORT_LINE_BYTES:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Line {number + 1} is too long")
+        for line in lines:
+            number += 1
+            if line.strip():
+                yield number, line
+    if pending.strip():
+        yield number + 1, pending
+
+
+def _import_timestamp(value: object, field: str) -> datetime:
+    try:
+        parsed = datetime.fromisoformat(value)  # type: ignore[arg-type]
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"{field} must be an ISO 8601 timestamp") from None
+    return _normalise_timestamp(parsed)  # type: ignore[return-value]
+
+
+def _import_values(item: object, keep_ids: bool, now: datetime) -> Dict[str, object]:
+    """Pipeline values for one imported line: the listing shape, with optional fields."""
+    if not isinstance(item, dict):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Expected a JSON object")
+    project_id = _ensure_int(item.get("project_id"), "project_id")
+    ref = item.get("ref")
+    if project_id is None or not isinstance(ref, str) or not ref:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="project_id and ref are required")
+    variables = item.get("variables") or {}
+    if not isinstance(variables, dict):
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="variables must be an object")
+    created_at = _import_timestamp(item["created_at"], "created_at") if item.get("created_at") else now
+    updated_at = _import_timestamp(item["updated_at"], "updated_at") if item.get("updated_at") else created_at
+    terminal_status = item.get("terminal_status")
+    values: Dict[str, object] = {
+        "project_id": project_id,
+        "ref": ref,
+        "sha": str(item.get("sha") or generate_fake_sha()),
+        "status": str(item.get("status") or "running"),
+        "variables_json": serialise_variables({str(k): str(v) for k, v in variables.items()}),
+        "scenario_id": _ensure_int(item.get("scenario_id"), "scenario_id"),
+        "terminal_after_seconds": _ensure_int(item.get("terminal_after_seconds"), "terminal_after_seconds"),
+        "terminal_status": str(terminal_status) if terminal_status not in (None, "") else None,
+        "created_at": created_at,
+        "updated_at": updated_at,
+    }
+    if keep_ids and item.get("id") is not None:
+        values["id"] = _ensure_int(item["id"], "id")
+    return values
+
+
+async def _unspool(spool: IO[bytes], count: int) -> AsyncIterator[list[Dict[str, object]]]:
+    for _ in range(count):
+        yield pickle.load(spool)
+
+
+async def _spool_import(request: Request, storage: Storage, keep_ids: bool, spool: IO[bytes]) -> tuple[int, int]:
+    """Validate the NDJSON body into ``BATCH_SIZE`` chunks pickled to ``spool``.
+
+    Returns the chunk count and the largest explicit pipeline id.
+    """
+    known_scenarios: Dict[int, bool] = {}
+    now = now_utc()
+    count = highest_id = 0
+
+    def write(chunk: list[Dict[str, object]]) -> None:
+        nonlocal count
+        pickle.dump(chunk, spool, pickle.HIGHEST_PROTOCOL)
+        count += 1
+
+    chunk: list[Dict[str, object]] = []
+    async for number, line in _ndjson_lines(request):
+        try:
+            values = _import_values(loads(line), keep_ids, now)
+            scenario_id = values["scenario_id"]
+            if scenario_id is not None:
+                if scenario_id not in known_scenarios:
+                    known_scenarios[scenario_id] = await storage.get_scenario(scenario_id) is not None
+                if not known_scenarios[scenario_id]:
+                    raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Scenario not found")
+                # As on trigger: the scenario decides, inline settings are dropped.
+                values["terminal_after_seconds"] = values["terminal_status"] = None
+        except ValueError:
+            raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=f"Line {number}: invalid JSON") from None
+        except HTTPException as exc:
+            raise HTTPException(status_code=exc.status_code, detail=f"Line {number}: {exc.detail}") from None
+        chunk.append(values)
+        highest_id = max(highest_id, values.get("id", 0))
+        if len(chunk) >= BATCH_SIZE:
+            write(chunk)
+            chunk = []
+    if chunk:
+        write(chunk)
+    return count, highest_id
+
+
+@router.post("/_mock/pipelines/import")
+async def import_pipelines(
+    request: Request,
+    keep_ids: bool = True,
+    _: None = Depends(require_token),
+    storage: Storage = Depends(provide_storage),
+) -> JSONBytesResponse:
+    """Insert pipelines from an NDJSON body, validated as it arrives and inserted in chunks.
+
+    Accepts what ``/_mock/pipelines/export`` writes; only ``project_id`` and
+    ``ref`` are required. The import is all or nothing.
+
+    Validated chunks are spooled to a temporary file until the whole body is
+    in, so a slow upload never holds the write transaction open.
+    """
+    with tempfile.TemporaryFile() as spool:
+        count, highest_id = await _spool_import(request, storage, keep_ids, spool)
+        spool.seek(0)
+        try:
+            imported = await storage.import_pipelines(_unspool(spool, count), highest_id)
+        except ValueError as exc:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(exc)) from None
+    return JSONBytesResponse(dumps({"imported": imported}))
 
 
 @router.delete(
@@ -193,15 +638,14 @@ def list_pipelines(
     status_code=status.HTTP_204_NO_CONTENT,
     response_class=Response,
 )
-def delete_pipeline(
+async def delete_pipeline(
     pipeline_id: int,
     _: None = Depends(require_token),
-    db: Session = Depends(get_db),
+    storage: Storage = Depends(provide_storage),
 ) -> Response:
-    pipeline = db.get(Pipeline, pipeline_id)
+    pipeline = await storage.delete_pipeline(pipeline_id)
     if pipeline is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Pipeline not found")
+    get_event_hub().pipeline_deleted(pipeline_id, pipeline.project_id)
 
-    db.delete(pipeline)
-    db.commit()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
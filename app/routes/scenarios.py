@@ -1,77 +1,83 @@
 from __future__ import annotations
 
+import json
+import math
+
 from fastapi import APIRouter, Depends, HTTPException, Response, status
-from sqlalchemy import select, update
-from sqlalchemy.orm import Session
 
 from ..auth import require_token
-from ..database import get_db
-from ..models import Pipeline, Scenario
-from ..schemas import ScenarioCreate, ScenarioList, ScenarioUpdate
+from ..events import get_event_hub
+from ..schemas import ScenarioBase, ScenarioCreate, ScenarioList, ScenarioUpdate
+from ..storage import Storage, provide_storage
+from ..timeline import compile_timeline
 
 router = APIRouter(prefix="/_mock/scenarios", tags=["scenarios"])
 
 
+def _scenario_values(scenario: ScenarioBase) -> dict[str, object]:
+    """Storage values for ``scenario``; a timeline overrides the terminal fields."""
+    values = scenario.model_dump(exclude={"timeline"})
+    values["timeline_json"] = None
+    if scenario.timeline is not None:
+        raw = json.dumps(scenario.timeline.model_dump(), sort_keys=True)
+        compiled = compile_timeline(raw)
+        values.update(
+            timeline_json=raw,
+            terminal_after_seconds=math.ceil(compiled.duration),
+            terminal_status=compiled.terminal_status,
+            never_complete=False,
+        )
+    return values
+
+
 @router.get("", response_model=list[ScenarioList])
-def list_scenarios(
+async def list_scenarios(
     _: None = Depends(require_token),
-    db: Session = Depends(get_db),
+    storage: Storage = Depends(provide_storage),
 ) -> list[ScenarioList]:
-    scenarios = list(db.execute(select(Scenario)).scalars())
-    return [ScenarioList.model_validate(scenario) for scenario in scenarios]
+    return [ScenarioList.model_validate(scenario) for scenario in await storage.list_scenarios()]
 
 
 @router.post("", response_model=ScenarioList, status_code=status.HTTP_201_CREATED)
-def create_scenario(
+async def create_scenario(
     scenario: ScenarioCreate,
     _: None = Depends(require_token),
-    db: Session = Depends(get_db),
+    storage: Storage = Depends(provide_storage),
 ) -> ScenarioList:
-    existing = db.get(Scenario, scenario.scenario_id)
+    existing = await storage.get_scenario(scenario.scenario_id)
     if existing is not None:
         raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Scenario already exists")
 
-    db_scenario = Scenario(**scenario.model_dump())
-    db.add(db_scenario)
-    db.commit()
-    db.refresh(db_scenario)
+    db_scenario = await storage.create_scenario(_scenario_values(scenario))
     return ScenarioList.model_validate(db_scenario)
 
 
 @router.put("/{scenario_id}", response_model=ScenarioList)
-def update_scenario(
+async def update_scenario(
     scenario_id: int,
     payload: ScenarioUpdate,
     _: None = Depends(require_token),
-    db: Session = Depends(get_db),
+    storage: Storage = Depends(provide_storage),
 ) -> ScenarioList:
     if scenario_id != payload.scenario_id:
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail="Scenario ID mismatch")
 
-    db_scenario = db.get(Scenario, scenario_id)
+    db_scenario = await storage.update_scenario(scenario_id, _scenario_values(payload))
     if db_scenario is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Scenario not found")
 
-    for field, value in payload.model_dump().items():
-        setattr(db_scenario, field, value)
-
-    db.add(db_scenario)
-    db.commit()
-    db.refresh(db_scenario)
+    get_event_hub().scenario_changed(scenario_id)
     return ScenarioList.model_validate(db_scenario)
 
 
 @router.delete("/{scenario_id}", status_code=status.HTTP_204_NO_CONTENT, response_class=Response)
-def delete_scenario(
+async def delete_scenario(
     scenario_id: int,
     _: None = Depends(require_token),
-    db: Session = Depends(get_db),
+    storage: Storage = Depends(provide_storage),
 ) -> Response:
-    scenario = db.get(Scenario, scenario_id)
-    if scenario is None:
+    if not await storage.delete_scenario(scenario_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Scenario not found")
+    get_event_hub().scenario_changed(scenario_id)
 
-    db.execute(update(Pipeline).where(Pipeline.scenario_id == scenario_id).values(scenario_id=None))
-    db.delete(scenario)
-    db.commit()
     return Response(status_code=status.HTTP_204_NO_CONTENT)
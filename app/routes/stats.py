@@ -0,0 +1,53 @@
+from __future__ import annotations
+
+from collections import Counter, defaultdict
+from typing import Optional
+
+from fastapi import APIRouter, Depends
+
+from ..auth import require_token
+from ..logic import now_utc
+from ..schemas import PipelineStats, ProjectStats, ScenarioStats, TimeToTerminal, TimeToTerminalBucket
+from ..storage import Storage, provide_storage
+from ..storage.base import TIME_TO_TERMINAL_BUCKETS
+
+router = APIRouter(prefix="/_mock/stats", tags=["stats"])
+
+
+@router.get("", response_model=PipelineStats)
+async def pipeline_stats(
+    _: None = Depends(require_token),
+    storage: Storage = Depends(provide_storage),
+) -> PipelineStats:
+    reference_time = now_utc()
+    stats = await storage.pipeline_stats(reference_time)
+
+    by_status: Counter[str] = Counter()
+    by_project: defaultdict[int, Counter[str]] = defaultdict(Counter)
+    by_scenario: defaultdict[Optional[int], Counter[str]] = defaultdict(Counter)
+    for status, project_id, scenario_id, count in stats.groups:
+        by_status[status] += count
+        by_project[project_id][status] += count
+        by_scenario[scenario_id][status] += count
+
+    upper_bounds: list[Optional[int]] = [*TIME_TO_TERMINAL_BUCKETS, None]
+    return PipelineStats(
+        reference_time=reference_time,
+        total=sum(by_status.values()),
+        by_status=dict(by_status),
+        by_project=[
+            ProjectStats(project_id=project_id, total=sum(counts.values()), by_status=dict(counts))
+            for project_id, counts in sorted(by_project.items())
+        ],
+        by_scenario=[
+            ScenarioStats(scenario_id=scenario_id, total=sum(counts.values()), by_status=dict(counts))
+            for scenario_id, counts in sorted(by_scenario.items(), key=lambda item: (item[0] is not None, item[0] or 0))
+        ],
+        time_to_terminal=TimeToTerminal(
+            buckets=[
+                TimeToTerminalBucket(lt_seconds=upper, count=count)
+                for upper, count in zip(upper_bounds, stats.time_to_terminal)
+            ],
+            never=stats.never_terminal,
+        ),
+    )
@@ -0,0 +1,62 @@
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi import APIRouter, Depends, HTTPException, Response, status
+
+from ..auth import require_token
+from ..logic import generate_trigger_token, hash_trigger_token
+from ..schemas import TriggerToken, TriggerTokenCreate
+from ..storage import Storage, provide_storage
+
+router = APIRouter(prefix="/projects/{project_id}/triggers", tags=["triggers"])
+
+# Listings expose only the first characters of a token, as GitLab does.
+_SHOWN_CHARACTERS = 4
+
+
+def _render(token: Any, shown: str) -> TriggerToken:
+    return TriggerToken(id=token.id, description=token.description, token=shown, created_at=token.created_at)
+
+
+@router.get("", response_model=list[TriggerToken])
+async def list_trigger_tokens(
+    project_id: int,
+    _: None = Depends(require_token),
+    storage: Storage = Depends(provide_storage),
+) -> list[TriggerToken]:
+    return [_render(token, token.token_prefix) for token in await storage.list_trigger_tokens(project_id)]
+
+
+@router.post("", response_model=TriggerToken, status_code=status.HTTP_201_CREATED)
+async def create_trigger_token(
+    project_id: int,
+    payload: TriggerTokenCreate,
+    _: None = Depends(require_token),
+    storage: Storage = Depends(provide_storage),
+) -> TriggerToken:
+    secret = payload.token or generate_trigger_token()
+    token = await storage.create_trigger_token(
+        {
+            "project_id": project_id,
+            "description": payload.description,
+            "token_hash": hash_trigger_token(secret),
+            "token_prefix": secret[:_SHOWN_CHARACTERS],
+        }
+    )
+    if token is None:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Trigger token already in use")
+    # The only response that carries the whole token.
+    return _render(token, secret)
+
+
+@router.delete("/{trigger_id}", status_code=status.HTTP_204_NO_CONTENT)
+async def delete_trigger_token(
+    project_id: int,
+    trigger_id: int,
+    _: None = Depends(require_token),
+    storage: Storage = Depends(provide_storage),
+) -> Response:
+    if not await storage.delete_trigger_token(project_id, trigger_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trigger token not found")
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -1,9 +1,35 @@
 from __future__ import annotations
 
 from datetime import datetime
-from typing import Dict, Optional
+from typing import Dict, List, Literal, Optional
 
-from pydantic import BaseModel, ConfigDict, Field
+from pydantic import BaseModel, ConfigDict, Field, model_validator
+
+from .timeline import MAX_JOBS
+
+
+class TimelineJob(BaseModel):
+    name: str
+    queued_seconds: int = Field(default=0, ge=0)
+    duration_seconds: int = Field(default=0, ge=0)
+    status: Literal["success", "failed", "canceled", "skipped"] = "success"
+    allow_failure: bool = False
+
+
+class TimelineStage(BaseModel):
+    name: str
+    jobs: List[TimelineJob] = Field(min_length=1)
+
+
+class ScenarioTimeline(BaseModel):
+    created_seconds: int = Field(default=0, ge=0)
+    stages: List[TimelineStage] = Field(min_length=1)
+
+    @model_validator(mode="after")
+    def _check_job_count(self) -> "ScenarioTimeline":
+        if sum(len(stage.jobs) for stage in self.stages) > MAX_JOBS:
+            raise ValueError(f"A timeline may declare at most {MAX_JOBS} jobs")
+        return self
 
 
 class ScenarioBase(BaseModel):
@@ -12,6 +38,7 @@ class ScenarioBase(BaseModel):
     terminal_after_seconds: Optional[int] = None
     terminal_status: str = Field(default="success")
     never_complete: bool = False
+    timeline: Optional[ScenarioTimeline] = None
 
     model_config = ConfigDict(from_attributes=True)
 
@@ -44,3 +71,124 @@ class Pipeline(BaseModel):
     terminal_status: Optional[str] = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class JobPipeline(BaseModel):
+    id: int
+    project_id: int
+    ref: str
+    sha: str
+    status: str
+
+
+class Job(BaseModel):
+    id: int
+    name: str
+    stage: str
+    status: str
+    ref: str
+    allow_failure: bool
+    created_at: datetime
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    duration: Optional[float] = None
+    queued_duration: Optional[float] = None
+    web_url: str
+    pipeline: JobPipeline
+
+
+class ProjectStats(BaseModel):
+    project_id: int
+    total: int
+    by_status: Dict[str, int]
+
+
+class ScenarioStats(BaseModel):
+    # ``None`` groups pipelines running on inline terminal settings.
+    scenario_id: Optional[int]
+    total: int
+    by_status: Dict[str, int]
+
+
+class TimeToTerminalBucket(BaseModel):
+    # Exclusive upper bound in seconds; ``None`` for the open-ended last bucket.
+    lt_seconds: Optional[int]
+    count: int
+
+
+class TimeToTerminal(BaseModel):
+    buckets: List[TimeToTerminalBucket]
+    never: int
+
+
+class PipelineStats(BaseModel):
+    reference_time: datetime
+    total: int
+    by_status: Dict[str, int]
+    by_project: List[ProjectStats]
+    by_scenario: List[ScenarioStats]
+    time_to_terminal: TimeToTerminal
+
+
+class RetentionPolicy(BaseModel):
+    # ``0`` disables a limit.
+    max_age_seconds: int
+    max_per_project: int
+    max_rows: int
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class RetentionStatus(BaseModel):
+    policy: RetentionPolicy
+    runs: int
+    pipelines_deleted: int
+    bytes_reclaimed: int
+    last_run_at: Optional[datetime]
+    last_run_seconds: float
+
+
+class ClockState(BaseModel):
+    mode: Literal["wall", "virtual"]
+    now: datetime
+    # Virtual seconds per real second; ``0`` while frozen.
+    speed: float
+
+
+class ClockUpdate(BaseModel):
+    """Clock changes, applied in field order; omitted fields are left alone."""
+
+    # Return to real time; the other fields are then ignored.
+    wall: bool = False
+    # Jump forward to this instant.
+    now: Optional[datetime] = None
+    advance_seconds: Optional[float] = Field(default=None, ge=0)
+    # Virtual seconds per real second; ``0`` freezes the clock.
+    speed: Optional[float] = Field(default=None, ge=0)
+    freeze: bool = False
+
+    @model_validator(mode="after")
+    def _check_speed(self) -> "ClockUpdate":
+        if self.freeze and self.speed:
+            raise ValueError("freeze and a non-zero speed are mutually exclusive")
+        return self
+
+
+class TriggerTokenCreate(BaseModel):
+    description: Optional[str] = None
+    # Generated when omitted.
+    token: Optional[str] = Field(default=None, min_length=1)
+
+
+class TriggerToken(BaseModel):
+    id: int
+    description: Optional[str] = None
+    # In full only in the creation response; listings show the first characters.
+    token: str
+    created_at: datetime
+
+
+class BatchTriggerResult(BaseModel):
+    status: int
+    pipeline: Optional[Pipeline] = None
+    detail: Optional[str] = None
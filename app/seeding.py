@@ -1,12 +1,13 @@
 from __future__ import annotations
 
 from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 
 from .models import Scenario
 
 
-def _default_scenarios() -> list[dict[str, object]]:
+def default_scenarios() -> list[dict[str, object]]:
     payloads: list[dict[str, object]] = [
         {"scenario_id": 0, "name": "never complete", "terminal_after_seconds": None, "terminal_status": "success", "never_complete": True}
     ]
@@ -33,9 +34,23 @@ def _default_scenarios() -> list[dict[str, object]]:
     return payloads
 
 
-def seed_scenarios(session: Session) -> None:
-    existing_ids = {row[0] for row in session.execute(select(Scenario.scenario_id))}
-    for payload in _default_scenarios():
-        if payload["scenario_id"] not in existing_ids:
-            session.add(Scenario(**payload))
-    session.commit()
+# Dialects whose ``insert`` supports ``ON CONFLICT DO NOTHING``.
+_UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+def seed_scenarios(session: Session) -> int:
+    """Add the built-in scenarios that are missing, in the session's transaction.
+
+    One multi-row ``INSERT ... ON CONFLICT DO NOTHING`` where the dialect
+    supports it, so scenarios edited since are kept. Returns how many rows
+    were inserted.
+    """
+    upsert = _UPSERT_INSERTS.get(session.get_bind().dialect.name)
+    if upsert is not None:
+        stmt = upsert(Scenario).values(default_scenarios()).on_conflict_do_nothing(index_elements=[Scenario.scenario_id])
+        return session.execute(stmt).rowcount
+    existing_ids = set(session.scalars(select(Scenario.scenario_id)))
+    missing = [payload for payload in default_scenarios() if payload["scenario_id"] not in existing_ids]
+    session.add_all(Scenario(**payload) for payload in missing)
+    session.flush()
+    return len(missing)
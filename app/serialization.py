@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+from functools import lru_cache
+from json.encoder import encode_basestring as encode_json_string
+from typing import Any, Optional
+
+from starlette.responses import Response
+
+from .logic import compute_effective_settings, deserialise_variables, format_timestamp
+from .models import Pipeline
+
+try:  # Optional: ``pip install .[fast]``.
+    import orjson
+except ImportError:
+    orjson = None
+
+# Same field order and encoding as FastAPI's rendering of the ``Pipeline``
+# schema: compact separators, non-ASCII left as UTF-8.
+PIPELINE_TEMPLATE = (
+    '{"id":%d,"project_id":%d,"ref":%s,"sha":%s,"status":%s,"web_url":"%s/projects/%d/pipelines/%d",'
+    '"source":"trigger","created_at":"%s","updated_at":"%s","variables":%s,"scenario_id":%s,'
+    '"terminal_after_seconds":%s,"terminal_status":%s}'
+)
+
+
+def dumps(value: Any) -> bytes:
+    """Compact JSON, byte-identical to ``fastapi.responses.JSONResponse`` for JSON-native values.
+
+    Floats are the exception: orjson writes exponents as ``1e-7`` where
+    ``json`` writes ``1e-07``.
+    """
+    if orjson is not None:
+        return orjson.dumps(value)
+    return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+
+def loads(data: bytes) -> Any:
+    """Parse one JSON document; raises ``ValueError`` when it is not valid JSON."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+@lru_cache(maxsize=16384)
+def variables_fragment(raw: Optional[str]) -> str:
+    """Rendered ``variables`` object for a stored ``variables_json``.
+
+    Cached per distinct document, so repeated polls of a pipeline never
+    re-parse its variables.
+    """
+    if raw is None:
+        return "{}"
+    return dumps(deserialise_variables(raw)).decode("utf-8")
+
+
+def _json_or_null(value: Optional[int]) -> str | int:
+    return "null" if value is None else value
+
+
+def render_pipeline(pipeline: Pipeline, base_url: str, status: str | None = None) -> str:
+    """JSON for ``pipeline``, equal to validating and serialising ``pipeline_to_dict``."""
+    terminal_after, terminal_status, _ = compute_effective_settings(pipeline)
+    return PIPELINE_TEMPLATE % (
+        pipeline.id,
+        pipeline.project_id,
+        encode_json_string(pipeline.ref),
+        encode_json_string(pipeline.sha),
+        encode_json_string(status or pipeline.status),
+        encode_json_string(base_url)[1:-1],
+        pipeline.project_id,
+        pipeline.id,
+        format_timestamp(pipeline.created_at),
+        format_timestamp(pipeline.updated_at),
+        variables_fragment(pipeline.variables_json),
+        _json_or_null(pipeline.scenario_id),
+        _json_or_null(terminal_after),
+        encode_json_string(terminal_status),
+    )
+
+
+class JSONBytesResponse(Response):
+    """JSON response for server-built bodies, skipping ``response_model`` validation.
+
+    Pre-rendered ``str``/``bytes`` content is sent as is; anything else goes
+    through :func:`dumps`.
+    """
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        if isinstance(content, str):
+            return content.encode("utf-8")
+        return dumps(content)
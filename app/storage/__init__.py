@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from ..config import Settings
+from ..database import SqliteTuning
+from ..tenants import current_tenant
+from .base import ExternalChanges, PipelineBatch, PipelineFilters, RetentionPolicy, Storage
+from .cache import VerdictCache
+from .memory import MemoryStorage
+from .sql import SqlStorage
+
+_storage: Storage | None = None
+
+
+def init_storage(settings: Settings) -> Storage:
+    """Build the storage backend selected by ``settings.database_url``.
+
+    ``memory://`` selects the in-process backend; anything else is handed to
+    SQLAlchemy.
+    """
+    global _storage
+
+    if settings.database_url.startswith("memory:"):
+        _storage = MemoryStorage()
+    else:
+        tuning = SqliteTuning(
+            profile=settings.sqlite_profile,
+            cache_size_kib=settings.sqlite_cache_size_kib,
+            mmap_size=settings.sqlite_mmap_size,
+            busy_timeout_ms=settings.sqlite_busy_timeout_ms,
+            read_pool_size=settings.db_read_pool_size,
+        )
+        token_cache = VerdictCache(settings.trigger_token_cache_size, settings.trigger_token_cache_ttl_seconds)
+        _storage = SqlStorage(settings.database_url, tuning=tuning, shared=settings.workers > 1, token_cache=token_cache)
+    return _storage
+
+
+def get_storage() -> Storage:
+    """Storage of the current namespace, or the configured backend outside one."""
+    tenant = current_tenant()
+    if tenant is not None:
+        return tenant.storage
+    if _storage is None:
+        raise RuntimeError("Storage has not been initialised. Call init_storage() first.")
+    return _storage
+
+
+async def provide_storage() -> Storage:
+    """FastAPI dependency returning the active storage backend.
+
+    Declared ``async`` so resolving it never hops onto the threadpool.
+    """
+    return get_storage()
+
+
+__all__ = ["ExternalChanges", "MemoryStorage", "PipelineBatch", "PipelineFilters", "RetentionPolicy", "SqlStorage", "Storage", "get_storage", "init_storage", "provide_storage"]
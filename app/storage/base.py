@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional, Sequence
+
+from ..logic import compute_effective_settings, compute_timeline, format_timestamp
+from ..models import Pipeline, Scenario, TriggerToken
+
+# Rows per ``PipelineBatch`` yielded by ``Storage.iter_pipeline_batches``.
+BATCH_SIZE = 5000
+# Upper bounds, in seconds, of the time-to-terminal histogram buckets; a
+# final open-ended bucket follows the last one.
+TIME_TO_TERMINAL_BUCKETS = (1, 5, 15, 60, 300, 900, 3600)
+
+
+@dataclass(slots=True)
+class PipelineFilters:
+    """Column filters for pipeline listings; ``None`` means "don't filter"."""
+
+    project_id: Optional[int] = None
+    ref: Optional[str] = None
+    scenario_id: Optional[int] = None
+    created_after: Optional[datetime] = None
+    created_before: Optional[datetime] = None
+    id_after: Optional[int] = None
+    # CI variables that must all be set to exactly these values.
+    variables: Optional[dict[str, str]] = None
+    limit: Optional[int] = None
+    # Computed status at ``reference_time`` (defaults to now), matched via ``terminal_at``.
+    status: Optional[str] = None
+    reference_time: Optional[datetime] = None
+
+
+@dataclass(slots=True)
+class PipelineBatch:
+    """A slice of a pipeline listing as parallel columns.
+
+    ``terminal_after``, ``terminal_status``, ``never_complete`` and
+    ``timeline_json`` hold the *effective* settings (scenario or inline), and
+    timestamps are pre-rendered, so listings never build ORM objects or
+    ``datetime`` instances per row.
+    """
+
+    id: list[int] = field(default_factory=list)
+    project_id: list[int] = field(default_factory=list)
+    ref: list[str] = field(default_factory=list)
+    sha: list[str] = field(default_factory=list)
+    variables_json: list[Optional[str]] = field(default_factory=list)
+    scenario_id: list[Optional[int]] = field(default_factory=list)
+    created_at: list[str] = field(default_factory=list)
+    updated_at: list[str] = field(default_factory=list)
+    created_epoch: list[float] = field(default_factory=list)
+    terminal_after: list[Optional[int]] = field(default_factory=list)
+    terminal_status: list[str] = field(default_factory=list)
+    never_complete: list[bool] = field(default_factory=list)
+    timeline_json: list[Optional[str]] = field(default_factory=list)
+
+    def __len__(self) -> int:
+        return len(self.id)
+
+    def take(self, indices: Sequence[int]) -> PipelineBatch:
+        """A new batch holding only the rows at ``indices``."""
+        return PipelineBatch(*([column[index] for index in indices] for column in self.columns()))
+
+    def columns(self) -> tuple[list, ...]:
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def append(self, pipeline: Pipeline) -> None:
+        terminal_after, terminal_status, never_complete = compute_effective_settings(pipeline)
+        timeline = compute_timeline(pipeline)
+        created_at = pipeline.created_at
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        self.id.append(pipeline.id)
+        self.project_id.append(pipeline.project_id)
+        self.ref.append(pipeline.ref)
+        self.sha.append(pipeline.sha)
+        self.variables_json.append(pipeline.variables_json)
+        self.scenario_id.append(pipeline.scenario_id)
+        self.created_at.append(format_timestamp(created_at))
+        self.updated_at.append(format_timestamp(pipeline.updated_at))
+        self.created_epoch.append(created_at.timestamp())
+        self.terminal_after.append(terminal_after)
+        self.terminal_status.append(terminal_status)
+        self.never_complete.append(never_complete)
+        self.timeline_json.append(pipeline.scenario.timeline_json if timeline is not None else None)
+
+
+@dataclass(slots=True)
+class PipelineStats:
+    """Aggregate pipeline counts at one reference instant."""
+
+    # (computed status, project_id, scenario_id, count)
+    groups: list[tuple[str, int, Optional[int], int]] = field(default_factory=list)
+    # In-flight pipelines by remaining time; aligned with TIME_TO_TERMINAL_BUCKETS plus one.
+    time_to_terminal: list[int] = field(default_factory=lambda: [0] * (len(TIME_TO_TERMINAL_BUCKETS) + 1))
+    # In-flight pipelines that never complete.
+    never_terminal: int = 0
+
+
+@dataclass(slots=True)
+class RetentionPolicy:
+    """Limits on finished pipelines; ``0`` disables a limit.
+
+    Only pipelines whose ``terminal_at`` has passed are ever deleted, so
+    in-flight and never-completing pipelines survive every limit (they still
+    count towards the row caps).
+    """
+
+    # Seconds a pipeline is kept after reaching its terminal status.
+    max_age_seconds: int = 0
+    # Newest pipelines kept per project.
+    max_per_project: int = 0
+    # Newest pipelines kept overall.
+    max_rows: int = 0
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.max_age_seconds or self.max_per_project or self.max_rows)
+
+
+@dataclass(slots=True)
+class ExternalChanges:
+    """What other processes sharing the database changed since the last poll."""
+
+    # Something was committed; pipelines may have been added, updated or deleted.
+    pipelines: bool = False
+    # Scenarios changed, and the local scenario cache was dropped.
+    scenarios: bool = False
+
+
+class Storage(ABC):
+    """Persistence operations used by the route handlers.
+
+    Every operation is a coroutine so handlers can run on the event loop
+    without borrowing threads from the threadpool.
+
+    Backends return objects exposing the same attributes as the ORM models in
+    ``app.models`` (including ``Pipeline.scenario``), so the status engine in
+    ``app.logic`` works unchanged on either of them.
+    """
+
+    @abstractmethod
+    async def seed_scenarios(self) -> None:
+        """Insert any missing built-in scenarios."""
+
+    @abstractmethod
+    async def list_scenarios(self) -> list[Scenario]:
+        ...
+
+    @abstractmethod
+    async def get_scenario(self, scenario_id: int) -> Optional[Scenario]:
+        ...
+
+    @abstractmethod
+    async def create_scenario(self, values: dict[str, object]) -> Scenario:
+        ...
+
+    @abstractmethod
+    async def update_scenario(self, scenario_id: int, values: dict[str, object]) -> Optional[Scenario]:
+        """Replace a scenario definition; ``None`` when it does not exist."""
+
+    @abstractmethod
+    async def delete_scenario(self, scenario_id: int) -> bool:
+        """Delete a scenario and detach its pipelines; ``False`` when missing."""
+
+    @abstractmethod
+    async def create_pipeline(self, values: dict[str, object]) -> Pipeline:
+        ...
+
+    @abstractmethod
+    async def create_pipelines(self, values: list[dict[str, object]]) -> list[Pipeline]:
+        """Insert several pipelines in one transaction, returned in input order."""
+
+    @abstractmethod
+    async def import_pipelines(self, chunks: AsyncIterator[list[dict[str, object]]], highest_id: int = 0) -> int:
+        """Insert every chunk in one transaction; return the number of pipelines.
+
+        Values may carry an ``id``; those without one are numbered after
+        every stored and imported id; ``highest_id`` is the largest id in
+        ``chunks``, for backends that number rows before the last chunk is
+        in. An id already in use raises ``ValueError``, and nothing is
+        imported. The write transaction stays open while ``chunks`` is
+        consumed, so it should be read from something local, never from a
+        client.
+        """
+
+    @abstractmethod
+    async def get_pipeline(self, pipeline_id: int, project_id: Optional[int] = None) -> Optional[Pipeline]:
+        ...
+
+    @abstractmethod
+    async def save_pipeline_status(self, pipeline: Pipeline) -> None:
+        """Persist ``status`` and ``updated_at`` of an already loaded pipeline."""
+
+    @abstractmethod
+    async def materialize_statuses(self, reference_time: datetime) -> int:
+        """Flip every overdue ``running`` pipeline to its terminal status; return the count."""
+
+    @abstractmethod
+    def iter_pipelines(self, filters: PipelineFilters) -> AsyncIterator[Pipeline]:
+        """Yield matching pipelines in ascending ``id`` order."""
+
+    @abstractmethod
+    async def pipeline_stats(self, reference_time: datetime) -> PipelineStats:
+        """Count pipelines by computed status, project and scenario without loading rows."""
+
+    async def iter_pipeline_batches(self, filters: PipelineFilters) -> AsyncIterator[PipelineBatch]:
+        """Yield matching pipelines as columnar batches of up to ``BATCH_SIZE`` rows.
+
+        The default packs ``iter_pipelines`` results; backends that can fetch
+        plain columns directly should override it.
+        """
+        batch = PipelineBatch()
+        async for pipeline in self.iter_pipelines(filters):
+            batch.append(pipeline)
+            if len(batch) >= BATCH_SIZE:
+                yield batch
+                batch = PipelineBatch()
+        if batch:
+            yield batch
+
+    @abstractmethod
+    async def create_trigger_token(self, values: dict[str, object]) -> Optional[TriggerToken]:
+        """Store a trigger token; ``None`` when its ``token_hash`` is already in use."""
+
+    @abstractmethod
+    async def list_trigger_tokens(self, project_id: int) -> list[TriggerToken]:
+        ...
+
+    @abstractmethod
+    async def delete_trigger_token(self, project_id: int, token_id: int) -> bool:
+        """Revoke a trigger token; ``False`` when the project has no such token."""
+
+    @abstractmethod
+    async def check_trigger_token(self, project_id: int, token_hash: str) -> Optional[bool]:
+        """Whether ``token_hash`` belongs to the project; ``None`` when the project has no trigger tokens."""
+
+    @abstractmethod
+    async def delete_pipeline(self, pipeline_id: int) -> Optional[Pipeline]:
+        """Delete a pipeline and return it; ``None`` when missing."""
+
+    @abstractmethod
+    async def prune_pipelines(self, policy: RetentionPolicy, reference_time: datetime, limit: int) -> int:
+        """Delete up to ``limit`` finished pipelines beyond ``policy``; return the count.
+
+        Oldest pipelines go first. Callers repeat until fewer than ``limit``
+        rows are deleted, so no single transaction holds the write lock long.
+        """
+
+    async def compact(self) -> int:
+        """Return freed space to the operating system; return the bytes reclaimed."""
+        return 0
+
+    async def poll_external_changes(self) -> ExternalChanges:
+        """Notice writes made by other processes, dropping caches they made stale.
+
+        Backends private to one process never see any.
+        """
+        return ExternalChanges()
+
+    @abstractmethod
+    async def reset(self) -> None:
+        """Delete every pipeline, scenario and trigger token, then re-seed the built-in scenarios."""
+
+    @abstractmethod
+    async def snapshot(self) -> bytes:
+        """Capture scenarios, pipelines and the id sequence as an opaque blob for :meth:`restore`."""
+
+    @abstractmethod
+    async def restore(self, snapshot: bytes) -> None:
+        """Replace the whole state with a :meth:`snapshot` of the same backend.
+
+        Raises ``ValueError`` for a blob that is not such a snapshot.
+        """
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class ScenarioCache(Generic[T]):
+    """Versioned snapshot of the scenario table.
+
+    Scenarios change rarely, so backends load them all at once and serve
+    lookups from memory. Every scenario mutation calls :meth:`invalidate`,
+    which bumps ``version``; a load that started before the bump is discarded
+    by :meth:`fill` so a concurrent reader cannot reinstate stale rows.
+    """
+
+    __slots__ = ("_entries", "version")
+
+    def __init__(self) -> None:
+        self._entries: Optional[dict[int, T]] = None
+        self.version = 0
+
+    def snapshot(self) -> Optional[dict[int, T]]:
+        """Return the cached mapping, or ``None`` when it needs (re)loading."""
+        return self._entries
+
+    def fill(self, entries: dict[int, T], version: int) -> bool:
+        """Store ``entries`` loaded at ``version``; returns whether they were kept."""
+        if version != self.version:
+            return False
+        self._entries = entries
+        return True
+
+    def invalidate(self) -> None:
+        self.version += 1
+        self._entries = None
+
+
+# Returned by :meth:`VerdictCache.get` when nothing (live) is cached.
+MISSING: object = object()
+
+
+class VerdictCache:
+    """Bounded LRU of recent verification outcomes, each valid for ``ttl`` seconds.
+
+    Positive and negative outcomes are cached alike, so neither valid nor
+    repeatedly wrong credentials reach the database while their entry lives.
+    Local changes call :meth:`clear`; changes made by other processes are
+    picked up once the entries expire.
+    """
+
+    __slots__ = ("capacity", "ttl", "_entries")
+
+    def __init__(self, capacity: int = 10_000, ttl: float = 60.0) -> None:
+        self.capacity = capacity
+        self.ttl = ttl
+        self._entries: OrderedDict[Hashable, tuple[float, object]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> object:
+        """The cached outcome for ``key``, or :data:`MISSING`."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return MISSING
+        if entry[0] <= time.monotonic():
+            del self._entries[key]
+            return MISSING
+        self._entries.move_to_end(key)
+        return entry[1]
+
+    def put(self, key: Hashable, outcome: object) -> None:
+        if self.capacity <= 0 or self.ttl <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl, outcome)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
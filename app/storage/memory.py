@@ -0,0 +1,580 @@
+from __future__ import annotations
+
+import json
+import threading
+import zlib
+from bisect import bisect_left, bisect_right, insort
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+from itertools import islice
+from types import MappingProxyType
+from typing import Any, AsyncIterator, Mapping, Optional
+
+from ..logic import compute_status, compute_terminal_at, load_variables, now_utc
+from ..seeding import default_scenarios
+from ..timeline import IN_FLIGHT_STATUSES, compile_timeline, load_timeline
+from .base import TIME_TO_TERMINAL_BUCKETS, PipelineFilters, PipelineStats, RetentionPolicy, Storage
+
+
+class ScenarioRecord:
+    __slots__ = ("scenario_id", "name", "terminal_after_seconds", "terminal_status", "never_complete", "timeline_json")
+
+    def __init__(
+        self,
+        scenario_id: int,
+        name: str,
+        terminal_after_seconds: Optional[int] = None,
+        terminal_status: str = "success",
+        never_complete: bool = False,
+        timeline_json: Optional[str] = None,
+    ) -> None:
+        self.scenario_id = scenario_id
+        self.name = name
+        self.terminal_after_seconds = terminal_after_seconds
+        self.terminal_status = terminal_status
+        self.never_complete = never_complete
+        self.timeline_json = timeline_json
+
+    @property
+    def timeline(self) -> Optional[dict[str, Any]]:
+        return load_timeline(self.timeline_json)
+
+    def copy(self) -> ScenarioRecord:
+        return ScenarioRecord(**{name: getattr(self, name) for name in self.__slots__})
+
+
+@lru_cache(maxsize=1)
+def built_in_scenarios() -> Mapping[int, ScenarioRecord]:
+    """The seeded scenarios, built once per process and shared read-only by every ``MemoryStorage``."""
+    return MappingProxyType({payload["scenario_id"]: ScenarioRecord(**payload) for payload in default_scenarios()})
+
+
+class PipelineRecord:
+    __slots__ = (
+        "id",
+        "project_id",
+        "ref",
+        "sha",
+        "status",
+        "variables_json",
+        "scenario_id",
+        "terminal_after_seconds",
+        "terminal_status",
+        "created_at",
+        "updated_at",
+        "terminal_at",
+        "scenario",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        project_id: int,
+        ref: str,
+        sha: str,
+        created_at: datetime,
+        updated_at: datetime,
+        status: str = "running",
+        variables_json: Optional[str] = None,
+        scenario_id: Optional[int] = None,
+        terminal_after_seconds: Optional[int] = None,
+        terminal_status: Optional[str] = None,
+        scenario: Optional[ScenarioRecord] = None,
+        terminal_at: Optional[datetime] = None,
+    ) -> None:
+        self.id = id
+        self.project_id = project_id
+        self.ref = ref
+        self.sha = sha
+        self.status = status
+        self.variables_json = variables_json
+        self.scenario_id = scenario_id
+        self.terminal_after_seconds = terminal_after_seconds
+        self.terminal_status = terminal_status
+        self.created_at = created_at
+        self.updated_at = updated_at
+        self.terminal_at = terminal_at
+        self.scenario = scenario
+
+
+class TriggerTokenRecord:
+    __slots__ = ("id", "project_id", "description", "token_hash", "token_prefix", "created_at")
+
+    def __init__(
+        self,
+        id: int,
+        project_id: int,
+        token_hash: str,
+        token_prefix: str,
+        created_at: datetime,
+        description: Optional[str] = None,
+    ) -> None:
+        self.id = id
+        self.project_id = project_id
+        self.description = description
+        self.token_hash = token_hash
+        self.token_prefix = token_prefix
+        self.created_at = created_at
+
+
+# Stored columns of a pipeline, in snapshot order; ``scenario`` is re-linked on restore.
+_PIPELINE_FIELDS = PipelineRecord.__slots__[:-1]
+_TIMESTAMP_FIELDS = ("created_at", "updated_at", "terminal_at")
+_SNAPSHOT_MAGIC = b"mock-memory-snapshot-1\n"
+# Snapshots store timestamps as exact integer microseconds since the epoch;
+# ``isoformat`` and ``fromisoformat`` would dominate the snapshot time.
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def _pipeline_row(pipeline: PipelineRecord) -> list[object]:
+    row = [getattr(pipeline, field) for field in _PIPELINE_FIELDS]
+    return [(value - _EPOCH) // _MICROSECOND if isinstance(value, datetime) else value for value in row]
+
+
+def _pipeline_from_row(row: list[object]) -> PipelineRecord:
+    values = dict(zip(_PIPELINE_FIELDS, row, strict=True))
+    for field in _TIMESTAMP_FIELDS:
+        if values[field] is not None:
+            values[field] = _EPOCH + values[field] * _MICROSECOND
+    return PipelineRecord(**values)
+
+
+def _trigger_token_row(token: TriggerTokenRecord) -> list[object]:
+    created_at = (token.created_at - _EPOCH) // _MICROSECOND
+    return [token.id, token.project_id, token.token_hash, token.token_prefix, created_at, token.description]
+
+
+def _trigger_token_from_row(row: list[object]) -> TriggerTokenRecord:
+    token_id, project_id, token_hash, token_prefix, created_at, description = row
+    return TriggerTokenRecord(token_id, project_id, token_hash, token_prefix, _EPOCH + created_at * _MICROSECOND, description)
+
+
+def _matches(pipeline: PipelineRecord, filters: PipelineFilters) -> bool:
+    if filters.project_id is not None and pipeline.project_id != filters.project_id:
+        return False
+    if filters.id_after is not None and pipeline.id <= filters.id_after:
+        return False
+    if filters.ref is not None and pipeline.ref != filters.ref:
+        return False
+    if filters.scenario_id is not None and pipeline.scenario_id != filters.scenario_id:
+        return False
+    if filters.created_after is not None and pipeline.created_at < filters.created_after:
+        return False
+    if filters.created_before is not None and pipeline.created_at >= filters.created_before:
+        return False
+    if filters.variables:
+        variables = load_variables(pipeline.variables_json)
+        if any(variables.get(key) != value for key, value in filters.variables.items()):
+            return False
+    if filters.status is not None:
+        return compute_status(pipeline, filters.reference_time or now_utc()) == filters.status
+    return True
+
+
+_GroupKey = tuple[int, Optional[int], Optional[int], Optional[str]]
+
+
+class _CreationIndex:
+    """Sorted creation epochs per (project, scenario, inline settings) group.
+
+    Every pipeline in a group shares its effective settings, so the number of
+    pipelines past any deadline is a ``bisect`` over the group; aggregate
+    stats cost O(groups * log n) instead of a pass over every pipeline.
+    """
+
+    __slots__ = ("groups",)
+
+    def __init__(self) -> None:
+        self.groups: dict[_GroupKey, list[float]] = {}
+
+    @staticmethod
+    def _key(pipeline: PipelineRecord) -> _GroupKey:
+        return (pipeline.project_id, pipeline.scenario_id, pipeline.terminal_after_seconds, pipeline.terminal_status)
+
+    def add(self, pipeline: PipelineRecord) -> None:
+        insort(self.groups.setdefault(self._key(pipeline), []), pipeline.created_at.timestamp())
+
+    def remove(self, pipeline: PipelineRecord) -> None:
+        key = self._key(pipeline)
+        epochs = self.groups.get(key)
+        if not epochs:
+            return
+        index = bisect_left(epochs, pipeline.created_at.timestamp())
+        if index < len(epochs):
+            del epochs[index]
+        if not epochs:
+            del self.groups[key]
+
+
+class MemoryStorage(Storage):
+    """Process-local storage for throwaway test environments.
+
+    Pipelines are indexed by id, by project and by CI variable; ids are allocated
+    monotonically so dict insertion order doubles as ``id`` order. Scenario
+    records are updated in place, which keeps ``pipeline.scenario`` current
+    without any lookups on the read path.
+
+    Built-in scenarios are not copied in: seeding only makes the shared
+    :func:`built_in_scenarios` visible, so a new, seeded store costs O(1).
+    The first update of a built-in replaces it with a private copy, and
+    deleting one hides it.
+    """
+
+    def __init__(self, seeded: bool = False) -> None:
+        self._lock = threading.RLock()
+        self._built_in = built_in_scenarios()
+        self._seeded = seeded
+        # Created scenarios and private copies of updated built-ins.
+        self._scenarios: dict[int, ScenarioRecord] = {}
+        # Built-in ids deleted from this store.
+        self._removed: set[int] = set()
+        self._pipelines: dict[int, PipelineRecord] = {}
+        self._by_project: dict[int, dict[int, PipelineRecord]] = {}
+        # (key, value) of a CI variable to the pipelines that set it.
+        self._by_variable: dict[tuple[str, str], dict[int, PipelineRecord]] = {}
+        self._created = _CreationIndex()
+        self._last_id = 0
+        # Trigger tokens by digest (the verification index) and by project.
+        self._token_index: dict[str, TriggerTokenRecord] = {}
+        self._tokens_by_project: dict[int, dict[int, TriggerTokenRecord]] = {}
+        self._last_token_id = 0
+
+    def _scenario(self, scenario_id: Optional[int]) -> Optional[ScenarioRecord]:
+        scenario = self._scenarios.get(scenario_id)
+        if scenario is None and self._seeded and scenario_id not in self._removed:
+            scenario = self._built_in.get(scenario_id)
+        return scenario
+
+    async def seed_scenarios(self) -> None:
+        with self._lock:
+            self._seeded = True
+            self._removed.clear()
+
+    async def list_scenarios(self) -> list[ScenarioRecord]:
+        with self._lock:
+            if not self._seeded:
+                return list(self._scenarios.values())
+            built_in = [
+                self._scenarios.get(scenario_id, scenario)
+                for scenario_id, scenario in self._built_in.items()
+                if scenario_id not in self._removed
+            ]
+            return built_in + [scenario for scenario_id, scenario in self._scenarios.items() if scenario_id not in self._built_in]
+
+    async def get_scenario(self, scenario_id: int) -> Optional[ScenarioRecord]:
+        return self._scenario(scenario_id)
+
+    async def create_scenario(self, values: dict[str, object]) -> ScenarioRecord:
+        scenario = ScenarioRecord(**values)
+        with self._lock:
+            self._scenarios[scenario.scenario_id] = scenario
+            self._removed.discard(scenario.scenario_id)
+        return scenario
+
+    async def update_scenario(self, scenario_id: int, values: dict[str, object]) -> Optional[ScenarioRecord]:
+        with self._lock:
+            scenario = self._scenarios.get(scenario_id)
+            if scenario is None:
+                shared = self._scenario(scenario_id)
+                if shared is None:
+                    return None
+                scenario = self._scenarios[scenario_id] = shared.copy()
+            for field, value in values.items():
+                setattr(scenario, field, value)
+            for pipeline in self._pipelines.values():
+                if pipeline.scenario_id == scenario_id:
+                    pipeline.scenario = scenario
+                    pipeline.terminal_at = compute_terminal_at(pipeline)
+        return scenario
+
+    async def delete_scenario(self, scenario_id: int) -> bool:
+        with self._lock:
+            if self._scenario(scenario_id) is None:
+                return False
+            self._scenarios.pop(scenario_id, None)
+            if scenario_id in self._built_in:
+                self._removed.add(scenario_id)
+            for pipeline in self._pipelines.values():
+                if pipeline.scenario_id == scenario_id:
+                    self._created.remove(pipeline)
+                    pipeline.scenario_id = None
+                    pipeline.scenario = None
+                    pipeline.terminal_at = compute_terminal_at(pipeline)
+                    self._created.add(pipeline)
+        return True
+
+    async def create_pipeline(self, values: dict[str, object]) -> PipelineRecord:
+        with self._lock:
+            return self._insert_pipeline(values)
+
+    def _insert_pipeline(self, values: dict[str, object]) -> PipelineRecord:
+        # Caller holds ``self._lock``. Imports may fix the id.
+        if "id" in values:
+            pipeline = PipelineRecord(**values)
+        else:
+            self._last_id += 1
+            pipeline = PipelineRecord(id=self._last_id, **values)
+        if pipeline.scenario_id is not None:
+            pipeline.scenario = self._scenario(pipeline.scenario_id)
+        pipeline.terminal_at = compute_terminal_at(pipeline)
+        self._add_pipeline(pipeline)
+        return pipeline
+
+    def _add_pipeline(self, pipeline: PipelineRecord) -> None:
+        # Caller holds ``self._lock``.
+        self._pipelines[pipeline.id] = pipeline
+        self._by_project.setdefault(pipeline.project_id, {})[pipeline.id] = pipeline
+        for variable in load_variables(pipeline.variables_json).items():
+            self._by_variable.setdefault(variable, {})[pipeline.id] = pipeline
+        self._created.add(pipeline)
+
+    async def create_pipelines(self, values: list[dict[str, object]]) -> list[PipelineRecord]:
+        with self._lock:
+            return [self._insert_pipeline(item) for item in values]
+
+    async def import_pipelines(self, chunks: AsyncIterator[list[dict[str, object]]], highest_id: int = 0) -> int:
+        # Everything ends up in memory anyway, so stage it all and apply it at once.
+        staged = [item async for chunk in chunks for item in chunk]
+        with self._lock:
+            numbered = [item["id"] for item in staged if "id" in item]
+            if len(set(numbered)) < len(numbered) or not self._pipelines.keys().isdisjoint(numbered):
+                raise ValueError("Imported pipeline ids clash with each other or with stored pipelines")
+            newest = next(reversed(self._pipelines), 0)
+            self._last_id = max([self._last_id, *numbered])
+            ids = [self._insert_pipeline(item).id for item in staged]
+            if ids and (ids[0] < newest or ids != sorted(ids)):
+                self._sort_indexes()
+        return len(staged)
+
+    def _sort_indexes(self) -> None:
+        # Caller holds ``self._lock``. Restores id order in the id-keyed
+        # dicts after an import inserted ids out of order.
+        self._pipelines = dict(sorted(self._pipelines.items()))
+        for index in (self._by_project, self._by_variable):
+            for key, pipelines in index.items():
+                index[key] = dict(sorted(pipelines.items()))
+
+    async def get_pipeline(self, pipeline_id: int, project_id: Optional[int] = None) -> Optional[PipelineRecord]:
+        pipeline = self._pipelines.get(pipeline_id)
+        if pipeline is None or (project_id is not None and pipeline.project_id != project_id):
+            return None
+        return pipeline
+
+    async def save_pipeline_status(self, pipeline: PipelineRecord) -> None:
+        # Records are shared with callers, so the attributes are already live.
+        with self._lock:
+            stored = self._pipelines.get(pipeline.id)
+            if stored is not None and stored is not pipeline:
+                stored.status = pipeline.status
+                stored.updated_at = pipeline.updated_at
+
+    async def materialize_statuses(self, reference_time: datetime) -> int:
+        flipped = 0
+        with self._lock:
+            for pipeline in self._pipelines.values():
+                if pipeline.status not in IN_FLIGHT_STATUSES or pipeline.terminal_at is None or pipeline.terminal_at > reference_time:
+                    continue
+                pipeline.status = compute_status(pipeline, reference_time)
+                pipeline.updated_at = reference_time
+                flipped += 1
+        return flipped
+
+    async def pipeline_stats(self, reference_time: datetime) -> PipelineStats:
+        now = reference_time.timestamp()
+        stats = PipelineStats()
+        with self._lock:
+            for (project_id, scenario_id, inline_after, inline_status), epochs in self._created.groups.items():
+                total = len(epochs)
+                scenario = self._scenario(scenario_id)
+                if scenario is not None and scenario.timeline_json:
+                    timeline = compile_timeline(scenario.timeline_json)
+                    # Pipelines created at or before ``now - offset`` reached that phase.
+                    reached = [bisect_right(epochs, now - offset) for offset in timeline.offsets[1:]] + [0]
+                    counts = [total - reached[0]] + [reached[i] - reached[i + 1] for i in range(len(reached) - 1)]
+                    for state, count in zip(timeline.states, counts):
+                        if count:
+                            stats.groups.append((state, project_id, scenario_id, count))
+                    after, never_complete = timeline.duration, False
+                else:
+                    if scenario is not None:
+                        after, terminal_status, never_complete = (
+                            scenario.terminal_after_seconds,
+                            scenario.terminal_status,
+                            scenario.never_complete,
+                        )
+                    else:
+                        after, terminal_status, never_complete = inline_after, inline_status or "success", False
+                    done = 0 if never_complete else bisect_right(epochs, now - (after or 0))
+                    if done:
+                        stats.groups.append((terminal_status, project_id, scenario_id, done))
+                    if total - done:
+                        stats.groups.append(("running", project_id, scenario_id, total - done))
+                if never_complete:
+                    stats.never_terminal += total
+                    continue
+                done = bisect_right(epochs, now - (after or 0))
+                for index, upper in enumerate(TIME_TO_TERMINAL_BUCKETS):
+                    below = bisect_left(epochs, now - (after or 0) + upper)
+                    stats.time_to_terminal[index] += below - done
+                    done = max(done, below)
+                stats.time_to_terminal[-1] += total - done
+        return stats
+
+    async def iter_pipelines(self, filters: PipelineFilters) -> AsyncIterator[PipelineRecord]:
+        with self._lock:
+            # Scan the narrowest index that applies; ``_matches`` checks the rest.
+            candidates = [self._by_variable.get(variable, {}) for variable in (filters.variables or {}).items()]
+            if filters.project_id is not None:
+                candidates.append(self._by_project.get(filters.project_id, {}))
+            source = min(candidates, key=len).values() if candidates else self._pipelines.values()
+            matched: list[PipelineRecord] = []
+            for pipeline in source:
+                if not _matches(pipeline, filters):
+                    continue
+                matched.append(pipeline)
+                if filters.limit is not None and len(matched) >= filters.limit:
+                    break
+        for pipeline in matched:
+            yield pipeline
+
+    async def create_trigger_token(self, values: dict[str, object]) -> Optional[TriggerTokenRecord]:
+        with self._lock:
+            if values["token_hash"] in self._token_index:
+                return None
+            self._last_token_id += 1
+            token = TriggerTokenRecord(id=self._last_token_id, **{"created_at": now_utc(), **values})
+            self._add_trigger_token(token)
+        return token
+
+    def _add_trigger_token(self, token: TriggerTokenRecord) -> None:
+        # Caller holds ``self._lock``.
+        self._token_index[token.token_hash] = token
+        self._tokens_by_project.setdefault(token.project_id, {})[token.id] = token
+
+    async def list_trigger_tokens(self, project_id: int) -> list[TriggerTokenRecord]:
+        with self._lock:
+            return list(self._tokens_by_project.get(project_id, {}).values())
+
+    async def delete_trigger_token(self, project_id: int, token_id: int) -> bool:
+        with self._lock:
+            project = self._tokens_by_project.get(project_id, {})
+            token = project.pop(token_id, None)
+            if token is None:
+                return False
+            del self._token_index[token.token_hash]
+            if not project:
+                del self._tokens_by_project[project_id]
+        return True
+
+    async def check_trigger_token(self, project_id: int, token_hash: str) -> Optional[bool]:
+        # Two dict lookups, so no verdict cache is needed in front of this backend.
+        token = self._token_index.get(token_hash)
+        if token is not None and token.project_id == project_id:
+            return True
+        return False if project_id in self._tokens_by_project else None
+
+    async def delete_pipeline(self, pipeline_id: int) -> Optional[PipelineRecord]:
+        with self._lock:
+            pipeline = self._pipelines.get(pipeline_id)
+            if pipeline is None:
+                return None
+            self._remove_pipeline(pipeline)
+        return pipeline
+
+    def _remove_pipeline(self, pipeline: PipelineRecord) -> None:
+        # Caller holds ``self._lock``.
+        del self._pipelines[pipeline.id]
+        self._created.remove(pipeline)
+        project = self._by_project.get(pipeline.project_id)
+        if project is not None:
+            project.pop(pipeline.id, None)
+            if not project:
+                del self._by_project[pipeline.project_id]
+        for variable in load_variables(pipeline.variables_json).items():
+            matching = self._by_variable.get(variable)
+            if matching is not None:
+                matching.pop(pipeline.id, None)
+                if not matching:
+                    del self._by_variable[variable]
+
+    async def prune_pipelines(self, policy: RetentionPolicy, reference_time: datetime, limit: int) -> int:
+        def finished(pipeline: PipelineRecord, cutoff: datetime = reference_time) -> bool:
+            return pipeline.terminal_at is not None and pipeline.terminal_at <= cutoff
+
+        with self._lock:
+            doomed: dict[int, PipelineRecord] = {}
+            # Oldest first: ``islice`` over the id-ordered dicts stops at the cap boundary.
+            if policy.max_rows and len(self._pipelines) > policy.max_rows:
+                over = islice(self._pipelines.values(), len(self._pipelines) - policy.max_rows)
+                doomed.update((pipeline.id, pipeline) for pipeline in over if finished(pipeline))
+            if policy.max_per_project:
+                for project in self._by_project.values():
+                    if len(project) > policy.max_per_project:
+                        over = islice(project.values(), len(project) - policy.max_per_project)
+                        doomed.update((pipeline.id, pipeline) for pipeline in over if finished(pipeline))
+            if policy.max_age_seconds:
+                cutoff = reference_time - timedelta(seconds=policy.max_age_seconds)
+                doomed.update(
+                    (pipeline.id, pipeline) for pipeline in self._pipelines.values() if finished(pipeline, cutoff)
+                )
+            victims = sorted(doomed)[:limit]
+            for pipeline_id in victims:
+                self._remove_pipeline(doomed[pipeline_id])
+        return len(victims)
+
+    async def reset(self) -> None:
+        with self._lock:
+            self._scenarios.clear()
+            self._removed.clear()
+            self._pipelines.clear()
+            self._by_project.clear()
+            self._by_variable.clear()
+            self._created = _CreationIndex()
+            self._last_id = 0
+            self._token_index.clear()
+            self._tokens_by_project.clear()
+            self._last_token_id = 0
+        await self.seed_scenarios()
+
+    async def snapshot(self) -> bytes:
+        """Compressed JSON of the store's own state; shared built-ins are referenced, not copied."""
+        with self._lock:
+            state = {
+                "seeded": self._seeded,
+                "removed": sorted(self._removed),
+                "scenarios": [[getattr(scenario, field) for field in ScenarioRecord.__slots__] for scenario in self._scenarios.values()],
+                "pipelines": [_pipeline_row(pipeline) for pipeline in self._pipelines.values()],
+                "last_id": self._last_id,
+                "trigger_tokens": [_trigger_token_row(token) for token in self._token_index.values()],
+                "last_token_id": self._last_token_id,
+            }
+        return _SNAPSHOT_MAGIC + zlib.compress(json.dumps(state, separators=(",", ":")).encode("utf-8"), 1)
+
+    async def restore(self, snapshot: bytes) -> None:
+        if not snapshot.startswith(_SNAPSHOT_MAGIC):
+            raise ValueError("Not a snapshot of the memory:// backend")
+        try:
+            state = json.loads(zlib.decompress(snapshot[len(_SNAPSHOT_MAGIC):]))
+            scenarios = {row[0]: ScenarioRecord(*row) for row in state["scenarios"]}
+            pipelines = [_pipeline_from_row(row) for row in state["pipelines"]]
+            seeded, removed, last_id = bool(state["seeded"]), set(state["removed"]), int(state["last_id"])
+            tokens = [_trigger_token_from_row(row) for row in state.get("trigger_tokens", [])]
+            last_token_id = int(state.get("last_token_id", 0))
+        except (zlib.error, KeyError, TypeError, ValueError) as exc:
+            raise ValueError("Corrupt memory:// snapshot") from exc
+        with self._lock:
+            self._seeded, self._removed, self._scenarios = seeded, removed, scenarios
+            self._pipelines = {}
+            self._by_project = {}
+            self._by_variable = {}
+            self._created = _CreationIndex()
+            for pipeline in pipelines:
+                pipeline.scenario = self._scenario(pipeline.scenario_id)
+                self._add_pipeline(pipeline)
+            self._last_id = last_id
+            self._token_index = {}
+            self._tokens_by_project = {}
+            for token in tokens:
+                self._add_trigger_token(token)
+            self._last_token_id = last_token_id
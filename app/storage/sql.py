@@ -0,0 +1,860 @@
+from __future__ import annotations
+
+import asyncio
+import sqlite3
+import zlib
+from datetime import datetime, timedelta, timezone
+from operator import itemgetter
+from typing import AsyncIterator, Optional
+
+from sqlalchemy import ColumnElement, Connection, Engine, Float, Select, String, case, cast, delete, func, inspect, insert, literal, or_, select, text, type_coerce, update
+from sqlalchemy.exc import DBAPIError, IntegrityError
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+from sqlalchemy.orm import Session, joinedload, noload
+from sqlalchemy.orm.attributes import set_committed_value
+
+from ..database import (
+    Base,
+    SqliteTuning,
+    async_read_session_scope,
+    async_session_scope,
+    get_engine,
+    init_engine,
+)
+from ..logic import compute_status, compute_terminal_at, format_timestamp, now_utc, terminal_deadline, variable_rows
+from ..models import CacheGeneration, Pipeline, PipelineVariable, Scenario, TriggerToken
+from ..seeding import seed_scenarios
+from ..timeline import IN_FLIGHT_STATUSES, compile_timeline
+from .base import BATCH_SIZE, TIME_TO_TERMINAL_BUCKETS, ExternalChanges, PipelineBatch, PipelineFilters, PipelineStats, RetentionPolicy, Storage
+from .cache import MISSING, ScenarioCache, VerdictCache
+
+_YIELD_PER = 500
+# Free pages returned per ``incremental_vacuum`` step, each in its own transaction.
+_VACUUM_STEP_PAGES = 2048
+# ``cache_generations`` row bumped by every scenario change.
+_SCENARIO_GENERATION = "scenarios"
+# ``cache_generations`` row bumped by every trigger token change.
+_TOKEN_GENERATION = "trigger_tokens"
+_GENERATIONS = (_SCENARIO_GENERATION, _TOKEN_GENERATION)
+# ``cache_generations`` row holding the fingerprint of the schema last created or migrated.
+_SCHEMA_STAMP = "schema"
+
+
+def _effective_terminal_status() -> ColumnElement[str]:
+    """SQL mirror of ``compute_effective_settings``' terminal status."""
+    scenario_status = (
+        select(Scenario.terminal_status)
+        .where(Scenario.scenario_id == Pipeline.scenario_id)
+        .correlate(Pipeline)
+        .scalar_subquery()
+    )
+    return case(
+        (Pipeline.scenario_id.is_not(None), scenario_status),
+        else_=func.coalesce(Pipeline.terminal_status, "success"),
+    )
+
+
+def _sqlite_deadline(seconds: ColumnElement[int] | int) -> ColumnElement[str]:
+    """``created_at + seconds`` computed inside SQLite.
+
+    ``datetime()`` drops the fractional part, so the stored microseconds are
+    appended back; offsets are whole seconds and never change them.
+    """
+    shifted = func.datetime(Pipeline.created_at, func.printf("+%d seconds", seconds))
+    return shifted.op("||")(func.substr(Pipeline.created_at, 20))
+
+
+# Columns added after the first release, as (table, column, DDL type).
+_ADDED_COLUMNS = (
+    ("pipelines", "terminal_at", "DATETIME"),
+    ("scenarios", "timeline_json", "TEXT"),
+)
+
+
+def _sqlite_epoch(column: ColumnElement[datetime]) -> ColumnElement[float]:
+    """Epoch seconds of a stored ``YYYY-MM-DD HH:MM:SS.ffffff`` timestamp."""
+    whole = cast(func.strftime("%s", column), Float)
+    return whole + cast(func.substr(column, 20), Float)
+
+
+def _sqlite_iso(column: ColumnElement[datetime]) -> ColumnElement[str]:
+    """Render a stored timestamp the way ``format_timestamp`` does, inside SQLite."""
+    stored = type_coerce(column, String)
+    return func.replace(func.replace(stored, ".000000", ""), " ", "T").op("||")("Z")
+
+
+def _migrate(engine: Engine) -> None:
+    """Add columns introduced after a database file was first created, and fill the variables table."""
+    inspector = inspect(engine)
+    added = set()
+    with engine.begin() as connection:
+        for table, column, ddl_type in _ADDED_COLUMNS:
+            if column not in {existing["name"] for existing in inspector.get_columns(table)}:
+                connection.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl_type}"))
+                added.add(column)
+        # Files from before ``pipeline_variables`` get it empty from create_all.
+        if connection.scalar(select(PipelineVariable.pipeline_id).limit(1)) is None:
+            stored = connection.execute(select(Pipeline.id, Pipeline.variables_json).where(Pipeline.variables_json.is_not(None)))
+            rows = [row for pipeline_id, raw in stored for row in variable_rows(pipeline_id, raw)]
+            if rows:
+                connection.execute(insert(PipelineVariable), _variable_params(rows))
+    if "terminal_at" not in added:
+        return
+    for index in Base.metadata.tables["pipelines"].indexes:
+        if "terminal_at" in index.columns:
+            index.create(bind=engine, checkfirst=True)
+    with Session(engine) as session:
+        for pipeline in session.scalars(select(Pipeline).options(joinedload(Pipeline.scenario))):
+            pipeline.terminal_at = compute_terminal_at(pipeline)
+        session.commit()
+
+
+def _schema_fingerprint() -> int:
+    """Checksum of the tables, columns and indexes the models define, and of the migrations."""
+    parts = [repr(_ADDED_COLUMNS), repr(_GENERATIONS)]
+    for table in Base.metadata.sorted_tables:
+        parts.append(table.name)
+        parts += [f"{column.name} {column.type} {column.nullable}" for column in table.columns]
+        parts += sorted(index.name for index in table.indexes)
+    # Kept within a signed 32-bit ``INTEGER`` on every dialect.
+    return zlib.crc32("\n".join(parts).encode("utf-8")) & 0x7FFFFFFF
+
+
+def _schema_is_current(engine: Engine) -> bool:
+    """Whether the database was stamped with the current schema fingerprint; one query."""
+    try:
+        with engine.connect() as connection:
+            stamp = connection.scalar(select(CacheGeneration.generation).where(CacheGeneration.name == _SCHEMA_STAMP))
+    except DBAPIError:  # no ``cache_generations`` table yet
+        return False
+    return stamp == _schema_fingerprint()
+
+
+def _stamp_schema(engine: Engine) -> None:
+    fingerprint = _schema_fingerprint()
+    with engine.begin() as connection:
+        stamped = connection.execute(
+            update(CacheGeneration).where(CacheGeneration.name == _SCHEMA_STAMP).values(generation=fingerprint)
+        )
+        if not stamped.rowcount:
+            connection.execute(insert(CacheGeneration).values(name=_SCHEMA_STAMP, generation=fingerprint))
+
+
+def _prepare_schema(engine: Engine) -> None:
+    """Create and migrate the schema, unless the stamp shows an earlier start already did."""
+    if _schema_is_current(engine):
+        return
+    Base.metadata.create_all(bind=engine)
+    _migrate(engine)
+    _init_generations(engine)
+    _stamp_schema(engine)
+
+
+def _init_generations(engine: Engine) -> None:
+    with engine.begin() as connection:
+        existing = set(connection.scalars(select(CacheGeneration.name).where(CacheGeneration.name.in_(_GENERATIONS))))
+        for name in _GENERATIONS:
+            if name not in existing:
+                connection.execute(insert(CacheGeneration).values(name=name, generation=0))
+
+
+def _sqlite_compact(engine: Engine) -> int:
+    """Release free pages at the end of a SQLite file; blocking, run it in a thread.
+
+    ``executescript`` is used because ``incremental_vacuum`` only frees one
+    page per ``execute`` step. Files created before ``auto_vacuum`` was
+    enabled are switched over with one full ``VACUUM``.
+    """
+    raw = engine.raw_connection()
+    try:
+        db = raw.driver_connection
+        page_size = db.execute("PRAGMA page_size").fetchone()[0]
+        before = db.execute("PRAGMA page_count").fetchone()[0]
+        if db.execute("PRAGMA freelist_count").fetchone()[0]:
+            if db.execute("PRAGMA auto_vacuum").fetchone()[0] == 0:
+                db.executescript("PRAGMA auto_vacuum = INCREMENTAL; VACUUM")
+            while db.execute("PRAGMA freelist_count").fetchone()[0]:
+                db.executescript(f"PRAGMA incremental_vacuum({_VACUUM_STEP_PAGES})")
+        after = db.execute("PRAGMA page_count").fetchone()[0]
+    finally:
+        raw.close()
+    return (before - after) * page_size
+
+
+_SQLITE_MAGIC = b"SQLite format 3\x00"
+
+
+def _sqlite_snapshot(engine: Engine) -> bytes:
+    """Page image of the whole SQLite database; blocking, run it in a thread.
+
+    The write lock is held while copying, so the image is consistent even on
+    ``unsafe`` shared-cache memory databases, whose readers see uncommitted pages.
+    """
+    raw = engine.raw_connection()
+    try:
+        db = raw.driver_connection
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            image = bytearray(db.serialize())
+        finally:
+            db.rollback()
+    finally:
+        raw.close()
+    # Bytes 18-19 flag WAL mode, which a deserialized (memory) copy cannot
+    # open. Restoring keeps the destination's journal mode regardless.
+    image[18:20] = b"\x01\x01"
+    return bytes(image)
+
+
+def _sqlite_restore(engine: Engine, image: bytes) -> dict[str, int]:
+    """Copy a :func:`_sqlite_snapshot` image over the database; return the new cache generations.
+
+    The image is checked in a private memory database first, then written
+    with the online backup API, so every pooled connection sees the result.
+    Each generation ends above both the current and the restored one, which
+    makes other processes drop their scenario and trigger token caches.
+    """
+    if not image.startswith(_SQLITE_MAGIC):
+        raise ValueError("Not a snapshot of a SQLite database")
+    source = sqlite3.connect(":memory:")
+    try:
+        try:
+            source.deserialize(image)
+            stamp = source.execute("SELECT generation FROM cache_generations WHERE name = ?", (_SCHEMA_STAMP,)).fetchall()
+        except sqlite3.DatabaseError as exc:
+            raise ValueError(f"Corrupt SQLite snapshot: {exc}") from None
+        if stamp != [(_schema_fingerprint(),)]:
+            raise ValueError("The snapshot was taken with a different database schema")
+        raw = engine.raw_connection()
+        try:
+            db = raw.driver_connection
+            # ``fetchall`` finishes each statement; one left running would block the backup.
+            select_generations = f"SELECT name, generation FROM cache_generations WHERE name IN ({', '.join('?' * len(_GENERATIONS))})"
+            current = db.execute(select_generations, _GENERATIONS).fetchall()
+            source.backup(db)
+            db.executemany("UPDATE cache_generations SET generation = max(generation, ?) + 1 WHERE name = ?", [row[::-1] for row in current])
+            generations = dict(db.execute(select_generations, _GENERATIONS).fetchall())
+            db.commit()
+        finally:
+            raw.close()
+    finally:
+        source.close()
+    return generations
+
+
+def _with_deadline(values: dict[str, object], scenarios: dict[int, Scenario]) -> dict[str, object]:
+    """``values`` plus the ``terminal_at`` its scenario or inline settings imply."""
+    scenario = scenarios.get(values.get("scenario_id"))
+    if scenario is not None:
+        deadline = terminal_deadline(values["created_at"], scenario.terminal_after_seconds, scenario.never_complete)
+    else:
+        deadline = terminal_deadline(values["created_at"], values.get("terminal_after_seconds"), False)
+    return {**values, "terminal_at": deadline}
+
+
+# Pipeline columns written by imports, in statement order; ``id`` only when given.
+_IMPORT_COLUMNS = (
+    "project_id",
+    "ref",
+    "sha",
+    "status",
+    "variables_json",
+    "scenario_id",
+    "terminal_after_seconds",
+    "terminal_status",
+    "created_at",
+    "updated_at",
+    "terminal_at",
+)
+
+
+def _sqlite_timestamp(value: Optional[datetime]) -> Optional[str]:
+    """``value`` in the text form SQLAlchemy's SQLite ``DATETIME`` stores (naive UTC)."""
+    if value is None:
+        return None
+    if value.utcoffset():
+        value = value.astimezone(timezone.utc)
+    return value.isoformat(" ", "microseconds")[:26]
+
+
+def _sqlite_import(rows: list[dict[str, object]]) -> tuple[str, list[tuple[object, ...]]]:
+    """Raw ``INSERT`` and parameter tuples for ``rows``, which all have the same keys."""
+    columns = ("id",) + _IMPORT_COLUMNS if "id" in rows[0] else _IMPORT_COLUMNS
+    statement = f"INSERT INTO pipelines ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    plain = itemgetter(*columns[:-3])
+    stamp = _sqlite_timestamp
+    parameters = [
+        plain(row) + (stamp(row["created_at"]), stamp(row["updated_at"]), stamp(row["terminal_at"])) for row in rows
+    ]
+    return statement, parameters
+
+
+_VARIABLE_COLUMNS = ("pipeline_id", "key", "value")
+_SQLITE_VARIABLES_INSERT = "INSERT INTO pipeline_variables (pipeline_id, key, value) VALUES (?, ?, ?)"
+
+
+def _variable_params(rows: list[tuple[int, str, str]]) -> list[dict[str, object]]:
+    return [dict(zip(_VARIABLE_COLUMNS, row)) for row in rows]
+
+
+async def _insert_variables(connection: AsyncConnection | AsyncSession, rows: list[tuple[int, str, str]]) -> None:
+    """Mirror ``(pipeline_id, key, value)`` rows into ``pipeline_variables``."""
+    if rows:
+        await connection.execute(insert(PipelineVariable), _variable_params(rows))
+
+
+def _read_generations(connection: Connection, data_version: Optional[int]) -> tuple[Optional[int], Optional[dict[str, int]]]:
+    """``(data_version, cache generations by name)``; the generations are ``None`` when nothing was committed.
+
+    ``PRAGMA data_version`` changes whenever another connection commits, so
+    the generation rows are only read after a write somewhere.
+    """
+    if connection.dialect.name == "sqlite":
+        current = connection.exec_driver_sql("PRAGMA data_version").scalar()
+        if current == data_version:
+            return current, None
+        data_version = current
+    rows = connection.execute(select(CacheGeneration.name, CacheGeneration.generation).where(CacheGeneration.name.in_(_GENERATIONS)))
+    return data_version, dict(rows.tuples().all())
+
+
+class SqlStorage(Storage):
+    """SQLAlchemy-backed storage; every operation runs in its own short async session.
+
+    Lookups and listings use the reader pool, mutations the writer pool.
+
+    Returned objects are detached (``expire_on_commit=False``) so they can be
+    read after the session closes. Scenarios are served from a
+    :class:`ScenarioCache` and attached to pipelines with
+    ``set_committed_value``, so neither lookups nor status computation issue
+    a scenario SELECT once the cache is warm.
+
+    With ``shared=True`` other processes write to the same database.
+    :meth:`poll_external_changes` then keeps the scenario cache coherent
+    through the ``cache_generations`` counter every scenario change bumps,
+    and a lookup of an unknown scenario reloads the cache before giving up.
+
+    Trigger token checks are answered from a :class:`VerdictCache` keyed by
+    ``(project_id, token_hash)``; local token changes clear it, other
+    processes' changes are seen once its entries expire.
+    """
+
+    def __init__(
+        self,
+        database_url: str,
+        tuning: SqliteTuning | None = None,
+        shared: bool = False,
+        token_cache: VerdictCache | None = None,
+    ) -> None:
+        init_engine(database_url, tuning=tuning)
+        _prepare_schema(get_engine())
+        self.shared = shared
+        self._scenario_cache: ScenarioCache[Scenario] = ScenarioCache()
+        self._token_cache = token_cache if token_cache is not None else VerdictCache()
+        self._scenario_generation: Optional[int] = None
+        self._token_generation: Optional[int] = None
+        self._data_version: Optional[int] = None
+        self._watcher: Optional[Connection] = None
+
+    async def _scenarios(self) -> dict[int, Scenario]:
+        scenarios = self._scenario_cache.snapshot()
+        if scenarios is not None:
+            return scenarios
+        version = self._scenario_cache.version
+        async with async_read_session_scope() as session:
+            rows = await session.scalars(select(Scenario).order_by(Scenario.scenario_id))
+            scenarios = {scenario.scenario_id: scenario for scenario in rows}
+        self._scenario_cache.fill(scenarios, version)
+        return scenarios
+
+    @staticmethod
+    async def _bump_generation(session: AsyncSession, name: str) -> Optional[int]:
+        """Bump a cache generation inside the changing transaction; return the new value."""
+        stmt = (
+            update(CacheGeneration)
+            .where(CacheGeneration.name == name)
+            .values(generation=CacheGeneration.generation + 1)
+            .returning(CacheGeneration.generation)
+        )
+        return await session.scalar(stmt)
+
+    async def _scenarios_changed(self, session: AsyncSession) -> None:
+        self._scenario_generation = await self._bump_generation(session, _SCENARIO_GENERATION)
+
+    async def _tokens_changed(self, session: AsyncSession) -> None:
+        # Other workers clear their verdict caches when they see it move.
+        self._token_generation = await self._bump_generation(session, _TOKEN_GENERATION)
+
+    async def seed_scenarios(self) -> None:
+        async with async_session_scope() as session:
+            if not await session.run_sync(seed_scenarios):
+                return
+            await self._scenarios_changed(session)
+        self._scenario_cache.invalidate()
+
+    async def list_scenarios(self) -> list[Scenario]:
+        return list((await self._scenarios()).values())
+
+    async def get_scenario(self, scenario_id: int) -> Optional[Scenario]:
+        scenario = (await self._scenarios()).get(scenario_id)
+        if scenario is None and self.shared:
+            # Possibly created by another process since the last poll.
+            self._scenario_cache.invalidate()
+            scenario = (await self._scenarios()).get(scenario_id)
+        return scenario
+
+    async def create_scenario(self, values: dict[str, object]) -> Scenario:
+        async with async_session_scope() as session:
+            scenario = Scenario(**values)
+            session.add(scenario)
+            await session.flush()
+            await self._scenarios_changed(session)
+        self._scenario_cache.invalidate()
+        return scenario
+
+    async def update_scenario(self, scenario_id: int, values: dict[str, object]) -> Optional[Scenario]:
+        async with async_session_scope() as session:
+            scenario = await session.get(Scenario, scenario_id)
+            if scenario is None:
+                return None
+            for field, value in values.items():
+                setattr(scenario, field, value)
+            await session.flush()
+            await self._reschedule(session, Pipeline.scenario_id == scenario_id, scenario)
+            await self._scenarios_changed(session)
+        self._scenario_cache.invalidate()
+        return scenario
+
+    async def _reschedule(self, session: AsyncSession, where: ColumnElement[bool], scenario: Optional[Scenario]) -> None:
+        """Recompute ``terminal_at`` for the matching pipelines in one UPDATE where possible."""
+        if session.bind.dialect.name == "sqlite":
+            if scenario is None:
+                deadline = _sqlite_deadline(func.coalesce(Pipeline.terminal_after_seconds, 0))
+            elif scenario.never_complete:
+                deadline = None
+            else:
+                deadline = _sqlite_deadline(scenario.terminal_after_seconds or 0)
+            await session.execute(update(Pipeline).where(where).values(terminal_at=deadline))
+            return
+
+        rows = (await session.execute(select(Pipeline.id, Pipeline.created_at, Pipeline.terminal_after_seconds).where(where))).all()
+        for pipeline_id, created_at, inline_after in rows:
+            if scenario is None:
+                deadline = terminal_deadline(created_at, inline_after, False)
+            else:
+                deadline = terminal_deadline(created_at, scenario.terminal_after_seconds, scenario.never_complete)
+            await session.execute(update(Pipeline).where(Pipeline.id == pipeline_id).values(terminal_at=deadline))
+
+    async def delete_scenario(self, scenario_id: int) -> bool:
+        async with async_session_scope() as session:
+            scenario = await session.get(Scenario, scenario_id)
+            if scenario is None:
+                return False
+            # Detached pipelines fall back to their inline settings.
+            await self._reschedule(session, Pipeline.scenario_id == scenario_id, None)
+            await session.execute(update(Pipeline).where(Pipeline.scenario_id == scenario_id).values(scenario_id=None))
+            await session.delete(scenario)
+            await self._scenarios_changed(session)
+        self._scenario_cache.invalidate()
+        return True
+
+    def _attach_scenario(self, pipeline: Pipeline, scenarios: dict[int, Scenario]) -> Pipeline:
+        # Cached scenarios are shared between requests, so they are never
+        # added to a session; set_committed_value skips the save cascade.
+        set_committed_value(pipeline, "scenario", scenarios.get(pipeline.scenario_id))
+        return pipeline
+
+    async def create_pipeline(self, values: dict[str, object]) -> Pipeline:
+        scenarios = await self._scenarios()
+        pipeline = Pipeline(**values)
+        scenario = scenarios.get(pipeline.scenario_id)
+        if scenario is not None:
+            pipeline.terminal_at = terminal_deadline(pipeline.created_at, scenario.terminal_after_seconds, scenario.never_complete)
+        else:
+            pipeline.terminal_at = terminal_deadline(pipeline.created_at, pipeline.terminal_after_seconds, False)
+        async with async_session_scope() as session:
+            session.add(pipeline)
+            if pipeline.variables_json is not None:
+                await session.flush()
+                await _insert_variables(session, variable_rows(pipeline.id, pipeline.variables_json))
+        return self._attach_scenario(pipeline, scenarios)
+
+    async def create_pipelines(self, values: list[dict[str, object]]) -> list[Pipeline]:
+        scenarios = await self._scenarios()
+        async with async_session_scope() as session:
+            rows = [_with_deadline(item, scenarios) for item in values]
+            # One INSERT ... RETURNING executed as a batched executemany.
+            stmt = insert(Pipeline).returning(Pipeline, sort_by_parameter_order=True)
+            pipelines = list(await session.scalars(stmt, rows))
+            await _insert_variables(session, [row for pipeline in pipelines for row in variable_rows(pipeline.id, pipeline.variables_json)])
+        return [self._attach_scenario(pipeline, scenarios) for pipeline in pipelines]
+
+    async def import_pipelines(self, chunks: AsyncIterator[list[dict[str, object]]], highest_id: int = 0) -> int:
+        scenarios = await self._scenarios()
+        sqlite = get_engine().dialect.name == "sqlite"
+        imported = 0
+        try:
+            async with async_session_scope() as session:
+                connection = await session.connection()
+                async for chunk in chunks:
+                    rows = [_with_deadline(item, scenarios) for item in chunk]
+                    numbered = [row for row in rows if "id" in row]
+                    unnumbered = [row for row in rows if "id" not in row]
+                    # Rows without an id are numbered after the stored ones and
+                    # after every explicit id, including those of later chunks;
+                    # the variables need them.
+                    if sqlite:
+                        if unnumbered:
+                            # The ids SQLite would assign, given up front.
+                            last = await connection.scalar(select(func.max(Pipeline.id))) or 0
+                            for pipeline_id, row in enumerate(unnumbered, max([last, highest_id, *(row["id"] for row in numbered)]) + 1):
+                                row["id"] = pipeline_id
+                        # Straight to the driver's executemany: SQLAlchemy's
+                        # per-value bind processing costs more than the insert.
+                        await connection.exec_driver_sql(*_sqlite_import(rows))
+                    else:
+                        if numbered:
+                            await connection.execute(insert(Pipeline), numbered)
+                        if unnumbered:
+                            stmt = insert(Pipeline).returning(Pipeline.id, sort_by_parameter_order=True)
+                            for pipeline_id, row in zip(await connection.scalars(stmt, unnumbered), unnumbered):
+                                row["id"] = pipeline_id
+                    variables = [variable for row in rows for variable in variable_rows(row["id"], row["variables_json"])]
+                    if sqlite and variables:
+                        await connection.exec_driver_sql(_SQLITE_VARIABLES_INSERT, variables)
+                    elif variables:
+                        await _insert_variables(connection, variables)
+                    imported += len(chunk)
+        except IntegrityError:
+            raise ValueError("An imported pipeline id is already in use") from None
+        return imported
+
+    async def get_pipeline(self, pipeline_id: int, project_id: Optional[int] = None) -> Optional[Pipeline]:
+        scenarios = await self._scenarios()
+        stmt = select(Pipeline).options(noload(Pipeline.scenario)).where(Pipeline.id == pipeline_id)
+        if project_id is not None:
+            stmt = stmt.where(Pipeline.project_id == project_id)
+        async with async_read_session_scope() as session:
+            pipeline = (await session.execute(stmt)).scalar_one_or_none()
+        return self._attach_scenario(pipeline, scenarios) if pipeline is not None else None
+
+    async def save_pipeline_status(self, pipeline: Pipeline) -> None:
+        async with async_session_scope() as session:
+            await session.execute(
+                update(Pipeline)
+                .where(Pipeline.id == pipeline.id)
+                .values(status=pipeline.status, updated_at=pipeline.updated_at)
+            )
+
+    async def materialize_statuses(self, reference_time: datetime) -> int:
+        stmt = (
+            update(Pipeline)
+            .where(Pipeline.status.in_(IN_FLIGHT_STATUSES), Pipeline.terminal_at <= reference_time)
+            .values(status=_effective_terminal_status(), updated_at=reference_time)
+            .execution_options(synchronize_session=False)
+        )
+        async with async_session_scope() as session:
+            result = await session.execute(stmt)
+        return result.rowcount
+
+    def _filtered(self, stmt: Select, filters: PipelineFilters, scenarios: dict[int, Scenario]) -> tuple[Select, bool]:
+        """Apply ``filters`` to ``stmt``; also report whether statuses still need refining in Python."""
+        if filters.project_id is not None:
+            stmt = stmt.where(Pipeline.project_id == filters.project_id)
+        if filters.ref is not None:
+            stmt = stmt.where(Pipeline.ref == filters.ref)
+        if filters.scenario_id is not None:
+            stmt = stmt.where(Pipeline.scenario_id == filters.scenario_id)
+        if filters.created_after is not None:
+            stmt = stmt.where(Pipeline.created_at >= filters.created_after)
+        if filters.created_before is not None:
+            stmt = stmt.where(Pipeline.created_at < filters.created_before)
+        if filters.id_after is not None:
+            stmt = stmt.where(Pipeline.id > filters.id_after)
+        for key, value in (filters.variables or {}).items():
+            # Each pair is a range of the covering (key, value, pipeline_id) index.
+            matching = select(PipelineVariable.pipeline_id).where(PipelineVariable.key == key, PipelineVariable.value == value)
+            stmt = stmt.where(Pipeline.id.in_(matching))
+        # In-flight pipelines on a timeline scenario move through created and
+        # pending before running, which terminal_at alone cannot tell apart;
+        # those rows are narrowed in SQL and refined in Python.
+        refine_status = False
+        reference_time = filters.reference_time or now_utc()
+        if filters.status in IN_FLIGHT_STATUSES:
+            timeline_ids = [scenario_id for scenario_id, scenario in scenarios.items() if scenario.timeline_json]
+            stmt = stmt.where(or_(Pipeline.terminal_at.is_(None), Pipeline.terminal_at > reference_time))
+            if filters.status != "running":
+                stmt = stmt.where(Pipeline.scenario_id.in_(timeline_ids))
+            refine_status = bool(timeline_ids)
+        elif filters.status is not None:
+            stmt = stmt.where(Pipeline.terminal_at <= reference_time, _effective_terminal_status() == filters.status)
+        if filters.limit is not None and not refine_status:
+            stmt = stmt.limit(filters.limit)
+        return stmt, refine_status
+
+    async def iter_pipelines(self, filters: PipelineFilters) -> AsyncIterator[Pipeline]:
+        scenarios = await self._scenarios()
+        reference_time = filters.reference_time or now_utc()
+        stmt = select(Pipeline).options(noload(Pipeline.scenario)).order_by(Pipeline.id)
+        stmt, refine_status = self._filtered(stmt, filters, scenarios)
+        stmt = stmt.execution_options(yield_per=_YIELD_PER)
+
+        emitted = 0
+        async with async_read_session_scope() as session:
+            result = await session.stream_scalars(stmt)
+            try:
+                async for pipeline in result:
+                    self._attach_scenario(pipeline, scenarios)
+                    if refine_status and compute_status(pipeline, reference_time) != filters.status:
+                        continue
+                    yield pipeline
+                    emitted += 1
+                    if filters.limit is not None and emitted >= filters.limit:
+                        break
+            finally:
+                await result.close()
+
+    async def pipeline_stats(self, reference_time: datetime) -> PipelineStats:
+        scenarios = await self._scenarios()
+        in_flight = or_(Pipeline.terminal_at.is_(None), Pipeline.terminal_at > reference_time)
+        # Same rules as compute_status, evaluated per row inside the database:
+        # timeline scenarios bisect their phases as a CASE ladder on created_at.
+        whens = []
+        for scenario_id, scenario in scenarios.items():
+            if not scenario.timeline_json:
+                continue
+            timeline = compile_timeline(scenario.timeline_json)
+            phases = [
+                (Pipeline.created_at <= reference_time - timedelta(seconds=offset), state)
+                for offset, state in reversed(list(zip(timeline.offsets, timeline.states)))
+            ]
+            first_state = literal(timeline.states[0])
+            whens.append((Pipeline.scenario_id == scenario_id, case(*phases[:-1], else_=first_state) if phases[:-1] else first_state))
+        whens.append((in_flight, "running"))
+        status = case(*whens, else_=_effective_terminal_status()).label("status")
+
+        remaining = [
+            (Pipeline.terminal_at < reference_time + timedelta(seconds=upper), index)
+            for index, upper in enumerate(TIME_TO_TERMINAL_BUCKETS)
+        ]
+        bucket = case(
+            (Pipeline.terminal_at.is_(None), -1), *remaining, else_=len(TIME_TO_TERMINAL_BUCKETS)
+        ).label("bucket")
+
+        stats = PipelineStats()
+        async with async_read_session_scope() as session:
+            grouped = await session.execute(
+                select(status, Pipeline.project_id, Pipeline.scenario_id, func.count())
+                .group_by(status, Pipeline.project_id, Pipeline.scenario_id)
+            )
+            stats.groups = [tuple(row) for row in grouped]
+            histogram = await session.execute(select(bucket, func.count()).where(in_flight).group_by(bucket))
+            for index, count in histogram:
+                if index < 0:
+                    stats.never_terminal = count
+                else:
+                    stats.time_to_terminal[index] = count
+        return stats
+
+    async def iter_pipeline_batches(self, filters: PipelineFilters) -> AsyncIterator[PipelineBatch]:
+        # Plain columns only: no ORM identity map and no per-row datetime
+        # parsing. Effective settings come from the scenario cache, and status
+        # refinement for timeline rows is left to the caller.
+        scenarios = await self._scenarios()
+        presets = {
+            scenario_id: (scenario.terminal_after_seconds, scenario.terminal_status, scenario.never_complete, scenario.timeline_json)
+            for scenario_id, scenario in scenarios.items()
+        }
+        sqlite = get_engine().dialect.name == "sqlite"
+        if sqlite:
+            created_at = _sqlite_iso(Pipeline.created_at)
+            updated_at = _sqlite_iso(Pipeline.updated_at)
+            created_epoch = _sqlite_epoch(Pipeline.created_at)
+        else:
+            created_at, updated_at, created_epoch = Pipeline.created_at, Pipeline.updated_at, Pipeline.created_at
+        stmt = (
+            select(
+                Pipeline.id,
+                Pipeline.project_id,
+                Pipeline.ref,
+                Pipeline.sha,
+                Pipeline.variables_json,
+                Pipeline.scenario_id,
+                created_at,
+                updated_at,
+                created_epoch,
+                Pipeline.terminal_after_seconds,
+                func.coalesce(Pipeline.terminal_status, "success"),
+            )
+            .order_by(Pipeline.id)
+        )
+        stmt, _ = self._filtered(stmt, filters, scenarios)
+        stmt = stmt.execution_options(yield_per=BATCH_SIZE)
+
+        async with async_read_session_scope() as session:
+            # Straight to the connection: an ORM-enabled result would still
+            # run every row through the loading machinery.
+            connection = await session.connection()
+            result = await connection.stream(stmt)
+            try:
+                async for rows in result.partitions():
+                    columns = [list(column) for column in zip(*rows)]
+                    effective = [
+                        presets.get(scenario_id) or (after, status, False, None)
+                        for scenario_id, after, status in zip(columns[5], columns[9], columns[10])
+                    ]
+                    columns[9:] = [list(column) for column in zip(*effective)]
+                    if not sqlite:
+                        columns[8] = [value.timestamp() for value in columns[8]]
+                        columns[6] = [format_timestamp(value) for value in columns[6]]
+                        columns[7] = [format_timestamp(value) for value in columns[7]]
+                    yield PipelineBatch(*columns)
+            finally:
+                await result.close()
+
+    async def delete_pipeline(self, pipeline_id: int) -> Optional[Pipeline]:
+        async with async_session_scope() as session:
+            pipeline = await session.get(Pipeline, pipeline_id, options=[noload(Pipeline.scenario)])
+            if pipeline is None:
+                return None
+            await session.delete(pipeline)
+        return self._attach_scenario(pipeline, await self._scenarios())
+
+    async def create_trigger_token(self, values: dict[str, object]) -> Optional[TriggerToken]:
+        try:
+            async with async_session_scope() as session:
+                token = TriggerToken(**values)
+                session.add(token)
+                await session.flush()
+                await self._tokens_changed(session)
+        except IntegrityError:
+            return None
+        self._token_cache.clear()
+        return token
+
+    async def list_trigger_tokens(self, project_id: int) -> list[TriggerToken]:
+        async with async_read_session_scope() as session:
+            rows = await session.scalars(
+                select(TriggerToken).where(TriggerToken.project_id == project_id).order_by(TriggerToken.id)
+            )
+            return list(rows)
+
+    async def delete_trigger_token(self, project_id: int, token_id: int) -> bool:
+        async with async_session_scope() as session:
+            result = await session.execute(
+                delete(TriggerToken).where(TriggerToken.id == token_id, TriggerToken.project_id == project_id)
+            )
+            if result.rowcount:
+                await self._tokens_changed(session)
+        self._token_cache.clear()
+        return bool(result.rowcount)
+
+    async def check_trigger_token(self, project_id: int, token_hash: str) -> Optional[bool]:
+        key = (project_id, token_hash)
+        verdict = self._token_cache.get(key)
+        if verdict is not MISSING:
+            return verdict
+        # One indexed aggregate answers both questions: NULL when the project
+        # has no tokens, otherwise whether any of them has this digest.
+        matched = func.max(case((TriggerToken.token_hash == token_hash, 1), else_=0))
+        async with async_read_session_scope() as session:
+            found = await session.scalar(select(matched).where(TriggerToken.project_id == project_id))
+        verdict = None if found is None else bool(found)
+        self._token_cache.put(key, verdict)
+        return verdict
+
+    async def prune_pipelines(self, policy: RetentionPolicy, reference_time: datetime, limit: int) -> int:
+        finished = Pipeline.terminal_at <= reference_time
+        doomed: set[int] = set()
+        async with async_session_scope() as session:
+
+            async def collect(stmt: Select) -> None:
+                doomed.update(await session.scalars(stmt.limit(limit - len(doomed))))
+
+            async def newest_kept(keep: int, *where: ColumnElement[bool]) -> Optional[int]:
+                # Id of the oldest pipeline still inside the cap; everything below it is over.
+                stmt = select(Pipeline.id).where(*where).order_by(Pipeline.id.desc()).offset(keep - 1).limit(1)
+                return await session.scalar(stmt)
+
+            if policy.max_rows:
+                boundary = await newest_kept(policy.max_rows)
+                if boundary is not None:
+                    await collect(select(Pipeline.id).where(Pipeline.id < boundary, finished).order_by(Pipeline.id))
+            if policy.max_per_project and len(doomed) < limit:
+                crowded = await session.scalars(
+                    select(Pipeline.project_id).group_by(Pipeline.project_id).having(func.count() > policy.max_per_project)
+                )
+                for project_id in crowded.all():
+                    if len(doomed) >= limit:
+                        break
+                    boundary = await newest_kept(policy.max_per_project, Pipeline.project_id == project_id)
+                    await collect(
+                        select(Pipeline.id)
+                        .where(Pipeline.project_id == project_id, Pipeline.id < boundary, finished)
+                        .order_by(Pipeline.id)
+                    )
+            if policy.max_age_seconds and len(doomed) < limit:
+                cutoff = reference_time - timedelta(seconds=policy.max_age_seconds)
+                await collect(select(Pipeline.id).where(Pipeline.terminal_at <= cutoff).order_by(Pipeline.terminal_at))
+            if doomed:
+                await session.execute(delete(Pipeline).where(Pipeline.id.in_(sorted(doomed))))
+        return len(doomed)
+
+    async def compact(self) -> int:
+        engine = get_engine()
+        if engine.dialect.name != "sqlite":
+            return 0
+        return await asyncio.to_thread(_sqlite_compact, engine)
+
+    async def reset(self) -> None:
+        async with async_session_scope() as session:
+            # Unqualified, so SQLite can drop the pipelines table's pages wholesale.
+            await session.execute(delete(PipelineVariable))
+            await session.execute(delete(Pipeline))
+            await session.execute(delete(Scenario))
+            await session.execute(delete(TriggerToken))
+            await session.run_sync(seed_scenarios)
+            await self._scenarios_changed(session)
+            await self._tokens_changed(session)
+        self._scenario_cache.invalidate()
+        self._token_cache.clear()
+
+    async def snapshot(self) -> bytes:
+        engine = get_engine()
+        if engine.dialect.name != "sqlite":
+            raise NotImplementedError(f"Snapshots are not supported on {engine.dialect.name}")
+        return await asyncio.to_thread(_sqlite_snapshot, engine)
+
+    async def restore(self, snapshot: bytes) -> None:
+        engine = get_engine()
+        if engine.dialect.name != "sqlite":
+            raise NotImplementedError(f"Snapshots are not supported on {engine.dialect.name}")
+        generations = await asyncio.to_thread(_sqlite_restore, engine, snapshot)
+        self._scenario_generation = generations.get(_SCENARIO_GENERATION)
+        self._token_generation = generations.get(_TOKEN_GENERATION)
+        self._scenario_cache.invalidate()
+        self._token_cache.clear()
+
+    def _poll_generations(self) -> tuple[Optional[int], Optional[dict[str, int]]]:
+        # A connection of its own, outside the pools, so ``data_version``
+        # compares against the same connection every time.
+        if self._watcher is None:
+            self._watcher = get_engine().connect().execution_options(isolation_level="AUTOCOMMIT")
+        return _read_generations(self._watcher, self._data_version)
+
+    async def poll_external_changes(self) -> ExternalChanges:
+        data_version, generations = await asyncio.to_thread(self._poll_generations)
+        changes = ExternalChanges(pipelines=generations is not None)
+        self._data_version = data_version
+        if generations is None:
+            return changes
+        generation = generations.get(_SCENARIO_GENERATION)
+        if generation != self._scenario_generation:
+            self._scenario_generation = generation
+            self._scenario_cache.invalidate()
+            changes.scenarios = True
+        generation = generations.get(_TOKEN_GENERATION)
+        if generation != self._token_generation:
+            self._token_generation = generation
+            self._token_cache.clear()
+        return changes
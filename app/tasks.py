@@ -0,0 +1,216 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import make_url
+
+from .config import Settings
+from .events import EventHub
+from .logic import now_utc
+from .storage import RetentionPolicy, Storage
+from .tenants import current_tenant
+
+try:  # POSIX only; elsewhere every worker runs the maintenance tasks.
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+
+async def materialize_loop(storage: Storage, interval_seconds: float) -> None:
+    """Persist terminal statuses for pipelines whose deadline has passed.
+
+    Reads already compute the status on the fly; this keeps the stored column
+    close to the truth for clients that query the database directly.
+    """
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            flipped = await storage.materialize_statuses(now_utc())
+        except Exception:  # pragma: no cover - keep the loop alive
+            logger.exception("Status materialization failed")
+            continue
+        if flipped:
+            logger.debug("Materialized %d pipeline statuses", flipped)
+
+
+def start_materializer(storage: Storage, interval_seconds: float) -> Optional[asyncio.Task[None]]:
+    if interval_seconds <= 0:
+        return None
+    return asyncio.create_task(materialize_loop(storage, interval_seconds))
+
+
+@dataclass(slots=True)
+class RetentionMetrics:
+    """Running totals of retention passes since the process started."""
+
+    runs: int = 0
+    pipelines_deleted: int = 0
+    bytes_reclaimed: int = 0
+    last_run_at: Optional[datetime] = None
+    last_run_seconds: float = 0.0
+
+
+class Retention:
+    """Deletes finished pipelines beyond a :class:`RetentionPolicy` and compacts storage.
+
+    Deletion happens in batches of ``batch_size`` rows, each in its own
+    transaction, yielding to the event loop in between so requests keep
+    flowing while a large backlog drains.
+    """
+
+    def __init__(self, storage: Storage, policy: RetentionPolicy, batch_size: int) -> None:
+        self.storage = storage
+        self.policy = policy
+        self.batch_size = max(batch_size, 1)
+        self.metrics = RetentionMetrics()
+        self._compaction: Optional[asyncio.Task[None]] = None
+        self._compact_again = False
+
+    async def run_once(self, reference_time: datetime | None = None) -> int:
+        """Apply the policy once, then compact; return the number of pipelines deleted."""
+        started = time.perf_counter()
+        reference_time = reference_time or now_utc()
+        deleted = 0
+        if self.policy.enabled:
+            while True:
+                pruned = await self.storage.prune_pipelines(self.policy, reference_time, self.batch_size)
+                deleted += pruned
+                if pruned < self.batch_size:
+                    break
+                await asyncio.sleep(0)
+        await self.compact()
+        self.metrics.runs += 1
+        self.metrics.pipelines_deleted += deleted
+        self.metrics.last_run_at = reference_time
+        self.metrics.last_run_seconds = time.perf_counter() - started
+        return deleted
+
+    async def compact(self) -> int:
+        reclaimed = await self.storage.compact()
+        self.metrics.bytes_reclaimed += reclaimed
+        return reclaimed
+
+    def compact_soon(self) -> None:
+        """Compact in a background task rather than in the caller's request.
+
+        A call made while a pass is running queues one more pass, so pages
+        freed after that pass started are still returned.
+        """
+        if self._compaction is not None and not self._compaction.done():
+            self._compact_again = True
+            return
+        self._compaction = asyncio.create_task(self._compact_pending())
+
+    async def _compact_pending(self) -> None:
+        self._compact_again = True
+        while self._compact_again:
+            self._compact_again = False
+            try:
+                await self.compact()
+            except Exception:  # pragma: no cover - nobody awaits the task
+                logger.exception("Compaction failed")
+
+    async def close(self) -> None:
+        """Wait for a background compaction still in progress."""
+        if self._compaction is not None:
+            await self._compaction
+
+
+async def retention_loop(retention: Retention, interval_seconds: float) -> None:
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            deleted = await retention.run_once()
+        except Exception:  # pragma: no cover - keep the loop alive
+            logger.exception("Retention pass failed")
+            continue
+        if deleted:
+            logger.info("Retention deleted %d pipelines", deleted)
+
+
+def start_retention(retention: Retention, interval_seconds: float) -> Optional[asyncio.Task[None]]:
+    if interval_seconds <= 0 or not retention.policy.enabled:
+        return None
+    return asyncio.create_task(retention_loop(retention, interval_seconds))
+
+
+async def coherence_loop(storage: Storage, hub: EventHub, interval_seconds: float) -> None:
+    """Pick up writes made by the other worker processes sharing the database."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            changes = await storage.poll_external_changes()
+            if changes.scenarios:
+                hub.scenarios_changed()
+            if changes.pipelines:
+                await hub.catch_up()
+        except Exception:  # pragma: no cover - keep the loop alive
+            logger.exception("Polling for external changes failed")
+
+
+def start_coherence(storage: Storage, hub: EventHub, settings: Settings) -> Optional[asyncio.Task[None]]:
+    if settings.workers <= 1:
+        return None
+    return asyncio.create_task(coherence_loop(storage, hub, settings.coherence_interval_ms / 1000))
+
+
+# Open descriptor of the maintenance lock; held, and so owned, until the process exits.
+_maintenance_lock: int | None = None
+
+
+def claim_maintenance(settings: Settings) -> bool:
+    """Whether this process should run the materializer and retention tasks.
+
+    With several workers on one SQLite file, only the worker holding an
+    exclusive lock on ``<database>.maintenance.lock`` runs them, so they
+    never contend with themselves for the write lock. The lock is released
+    when that worker exits; workers only try once, at startup.
+    """
+    global _maintenance_lock
+    if settings.workers <= 1 or fcntl is None:
+        return True
+    if _maintenance_lock is not None:
+        return True
+    url = make_url(settings.database_url)
+    if url.get_backend_name() != "sqlite" or url.database in (None, "", ":memory:"):
+        return True
+    descriptor = os.open(f"{url.database}.maintenance.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(descriptor, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        os.close(descriptor)
+        return False
+    _maintenance_lock = descriptor
+    return True
+
+
+_retention: Retention | None = None
+
+
+def init_retention(storage: Storage, settings: Settings) -> Retention:
+    global _retention
+    policy = RetentionPolicy(
+        max_age_seconds=settings.retention_max_age_seconds,
+        max_per_project=settings.retention_max_per_project,
+        max_rows=settings.retention_max_rows,
+    )
+    _retention = Retention(storage, policy, settings.retention_batch_size)
+    return _retention
+
+
+def get_retention() -> Retention:
+    """Retention of the current namespace, or of the configured backend outside one."""
+    tenant = current_tenant()
+    if tenant is not None:
+        return tenant.retention
+    if _retention is None:
+        raise RuntimeError("Retention has not been initialised. Call init_retention() first.")
+    return _retention
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import TYPE_CHECKING, Callable, Optional
+
+from starlette.datastructures import Headers
+
+if TYPE_CHECKING:
+    from .clock import Clock
+    from .events import EventHub
+    from .storage import Storage
+    from .tasks import Retention
+
+HEADER = "x-mock-namespace"
+PATH_PREFIX = "/ns/"
+# Also keeps names safe inside ``root_path``, which routing treats as a regex.
+_NAME = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+class Tenant:
+    """An isolated mock: its own storage, id sequence, event hub, clock and retention."""
+
+    __slots__ = ("name", "storage", "hub", "clock", "retention")
+
+    def __init__(self, name: str, storage: Storage, hub: EventHub, clock: Clock, retention: Retention) -> None:
+        self.name = name
+        self.storage = storage
+        self.hub = hub
+        self.clock = clock
+        self.retention = retention
+
+
+# Tenant of the request being served; ``None`` is the default, unnamespaced mock.
+# Tasks started while serving a request inherit it.
+_current_tenant: ContextVar[Optional[Tenant]] = ContextVar("mock_tenant", default=None)
+
+
+def current_tenant() -> Optional[Tenant]:
+    return _current_tenant.get()
+
+
+class TenantRegistry:
+    """Tenants by name, created on first use and evicted least-recently-used first.
+
+    Lookups and creation are O(1); ``factory`` must be as well. It only
+    runs on the event loop thread, so no locking is needed. An evicted
+    tenant's event streams are closed, and its data is gone: the next request
+    naming it starts from a fresh tenant.
+    """
+
+    def __init__(self, factory: Callable[[str], Tenant], capacity: int) -> None:
+        self.factory = factory
+        self.capacity = max(capacity, 1)
+        self.evictions = 0
+        self._tenants: OrderedDict[str, Tenant] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._tenants)
+
+    def get(self, name: str) -> Tenant:
+        tenant = self._tenants.get(name)
+        if tenant is not None:
+            self._tenants.move_to_end(name)
+            return tenant
+        tenant = self._tenants[name] = self.factory(name)
+        while len(self._tenants) > self.capacity:
+            _, evicted = self._tenants.popitem(last=False)
+            self.evictions += 1
+            asyncio.get_running_loop().create_task(evicted.hub.close())
+        return tenant
+
+    async def close(self) -> None:
+        for tenant in self._tenants.values():
+            await tenant.hub.close()
+        self._tenants.clear()
+
+
+class TenantMiddleware:
+    """ASGI middleware selecting the tenant from ``X-Mock-Namespace`` or a ``/ns/{name}`` prefix.
+
+    The prefix is moved into ``root_path``, so routes match as usual and
+    ``web_url``s point back into the namespace.
+    """
+
+    def __init__(self, app, registry: TenantRegistry, enabled: bool = True) -> None:
+        self.app = app
+        self.registry = registry
+        self.enabled = enabled
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        root_path = scope.get("root_path", "")
+        route_path = scope["path"][len(root_path):] if scope["path"].startswith(root_path) else scope["path"]
+        if route_path.startswith(PATH_PREFIX):
+            name, _, _ = route_path[len(PATH_PREFIX):].partition("/")
+            # Set in place: outer middleware reads the matched ``route`` from this dict.
+            scope["root_path"] = f"{root_path}{PATH_PREFIX}{name}"
+        else:
+            name = Headers(scope=scope).get(HEADER)
+        if name is None:
+            await self.app(scope, receive, send)
+            return
+        if not _NAME.fullmatch(name):
+            await _reject(send, 400, "Namespace names are 1-64 letters, digits, '-' or '_'")
+            return
+        if not self.enabled:
+            await _reject(send, 409, "Namespaces are kept in process memory; run a single worker to use them")
+            return
+        token = _current_tenant.set(self.registry.get(name))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _current_tenant.reset(token)
+
+
+async def _reject(send, status_code: int, detail: str) -> None:
+    body = json.dumps({"detail": detail}).encode("utf-8")
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode("latin-1"))],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
+
+
+_registry: TenantRegistry | None = None
+
+
+def init_tenants(factory: Callable[[str], Tenant], capacity: int) -> TenantRegistry:
+    global _registry
+    _registry = TenantRegistry(factory, capacity)
+    return _registry
+
+
+def get_tenants() -> TenantRegistry:
+    if _registry is None:
+        raise RuntimeError("Tenants have not been initialised. Call init_tenants() first.")
+    return _registry
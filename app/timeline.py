@@ -0,0 +1,137 @@
+from __future__ import annotations
+
+import json
+from bisect import bisect_right
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Optional
+
+JOB_FINAL_STATUSES = frozenset({"success", "failed", "canceled", "skipped"})
+# Pipeline statuses that can still change.
+IN_FLIGHT_STATUSES = frozenset({"created", "pending", "running"})
+# Synthetic job ids are ``pipeline_id * JOB_ID_STRIDE + position``.
+JOB_ID_STRIDE = 1000
+MAX_JOBS = JOB_ID_STRIDE - 1
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledJob:
+    name: str
+    stage: str
+    allow_failure: bool
+    offsets: tuple[float, ...]
+    states: tuple[str, ...]
+    # Seconds after pipeline creation; ``None`` when the job never gets there.
+    queued: Optional[float]
+    started: Optional[float]
+    finished: Optional[float]
+
+    def status_at(self, elapsed: float) -> str:
+        return _state_at(self.offsets, self.states, elapsed)
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledTimeline:
+    """Pipeline and job states of a scenario as sorted transition arrays.
+
+    ``offsets[i]`` is the elapsed second at which ``states[i]`` begins, so the
+    state at any instant is one ``bisect`` away.
+    """
+
+    offsets: tuple[float, ...]
+    states: tuple[str, ...]
+    jobs: tuple[CompiledJob, ...]
+
+    @property
+    def duration(self) -> float:
+        return self.offsets[-1]
+
+    @property
+    def terminal_status(self) -> str:
+        return self.states[-1]
+
+    def status_at(self, elapsed: float) -> str:
+        return _state_at(self.offsets, self.states, elapsed)
+
+
+def _state_at(offsets: tuple[float, ...], states: tuple[str, ...], elapsed: float) -> str:
+    return states[max(bisect_right(offsets, elapsed) - 1, 0)]
+
+
+def _transitions(points: list[tuple[float, str]]) -> tuple[tuple[float, ...], tuple[str, ...]]:
+    # A later point at the same offset wins; repeated states are merged.
+    merged: dict[float, str] = {}
+    for offset, state in sorted(points, key=lambda point: point[0]):
+        merged[offset] = state
+    offsets: list[float] = []
+    states: list[str] = []
+    for offset, state in merged.items():
+        if states and states[-1] == state:
+            continue
+        offsets.append(offset)
+        states.append(state)
+    return tuple(offsets), tuple(states)
+
+
+def _aggregate(statuses: list[str], allow_failure: list[bool]) -> str:
+    if all(status in JOB_FINAL_STATUSES for status in statuses):
+        if any(status == "failed" and not allowed for status, allowed in zip(statuses, allow_failure)):
+            return "failed"
+        if "canceled" in statuses:
+            return "canceled"
+        return "success"
+    if "running" in statuses:
+        return "running"
+    if "pending" in statuses:
+        return "pending"
+    if all(status == "created" for status in statuses):
+        return "created"
+    return "running"
+
+
+def _compile(timeline: dict[str, Any]) -> CompiledTimeline:
+    stage_start = float(timeline.get("created_seconds") or 0)
+    halted: Optional[str] = None
+    jobs: list[CompiledJob] = []
+    for stage in timeline["stages"]:
+        stage_end = stage_start
+        halt_next: Optional[str] = None
+        for job in stage["jobs"]:
+            allow_failure = bool(job.get("allow_failure", False))
+            points = [(0.0, "created")]
+            queued = started = finished = None
+            if halted is not None:
+                # An earlier stage failed or was canceled; later jobs never run.
+                points.append((stage_start, "skipped" if halted == "failed" else "canceled"))
+            elif job.get("status", "success") == "skipped":
+                points.append((stage_start, "skipped"))
+            else:
+                status = job.get("status", "success")
+                queued = stage_start
+                started = stage_start + float(job.get("queued_seconds") or 0)
+                finished = started + float(job.get("duration_seconds") or 0)
+                points += [(stage_start, "pending"), (started, "running"), (finished, status)]
+                stage_end = max(stage_end, finished)
+                if status == "canceled" or (status == "failed" and not allow_failure):
+                    halt_next = halt_next if halt_next == "failed" else status
+            offsets, states = _transitions(points)
+            jobs.append(CompiledJob(job["name"], stage["name"], allow_failure, offsets, states, queued, started, finished))
+        if halted is None:
+            halted = halt_next
+            stage_start = stage_end
+
+    boundaries = sorted({offset for job in jobs for offset in job.offsets})
+    allow_failure = [job.allow_failure for job in jobs]
+    points = [(offset, _aggregate([job.status_at(offset) for job in jobs], allow_failure)) for offset in boundaries]
+    offsets, states = _transitions(points)
+    return CompiledTimeline(offsets, states, tuple(jobs))
+
+
+@lru_cache(maxsize=1024)
+def compile_timeline(raw: str) -> CompiledTimeline:
+    """Compile a scenario's ``timeline_json``; cached per distinct document."""
+    return _compile(json.loads(raw))
+
+
+def load_timeline(raw: Optional[str]) -> Optional[dict[str, Any]]:
+    return json.loads(raw) if raw else None
@@ -0,0 +1,131 @@
+"""Poll latency with many concurrent clients: sync threadpool handler vs async handler.
+
+The async numbers come from the real ``GET /projects/{id}/pipelines/{pid}``
+route. The sync numbers come from an equivalent handler registered by this
+script that uses the synchronous ``Session`` from ``get_db``, which is how the
+route worked before the async storage layer; FastAPI runs it on the
+threadpool.
+
+    python -m benchmarks.poll_concurrency --pollers 1000 --rounds 3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+
+import httpx
+from fastapi import Depends, FastAPI, HTTPException, Request
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload
+
+AUTH_HEADERS = {"PRIVATE-TOKEN": "BENCH_TOKEN"}
+
+
+def _percentile(samples: list[float], pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarise(samples: list[float], elapsed: float) -> dict[str, float]:
+    return {
+        "requests": len(samples),
+        "throughput_rps": round(len(samples) / elapsed, 1) if elapsed else 0.0,
+        "p50_ms": round(_percentile(samples, 50) * 1000, 3),
+        "p95_ms": round(_percentile(samples, 95) * 1000, 3),
+        "p99_ms": round(_percentile(samples, 99) * 1000, 3),
+    }
+
+
+def _register_sync_baseline(app: FastAPI) -> None:
+    from app.auth import get_bearer_token
+    from app.config import get_settings
+    from app.database import get_db
+    from app.logic import pipeline_to_dict, update_pipeline_status
+    from app.models import Pipeline
+    from app.schemas import Pipeline as PipelineSchema
+
+    def sync_get_pipeline(project_id: int, pipeline_id: int, request: Request, db: Session = Depends(get_db)):
+        provided = request.headers.get("PRIVATE-TOKEN") or get_bearer_token(request.headers.get("Authorization"))
+        if provided != get_settings().mock_token:
+            raise HTTPException(status_code=401)
+        stmt = (
+            select(Pipeline)
+            .options(joinedload(Pipeline.scenario))
+            .where(Pipeline.id == pipeline_id, Pipeline.project_id == project_id)
+        )
+        pipeline = db.execute(stmt).scalar_one_or_none()
+        if pipeline is None:
+            raise HTTPException(status_code=404)
+        if update_pipeline_status(pipeline):
+            db.commit()
+        return PipelineSchema.model_validate(pipeline_to_dict(pipeline, base_url=str(request.base_url).rstrip("/")))
+
+    app.add_api_route("/_bench/sync/projects/{project_id}/pipelines/{pipeline_id}", sync_get_pipeline)
+
+
+async def _poll(client: httpx.AsyncClient, paths: list[str], rounds: int, pollers: int) -> dict[str, float]:
+    samples: list[float] = []
+
+    async def poller(path: str) -> None:
+        for _ in range(rounds):
+            started = time.perf_counter()
+            response = await client.get(path, headers=AUTH_HEADERS)
+            samples.append(time.perf_counter() - started)
+            response.raise_for_status()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(poller(paths[i % len(paths)]) for i in range(pollers)))
+    return summarise(samples, time.perf_counter() - started)
+
+
+async def run(pollers: int, rounds: int, pipelines: int, database_url: str | None) -> dict[str, object]:
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = database_url or f"sqlite:///{tmp}/bench.db"
+        os.environ["MOCK_TOKEN"] = AUTH_HEADERS["PRIVATE-TOKEN"]
+
+        from app.config import get_settings
+
+        get_settings.cache_clear()
+
+        from app.main import create_app
+        from app.storage import get_storage
+
+        app = create_app()
+        _register_sync_baseline(app)
+        await get_storage().seed_scenarios()
+
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            created = await client.post(
+                "/_mock/pipelines:batch",
+                json=[{"project_id": 1, "token": "T", "ref": "main", "scenario_id": 0} for _ in range(pipelines)],
+                headers=AUTH_HEADERS,
+            )
+            created.raise_for_status()
+            ids = [item["pipeline"]["id"] for item in created.json()]
+
+            results: dict[str, object] = {"pollers": pollers, "rounds": rounds, "database_url": os.environ["DATABASE_URL"]}
+            if not os.environ["DATABASE_URL"].startswith("memory:"):
+                results["sync"] = await _poll(client, [f"/_bench/sync/projects/1/pipelines/{pid}" for pid in ids], rounds, pollers)
+            results["async"] = await _poll(client, [f"/projects/1/pipelines/{pid}" for pid in ids], rounds, pollers)
+        return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pollers", type=int, default=1000, help="concurrent polling clients")
+    parser.add_argument("--rounds", type=int, default=3, help="sequential polls per client")
+    parser.add_argument("--pipelines", type=int, default=100, help="distinct pipelines polled")
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args.pollers, args.rounds, args.pipelines, args.database_url)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+"""Cold-start time: from process spawn to the first request served.
+
+Each run starts a fresh interpreter. With ``--target asgi`` the child times
+its own phases (import, ``create_app``, lifespan start-up, first request
+through ``httpx.ASGITransport``); with ``--target uvicorn`` the parent polls a
+``uvicorn --factory app.main:create_app`` subprocess until it answers. Runs
+alternate between a new database file (``fresh``: schema creation and
+seeding) and the one a previous run left behind (``existing``: stamped
+schema, nothing to seed). Medians are reported in milliseconds.
+
+    python -m benchmarks.startup --runs 10
+    python -m benchmarks.startup --target uvicorn --output startup.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+# Only the standard library and httpx are imported up front: the sibling
+# benchmark modules import FastAPI, which would hide it from the child's
+# ``import`` phase.
+
+# First request of every run: authenticated and answered from the database.
+FIRST_REQUEST = "/_mock/scenarios"
+PHASES = ("import", "create_app", "startup", "first_request")
+
+
+def _child() -> None:
+    """Time each phase in this process and print them, with the monotonic instant the request was served."""
+    import asyncio
+
+    headers = {"PRIVATE-TOKEN": os.environ["MOCK_TOKEN"]}
+    marks = [time.monotonic()]
+    from app.main import create_app
+
+    marks.append(time.monotonic())
+    app = create_app()
+    marks.append(time.monotonic())
+
+    async def serve() -> None:
+        async with app.router.lifespan_context(app):
+            marks.append(time.monotonic())
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                (await client.get(FIRST_REQUEST, headers=headers)).raise_for_status()
+            marks.append(time.monotonic())
+
+    asyncio.run(serve())
+    phases = {name: (end - start) * 1000 for name, start, end in zip(PHASES, marks, marks[1:])}
+    print(json.dumps({"served_at": marks[-1], "phases_ms": phases}))
+
+
+def _run_asgi(database_url: str) -> dict[str, float]:
+    from .suite import _environment
+
+    spawned = time.monotonic()
+    child = subprocess.run(
+        [sys.executable, "-m", "benchmarks.startup", "--child"],
+        env=_environment(database_url),
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    report = json.loads(child.stdout.strip().splitlines()[-1])
+    # CLOCK_MONOTONIC is system-wide, so the child's instants compare with ours.
+    return {"total": (report["served_at"] - spawned) * 1000, **report["phases_ms"]}
+
+
+def _run_uvicorn(database_url: str) -> dict[str, float]:
+    from .suite import AUTH_HEADERS, _environment, _free_port
+
+    port = _free_port()
+    spawned = time.monotonic()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "--factory", "app.main:create_app", "--port", str(port), "--log-level", "warning"],
+        env=_environment(database_url),
+    )
+    try:
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}") as client:
+            while True:
+                try:
+                    client.get(FIRST_REQUEST, headers=AUTH_HEADERS).raise_for_status()
+                    return {"total": (time.monotonic() - spawned) * 1000}
+                except httpx.TransportError:
+                    if server.poll() is not None or time.monotonic() - spawned > 30:
+                        raise RuntimeError("uvicorn did not start") from None
+                    time.sleep(0.002)
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def _median(samples: list[dict[str, float]]) -> dict[str, float]:
+    return {name: round(statistics.median(sample[name] for sample in samples), 1) for name in samples[0]}
+
+
+def run(args: argparse.Namespace) -> dict[str, object]:
+    from .suite import _commit
+
+    measure = _run_asgi if args.target == "asgi" else _run_uvicorn
+    fresh: list[dict[str, float]] = []
+    existing: list[dict[str, float]] = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for index in range(args.runs):
+            database_url = f"sqlite:///{tmp}/startup-{index}.db"
+            fresh.append(measure(database_url))
+            existing.append(measure(database_url))
+    return {
+        "meta": {"commit": _commit(), "target": args.target, "python": platform.python_version(), "runs": args.runs},
+        "fresh": _median(fresh),
+        "existing": _median(existing),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", choices=("asgi", "uvicorn"), default="asgi")
+    parser.add_argument("--runs", type=int, default=5, help="starts measured per database state")
+    parser.add_argument("--output", help="also write the results to this file")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        _child()
+        return
+
+    rendered = json.dumps(run(args), indent=2)
+    print(rendered)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(rendered + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""Scripted workloads against the trigger, poll, scenario and listing hot paths.
+
+Each workload reports throughput and p50/p95/p99 latency. The app is driven
+either in-process through ``httpx.ASGITransport`` (``--target asgi``) or over
+HTTP against a ``uvicorn`` subprocess (``--target uvicorn``, with
+``--workers N`` going through ``app.launcher``). Results are
+JSON and carry the commit they were measured on; ``--compare`` reports the
+change against an earlier result file and exits non-zero on regressions.
+
+    python -m benchmarks.suite --target asgi --output bench.json
+    python -m benchmarks.suite --target uvicorn --compare bench.json
+    python -m benchmarks.suite --target uvicorn --workers 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Awaitable, Callable
+
+import httpx
+
+from .poll_concurrency import AUTH_HEADERS, summarise
+
+WORKLOADS = ("trigger_storm", "poll_steady", "scenario_crud", "pipeline_listing", "pipeline_import", "pipeline_export")
+# Metrics compared by ``--compare``; latency regresses upwards, throughput downwards.
+COMPARED = {"p50_ms": 1, "p95_ms": 1, "p99_ms": 1, "throughput_rps": -1}
+# Run settings that must match for ``--compare`` to flag regressions.
+_COMPARABLE_META = ("target", "workers", "database_url", "concurrency", "rounds", "listing_rows")
+_SEED_CHUNK = 1000
+# Request body pieces of the import workloads, as a streaming client would send them.
+_UPLOAD_CHUNK = 64 * 1024
+
+Timed = Callable[[], Awaitable[httpx.Response]]
+
+
+async def _timed(samples: list[float], call: Timed) -> httpx.Response:
+    started = time.perf_counter()
+    response = await call()
+    samples.append(time.perf_counter() - started)
+    response.raise_for_status()
+    return response
+
+
+async def _fan_out(workers: int, rounds: int, step: Callable[[int, int, list[float]], Awaitable[None]]) -> dict[str, float]:
+    """Run ``step(worker, round, samples)`` for ``rounds`` rounds in each of ``workers`` tasks."""
+    samples: list[float] = []
+
+    async def worker(index: int) -> None:
+        for round_ in range(rounds):
+            await step(index, round_, samples)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(index) for index in range(workers)))
+    return summarise(samples, time.perf_counter() - started)
+
+
+async def _seed(client: httpx.AsyncClient, count: int, project_id: int, **fields: object) -> list[int]:
+    ids: list[int] = []
+    for offset in range(0, count, _SEED_CHUNK):
+        payload = [
+            {"project_id": project_id, "token": "T", "ref": "main", **fields}
+            for _ in range(min(_SEED_CHUNK, count - offset))
+        ]
+        response = await client.post("/_mock/pipelines:batch", json=payload, headers=AUTH_HEADERS, timeout=None)
+        response.raise_for_status()
+        ids += [item["pipeline"]["id"] for item in response.json()]
+    return ids
+
+
+async def trigger_storm(client: httpx.AsyncClient, workers: int, rounds: int) -> dict[str, float]:
+    """Concurrent ``POST /projects/{id}/trigger/pipeline`` calls with variables."""
+
+    async def step(worker: int, round_: int, samples: list[float]) -> None:
+        body = {"token": "T", "ref": "main", "scenario_id": 5, "variables": {"WORKER": str(worker), "ROUND": str(round_)}}
+        await _timed(samples, lambda: client.post(f"/projects/{100 + worker % 10}/trigger/pipeline", json=body, headers=AUTH_HEADERS))
+
+    return await _fan_out(workers, rounds, step)
+
+
+async def poll_steady(client: httpx.AsyncClient, workers: int, rounds: int) -> dict[str, float]:
+    """Each poller repeatedly reads one of a fixed set of pipelines."""
+    ids = await _seed(client, min(workers, 100), 200, scenario_id=0)
+
+    async def step(worker: int, round_: int, samples: list[float]) -> None:
+        path = f"/projects/200/pipelines/{ids[worker % len(ids)]}"
+        await _timed(samples, lambda: client.get(path, headers=AUTH_HEADERS))
+
+    return await _fan_out(workers, rounds, step)
+
+
+async def scenario_crud(client: httpx.AsyncClient, workers: int, rounds: int) -> dict[str, float]:
+    """Create, read, update and delete a private scenario per worker and round."""
+
+    async def step(worker: int, round_: int, samples: list[float]) -> None:
+        scenario_id = 10_000 + worker * rounds + round_
+        body = {"scenario_id": scenario_id, "name": "bench", "terminal_after_seconds": 30, "terminal_status": "success"}
+        path = f"/_mock/scenarios/{scenario_id}"
+        await _timed(samples, lambda: client.post("/_mock/scenarios", json=body, headers=AUTH_HEADERS))
+        await _timed(samples, lambda: client.get("/_mock/scenarios", headers=AUTH_HEADERS))
+        await _timed(samples, lambda: client.put(path, json={**body, "terminal_status": "failed"}, headers=AUTH_HEADERS))
+        await _timed(samples, lambda: client.delete(path, headers=AUTH_HEADERS))
+
+    return await _fan_out(workers, rounds, step)
+
+
+async def pipeline_listing(client: httpx.AsyncClient, rows: int, rounds: int) -> dict[str, float]:
+    """Full ``GET /_mock/pipelines`` listings of a ``rows``-pipeline project."""
+    await _seed(client, rows, 300, terminal_after_seconds=60)
+
+    async def step(worker: int, round_: int, samples: list[float]) -> None:
+        await _timed(
+            samples, lambda: client.get("/_mock/pipelines", params={"project_id": 300}, headers=AUTH_HEADERS, timeout=None)
+        )
+
+    return _per_row(await _fan_out(1, rounds, step), rows)
+
+
+def _per_row(summary: dict[str, float], rows: int) -> dict[str, float]:
+    summary["rows"] = rows
+    summary["rows_per_second"] = round(rows * summary["throughput_rps"], 1)
+    return summary
+
+
+async def _import(client: httpx.AsyncClient, rows: int, project_id: int) -> httpx.Response:
+    line = {"project_id": project_id, "ref": "main", "variables": {"K": "v"}, "terminal_after_seconds": 60, "created_at": "2024-01-01T00:00:00Z"}
+    body = ((json.dumps(line) + "\n") * rows).encode("utf-8")
+
+    async def pieces() -> AsyncIterator[bytes]:
+        for offset in range(0, len(body), _UPLOAD_CHUNK):
+            yield body[offset : offset + _UPLOAD_CHUNK]
+
+    return await client.post("/_mock/pipelines/import", content=pieces(), headers=AUTH_HEADERS, timeout=None)
+
+
+async def pipeline_import(client: httpx.AsyncClient, rows: int, rounds: int) -> dict[str, float]:
+    """``POST /_mock/pipelines/import`` of ``rows`` NDJSON lines, streamed in 64 KiB pieces."""
+
+    async def step(worker: int, round_: int, samples: list[float]) -> None:
+        await _timed(samples, lambda: _import(client, rows, 400))
+
+    return _per_row(await _fan_out(1, rounds, step), rows)
+
+
+async def pipeline_export(client: httpx.AsyncClient, rows: int, rounds: int) -> dict[str, float]:
+    """Full ``GET /_mock/pipelines/export`` dumps of a ``rows``-pipeline project."""
+    (await _import(client, rows, 500)).raise_for_status()
+
+    async def step(worker: int, round_: int, samples: list[float]) -> None:
+        await _timed(
+            samples, lambda: client.get("/_mock/pipelines/export", params={"project_id": 500}, headers=AUTH_HEADERS, timeout=None)
+        )
+
+    return _per_row(await _fan_out(1, rounds, step), rows)
+
+
+_BULK = {"pipeline_listing": pipeline_listing, "pipeline_import": pipeline_import, "pipeline_export": pipeline_export}
+_CONCURRENT = {"trigger_storm": trigger_storm, "poll_steady": poll_steady, "scenario_crud": scenario_crud}
+
+
+def _environment(database_url: str) -> dict[str, str]:
+    return {**os.environ, "DATABASE_URL": database_url, "MOCK_TOKEN": AUTH_HEADERS["PRIVATE-TOKEN"]}
+
+
+@asynccontextmanager
+async def asgi_client(database_url: str, concurrency: int, workers: int) -> AsyncIterator[httpx.AsyncClient]:
+    os.environ.update(_environment(database_url))
+
+    from app.config import get_settings
+
+    get_settings.cache_clear()
+
+    from app.main import create_app
+
+    app = create_app()
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            yield client
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@asynccontextmanager
+async def uvicorn_client(database_url: str, concurrency: int, workers: int) -> AsyncIterator[httpx.AsyncClient]:
+    port = _free_port()
+    command = ["uvicorn", "app.main:app"] if workers <= 1 else ["app.launcher", "--workers", str(workers)]
+    server = subprocess.Popen(
+        [sys.executable, "-m", *command, "--port", str(port), "--log-level", "warning", "--no-access-log"],
+        env=_environment(database_url),
+    )
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    try:
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits, timeout=60) as client:
+            deadline = time.monotonic() + 30
+            while True:
+                try:
+                    (await client.get("/openapi.json")).raise_for_status()
+                    break
+                except httpx.TransportError:
+                    if server.poll() is not None or time.monotonic() > deadline:
+                        raise RuntimeError("uvicorn did not start") from None
+                    await asyncio.sleep(0.1)
+            yield client
+    finally:
+        server.terminate()
+        server.wait(timeout=10)
+
+
+def _commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace) -> dict[str, object]:
+    with tempfile.TemporaryDirectory() as tmp:
+        database_url = args.database_url or f"sqlite:///{tmp}/bench.db"
+        connect = asgi_client if args.target == "asgi" else uvicorn_client
+        results: dict[str, object] = {
+            "meta": {
+                "commit": _commit(),
+                "target": args.target,
+                "workers": args.workers,
+                "database_url": args.database_url or "sqlite (temporary file)",
+                "python": platform.python_version(),
+                "concurrency": args.concurrency,
+                "rounds": args.rounds,
+                "listing_rows": args.listing_rows,
+            },
+            "workloads": {},
+        }
+        async with connect(database_url, args.concurrency, args.workers) as client:
+            for name in args.workloads:
+                if name in _BULK:
+                    summary = await _BULK[name](client, args.listing_rows, args.listing_rounds)
+                else:
+                    summary = await _CONCURRENT[name](client, args.concurrency, args.rounds)
+                results["workloads"][name] = summary
+        return results
+
+
+def compare(current: dict[str, object], baseline: dict[str, object], tolerance: float) -> tuple[dict[str, object], bool]:
+    """Relative change of each compared metric; ``True`` when any exceeds ``tolerance``."""
+    report: dict[str, object] = {}
+    regressed = False
+    for name, summary in current["workloads"].items():
+        before = baseline.get("workloads", {}).get(name)
+        if not before:
+            continue
+        changes = {}
+        for metric, direction in COMPARED.items():
+            if before.get(metric):
+                change = (summary[metric] - before[metric]) / before[metric]
+                changes[metric] = round(change, 3)
+                regressed |= change * direction > tolerance
+        report[name] = changes
+    return report, regressed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--target", choices=("asgi", "uvicorn"), default="asgi")
+    parser.add_argument("--workers", type=int, default=1, help="server processes (uvicorn target only)")
+    parser.add_argument("--workloads", nargs="+", choices=WORKLOADS, default=list(WORKLOADS))
+    parser.add_argument("--concurrency", type=int, default=50, help="concurrent clients per workload")
+    parser.add_argument("--rounds", type=int, default=20, help="sequential operations per client")
+    parser.add_argument("--listing-rows", type=int, default=20_000, help="pipelines listed, imported or exported per request")
+    parser.add_argument("--listing-rounds", type=int, default=3, help="full listings, imports or exports to time")
+    parser.add_argument("--database-url", default=None, help="defaults to a temporary SQLite file")
+    parser.add_argument("--output", help="also write the results to this file")
+    parser.add_argument("--compare", metavar="BASELINE", help="result file of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="relative change counted as a regression")
+    args = parser.parse_args()
+    if args.workers > 1 and args.target != "uvicorn":
+        parser.error("--workers needs --target uvicorn")
+
+    results = asyncio.run(run(args))
+    regressed = False
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as handle:
+            baseline = json.load(handle)
+        changes, regressed = compare(results, baseline, args.tolerance)
+        mismatched = [key for key in _COMPARABLE_META if baseline.get("meta", {}).get(key) != results["meta"][key]]
+        if mismatched:
+            # Different settings measure different things; report, but don't fail.
+            print(f"warning: baseline differs in {', '.join(mismatched)}", file=sys.stderr)
+            regressed = False
+        results["comparison"] = {
+            "baseline_commit": baseline.get("meta", {}).get("commit"),
+            "mismatched": mismatched,
+            "changes": changes,
+        }
+    rendered = json.dumps(results, indent=2)
+    print(rendered)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            handle.write(rendered + "\n")
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == "__main__":
+    main()
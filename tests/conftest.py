@@ -1,10 +1,13 @@
 from __future__ import annotations
 
-from collections.abc import Generator
+from collections.abc import Callable, Generator
 
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 
+AUTH_HEADERS = {"PRIVATE-TOKEN": "TEST_TOKEN"}
+
 
 @pytest.fixture()
 def client(tmp_path, monkeypatch) -> Generator[TestClient, None, None]:
@@ -23,6 +26,42 @@ def client(tmp_path, monkeypatch) -> Generator[TestClient, None, None]:
         yield test_client
 
 
+@pytest.fixture()
+def memory_client(monkeypatch) -> Generator[TestClient, None, None]:
+    monkeypatch.setenv("DATABASE_URL", "memory://")
+    monkeypatch.setenv("MOCK_TOKEN", "TEST_TOKEN")
+
+    from app.config import get_settings
+
+    get_settings.cache_clear()
+
+    from app.main import create_app
+
+    app = create_app()
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture()
+def trigger() -> Callable[..., httpx.Response]:
+    """``trigger(client, project_id, headers=AUTH_HEADERS, **fields)`` posts a pipeline trigger.
+
+    ``fields`` add to or override the token and ref; ``headers=None`` sends none.
+    """
+
+    def post(client: TestClient, project_id: int, headers: dict[str, str] | None = AUTH_HEADERS, **fields) -> httpx.Response:
+        body = {"token": "T", "ref": "main", **fields}
+        return client.post(f"/projects/{project_id}/trigger/pipeline", json=body, headers=headers)
+
+    return post
+
+
+@pytest.fixture(params=["client", "memory_client"], ids=["sql", "memory"])
+def any_client(request) -> TestClient:
+    """The app on the SQLite backend, then on ``memory://``."""
+    return request.getfixturevalue(request.param)
+
+
 @pytest.fixture()
 def db_session(client) -> Generator:  # type: ignore[override]
     from app.database import get_session_factory
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import asyncio
+from datetime import timedelta
+
+import pytest
+
+from app.clock import Clock, get_clock, init_clock
+
+AUTH_HEADERS = {"PRIVATE-TOKEN": "TEST_TOKEN"}
+
+
+def test_virtual_clock_freezes_advances_and_speeds_up(monkeypatch):
+    real = [1000.0]
+    monkeypatch.setattr("app.clock.time.monotonic", lambda: real[0])
+    clock = Clock()
+    assert not clock.virtual
+
+    clock.freeze()
+    frozen = clock.now()
+    real[0] += 30
+    assert clock.now() == frozen
+    assert clock.seconds_until(frozen + timedelta(seconds=1)) is None
+
+    clock.advance(90)
+    assert clock.now() == frozen + timedelta(seconds=90)
+
+    clock.set_speed(60)
+    real[0] += 2
+    assert clock.now() == frozen + timedelta(seconds=210)
+    assert clock.seconds_until(clock.now() + timedelta(minutes=5)) == 5
+
+    with pytest.raises(ValueError):
+        clock.set_time(frozen)
+    with pytest.raises(ValueError):
+        clock.advance(-1)
+
+    clock.use_wall_clock()
+    assert not clock.virtual and clock.speed == 1
+
+
+def test_clock_endpoint_fast_forwards_pipelines(client):
+    state = client.post("/_mock/clock", json={"freeze": True}, headers=AUTH_HEADERS).json()
+    assert state["mode"] == "virtual" and state["speed"] == 0
+
+    created = client.post(
+        "/projects/1/trigger/pipeline", json={"token": "T", "ref": "main", "scenario_id": 500}, headers=AUTH_HEADERS
+    ).json()
+    assert created["created_at"] == state["now"]
+    path = f"/projects/1/pipelines/{created['id']}"
+    assert client.get(path, headers=AUTH_HEADERS).json()["status"] == "running"
+
+    client.post("/_mock/clock", json={"advance_seconds": 299}, headers=AUTH_HEADERS)
+    assert client.get(path, headers=AUTH_HEADERS).json()["status"] == "running"
+    client.post("/_mock/clock", json={"advance_seconds": 1}, headers=AUTH_HEADERS)
+    assert client.get(path, headers=AUTH_HEADERS).json()["status"] == "success"
+
+    assert client.post("/_mock/clock", json={"now": created["created_at"]}, headers=AUTH_HEADERS).status_code == 422
+    assert client.post("/_mock/clock", json={"freeze": True, "speed": 2}, headers=AUTH_HEADERS).status_code == 422
+    state = client.post("/_mock/clock", json={"speed": 60}, headers=AUTH_HEADERS).json()
+    assert state["speed"] == 60
+    assert client.post("/_mock/clock", json={"wall": True}, headers=AUTH_HEADERS).json()["mode"] == "wall"
+
+
+def test_clock_control_is_refused_with_several_workers(client, monkeypatch):
+    from app.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "workers", 2)
+    assert client.post("/_mock/clock", json={"freeze": True}, headers=AUTH_HEADERS).status_code == 409
+    assert client.get("/_mock/clock", headers=AUTH_HEADERS).json()["mode"] == "wall"
+
+
+def test_advancing_the_clock_wakes_the_event_scheduler():
+    from app.config import Settings
+    from app.events import EventHub
+    from app.logic import now_utc
+    from app.storage import init_storage
+
+    async def scenario() -> None:
+        clock = init_clock()
+        clock.freeze()
+        storage = init_storage(Settings(database_url="memory://"))
+        await storage.seed_scenarios()
+        hub = EventHub()
+        subscriber = await hub.subscribe(3, base_url="http://mock")
+        created_at = now_utc()
+        pipeline = await storage.create_pipeline(
+            {"project_id": 3, "ref": "main", "sha": "abc", "scenario_id": 100, "created_at": created_at, "updated_at": created_at}
+        )
+        hub.pipeline_created(pipeline)
+        assert (await asyncio.wait_for(subscriber.queue.get(), timeout=5)).kind == "created"
+
+        get_clock().advance(60)
+        terminal = await asyncio.wait_for(subscriber.queue.get(), timeout=5)
+        assert terminal.kind == "terminal"
+        await hub.close()
+
+    try:
+        asyncio.run(scenario())
+    finally:
+        init_clock()
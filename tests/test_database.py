@@ -0,0 +1,157 @@
+from __future__ import annotations
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+AUTH_HEADERS = {"PRIVATE-TOKEN": "TEST_TOKEN"}
+
+
+def test_performance_profile_pragmas(client, db_session):
+    assert db_session.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+    assert db_session.execute(text("PRAGMA synchronous")).scalar() == 1
+    assert db_session.execute(text("PRAGMA temp_store")).scalar() == 2
+    assert db_session.execute(text("PRAGMA foreign_keys")).scalar() == 1
+
+
+def test_unknown_sqlite_profile_is_rejected(tmp_path):
+    from app.database import SqliteTuning, init_engine
+
+    with pytest.raises(ValueError):
+        init_engine(f"sqlite:///{tmp_path / 'x.db'}", tuning=SqliteTuning(profile="reckless"))
+
+
+def test_in_memory_sqlite_is_shared_across_pools(monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    monkeypatch.setenv("MOCK_TOKEN", "TEST_TOKEN")
+    monkeypatch.setenv("MOCK_SQLITE_PROFILE", "unsafe")
+
+    from app.config import get_settings
+
+    get_settings.cache_clear()
+
+    from app.main import create_app
+
+    with TestClient(create_app()) as client:
+        created = client.post(
+            "/projects/1/trigger/pipeline",
+            json={"token": "T", "ref": "main", "scenario_id": 3},
+            headers=AUTH_HEADERS,
+        )
+        assert created.status_code == 201
+        poll = client.get(f"/projects/1/pipelines/{created.json()['id']}", headers=AUTH_HEADERS)
+        assert poll.status_code == 200
+        assert poll.json()["scenario_id"] == 3
+
+
+def test_in_memory_sqlite_reads_never_see_uncommitted_writes(monkeypatch):
+    import asyncio
+
+    monkeypatch.setenv("DATABASE_URL", "sqlite://")
+    monkeypatch.setenv("MOCK_TOKEN", "TEST_TOKEN")
+
+    from app.config import get_settings
+
+    get_settings.cache_clear()
+
+    from app.database import async_read_session_scope, async_session_scope
+    from app.main import create_app
+
+    async def read_name() -> str:
+        async with async_read_session_scope() as session:
+            return (await session.execute(text("SELECT name FROM scenarios WHERE scenario_id = 1"))).scalar_one()
+
+    async def scenario() -> tuple[bool, str, str]:
+        before = await read_name()
+        with pytest.raises(RuntimeError):
+            async with async_session_scope() as session:
+                await session.execute(text("UPDATE scenarios SET name = 'uncommitted' WHERE scenario_id = 1"))
+                reader = asyncio.create_task(read_name())
+                await asyncio.sleep(0.1)
+                waited = not reader.done()
+                raise RuntimeError("roll back")
+        return waited, before, await reader
+
+    with TestClient(create_app()) as client:
+        waited, before, during = client.portal.call(scenario)
+    assert waited
+    assert during == before
+
+
+def test_writer_transactions_take_the_write_lock_up_front(client):
+    from sqlalchemy import event
+
+    from app.database import get_async_engine
+
+    statements: list[str] = []
+    engine = get_async_engine().sync_engine
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        client.post("/projects/1/trigger/pipeline", json={"token": "T", "ref": "main", "scenario_id": 3}, headers=AUTH_HEADERS)
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert statements[0] == "BEGIN IMMEDIATE"
+
+
+def test_restart_skips_schema_creation_and_keeps_edited_scenarios(tmp_path, monkeypatch):
+    import asyncio
+
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    from app.database import Base
+    from app.storage.sql import SqlStorage
+
+    database_url = f"sqlite:///{tmp_path / 'restart.db'}"
+    created: list[object] = []
+    create_all = Base.metadata.create_all
+    monkeypatch.setattr(Base.metadata, "create_all", lambda *args, **kwargs: created.append(create_all(*args, **kwargs)))
+
+    async def scenario() -> None:
+        storage = SqlStorage(database_url)
+        statements: list[str] = []
+        listener = lambda conn, cursor, statement, *args: statements.append(statement)  # noqa: E731
+        event.listen(Engine, "before_cursor_execute", listener)
+        try:
+            await storage.seed_scenarios()
+        finally:
+            event.remove(Engine, "before_cursor_execute", listener)
+        assert [statement.split("(")[0].strip() for statement in statements if "scenarios" in statement] == ["INSERT INTO scenarios"]
+        await storage.update_scenario(1, {"name": "edited"})
+
+        restarted = SqlStorage(database_url)
+        await restarted.seed_scenarios()
+        assert (await restarted.get_scenario(1)).name == "edited"
+        assert len(await restarted.list_scenarios()) == 103
+
+    asyncio.run(scenario())
+    assert len(created) == 1
+
+    monkeypatch.setattr("app.storage.sql._schema_fingerprint", lambda: 1)
+    SqlStorage(database_url)
+    assert len(created) == 2
+
+
+def test_importing_main_has_no_side_effects(tmp_path):
+    import os
+    import subprocess
+    import sys
+    from pathlib import Path
+
+    script = (
+        "import sys, app.main\n"
+        "assert 'numpy' not in sys.modules\n"
+        "import os; assert not os.path.exists('mock.db')\n"
+        "app.main.app\n"
+        "assert os.path.exists('mock.db')\n"
+    )
+    env = {**os.environ, "DATABASE_URL": "sqlite:///./mock.db", "PYTHONPATH": str(Path(__file__).resolve().parents[1])}
+    subprocess.run([sys.executable, "-c", script], cwd=tmp_path, env=env, check=True)
+
+
+def test_openapi_schema_is_built_on_first_request(client):
+    client.get("/_mock/scenarios", headers=AUTH_HEADERS)
+    assert client.app.openapi_schema is None
+    assert client.get("/openapi.json").json()["info"]["title"] == "Mock GitLab Pipeline Trigger Service"
+    assert client.app.openapi_schema is not None
@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+
+from app.config import Settings
+from app.events import EventHub
+from app.logic import now_utc
+from app.storage import init_storage
+
+
+async def _next_event(subscriber):
+    return await asyncio.wait_for(subscriber.queue.get(), timeout=5)
+
+
+def test_event_hub_publishes_lifecycle_events():
+    async def scenario() -> None:
+        storage = init_storage(Settings(database_url="memory://"))
+        await storage.seed_scenarios()
+        hub = EventHub()
+        subscriber = await hub.subscribe(1, base_url="http://mock")
+
+        created_at = now_utc()
+        values = {
+            "project_id": 1,
+            "ref": "main",
+            "sha": "abc",
+            "terminal_after_seconds": 0,
+            "terminal_status": "failed",
+            "created_at": created_at,
+            "updated_at": created_at,
+        }
+        pipeline = await storage.create_pipeline(values | {"terminal_after_seconds": 1})
+        hub.pipeline_created(pipeline)
+        other = await storage.create_pipeline(values | {"project_id": 2})
+        hub.pipeline_created(other)
+
+        created = await _next_event(subscriber)
+        assert created.kind == "created"
+        assert created.payload["id"] == pipeline.id
+
+        terminal = await _next_event(subscriber)
+        assert terminal.kind == "terminal"
+        assert terminal.payload["status"] == "failed"
+        frame = terminal.render("http://mock")
+        assert frame.startswith(f"id: {terminal.id}\nevent: terminal\ndata: ")
+        assert f'"web_url":"http://mock/projects/1/pipelines/{pipeline.id}"' in frame
+
+        await storage.delete_pipeline(pipeline.id)
+        hub.pipeline_deleted(pipeline.id, 1)
+        deleted = await _next_event(subscriber)
+        assert deleted.kind == "deleted"
+        assert deleted.payload == {"id": pipeline.id, "project_id": 1}
+
+        assert subscriber.queue.empty()
+        await hub.close()
+
+    asyncio.run(scenario())
+
+
+def test_event_hub_reschedules_on_scenario_change():
+    async def scenario() -> None:
+        storage = init_storage(Settings(database_url="memory://"))
+        await storage.seed_scenarios()
+        await storage.create_scenario(
+            {"scenario_id": 901, "name": "slow", "terminal_after_seconds": 3600, "terminal_status": "success", "never_complete": False}
+        )
+        hub = EventHub()
+        created_at = now_utc()
+        await storage.create_pipeline(
+            {"project_id": 5, "ref": "main", "sha": "abc", "scenario_id": 901, "created_at": created_at, "updated_at": created_at}
+        )
+        subscriber = await hub.subscribe(5, base_url="http://mock")
+
+        await storage.update_scenario(901, {"terminal_after_seconds": 0, "terminal_status": "canceled"})
+        hub.scenario_changed(901)
+
+        terminal = await _next_event(subscriber)
+        assert terminal.kind == "terminal"
+        assert terminal.payload["status"] == "canceled"
+        await hub.close()
+
+    asyncio.run(scenario())
+
+
+def test_shared_event_hub_publishes_pipelines_from_any_process():
+    async def scenario() -> None:
+        storage = init_storage(Settings(database_url="memory://"))
+        await storage.seed_scenarios()
+        hub = EventHub(shared=True)
+        created_at = now_utc()
+        values = {"project_id": 7, "ref": "main", "sha": "abc", "scenario_id": 0, "created_at": created_at, "updated_at": created_at}
+        await storage.create_pipeline(values)
+        subscriber = await hub.subscribe(7, base_url="http://mock")
+
+        local = await storage.create_pipeline(values)
+        hub.pipeline_created(local)
+        assert subscriber.queue.empty()
+        # Created by another worker: only the database knows about it.
+        remote = await storage.create_pipeline(values)
+
+        await hub.catch_up()
+        assert [(await _next_event(subscriber)).payload["id"] for _ in range(2)] == [local.id, remote.id]
+        await hub.catch_up()
+        assert subscriber.queue.empty()
+        await hub.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,49 @@
+from __future__ import annotations
+
+import re
+
+AUTH_HEADERS = {"PRIVATE-TOKEN": "TEST_TOKEN"}
+
+
+def _sample(body: str, name: str, **labels: str) -> float:
+    rendered = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    match = re.search(rf"^{re.escape(name)}{re.escape('{' + rendered + '}' if rendered else '')} (\S+)$", body, re.M)
+    assert match is not None, f"{name} {labels} missing"
+    return float(match.group(1))
+
+
+def test_metrics_record_routes_latency_and_db_time(client):
+    created = client.post(
+        "/projects/7/trigger/pipeline",
+        json={"token": "T", "ref": "main", "scenario_id": 1},
+        headers=AUTH_HEADERS,
+    )
+    for _ in range(3):
+        client.get(f"/projects/7/pipelines/{created.json()['id']}", headers=AUTH_HEADERS)
+    client.get("/projects/7/pipelines/999999", headers=AUTH_HEADERS)
+    client.get("/no/such/route", headers=AUTH_HEADERS)
+
+    scraped = client.get("/_mock/metrics", headers=AUTH_HEADERS)
+    assert scraped.status_code == 200
+    assert scraped.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = scraped.text
+
+    poll = {"method": "GET", "route": "/projects/{project_id}/pipelines/{pipeline_id}"}
+    assert _sample(body, "mock_http_requests_total", **poll, status="200") == 3
+    assert _sample(body, "mock_http_requests_total", **poll, status="404") == 1
+    assert _sample(body, "mock_http_requests_total", method="GET", route="unmatched", status="404") == 1
+    assert _sample(body, "mock_http_request_duration_seconds_count", **poll) == 4
+    assert _sample(body, "mock_http_request_duration_seconds_bucket", **poll, le="+Inf") == 4
+    assert _sample(body, "mock_http_request_db_queries_total", **poll) >= 4
+    assert _sample(body, "mock_http_request_db_seconds_total", **poll) > 0
+    total = _sample(body, "mock_http_request_duration_seconds_sum", **poll)
+    handler = _sample(body, "mock_http_request_handler_seconds_total", **poll)
+    assert 0 <= handler < total
+    # The scrape itself is still being served.
+    assert _sample(body, "mock_http_requests_in_flight", method="GET") == 1
+    assert _sample(body, "mock_db_query_duration_seconds_count") > 0
+    assert _sample(body, "mock_retention_runs_total") == 0
+
+
+def test_metrics_require_token(client):
+    assert client.get("/_mock/metrics").status_code == 401
@@ -1,6 +1,10 @@
 from __future__ import annotations
 
-from datetime import timedelta
+import json
+import time
+from datetime import datetime, timedelta, timezone
+
+import pytest
 
 from app.models import Pipeline
 
@@ -120,3 +124,404 @@ def test_scenario_crud(client):
 
     scenarios_after = client.get("/_mock/scenarios", headers=AUTH_HEADERS)
     assert all(item["scenario_id"] != 900 for item in scenarios_after.json())
+
+
+def test_poll_only_writes_on_transition(client, db_session):
+    created = client.post(
+        "/projects/7/trigger/pipeline",
+        json={"token": "T", "ref": "main", "scenario_id": 0},
+        headers=AUTH_HEADERS,
+    )
+    assert created.status_code == 201
+    payload = created.json()
+
+    first = client.get(f"/projects/7/pipelines/{payload['id']}", headers=AUTH_HEADERS)
+    second = client.get(f"/projects/7/pipelines/{payload['id']}", headers=AUTH_HEADERS)
+    assert first.json()["status"] == "running"
+    assert second.json()["updated_at"] == payload["updated_at"]
+
+
+def test_read_only_polling_mode(client, db_session, monkeypatch):
+    monkeypatch.setenv("MOCK_PERSIST_STATUS_ON_READ", "0")
+    from app.config import get_settings
+
+    get_settings.cache_clear()
+
+    created = client.post(
+        "/projects/8/trigger/pipeline",
+        json={"token": "T", "ref": "main", "terminal_after_seconds": 0, "terminal_status": "failed"},
+        headers=AUTH_HEADERS,
+    )
+    pipeline_id = created.json()["id"]
+
+    poll = client.get(f"/projects/8/pipelines/{pipeline_id}", headers=AUTH_HEADERS)
+    assert poll.json()["status"] == "failed"
+
+    stored = db_session.get(Pipeline, pipeline_id)
+    assert stored is not None
+    assert stored.status == "running"
+
+
+def test_pipeline_list_filters_and_keyset_pagination(client):
+    ids = []
+    for project_id, ref, body in [
+        (1, "main", {"scenario_id": 0}),
+        (1, "main", {"terminal_after_seconds": 0, "terminal_status": "failed"}),
+        (1, "develop", {"scenario_id": 0}),
+        (2, "main", {"scenario_id": 0}),
+    ]:
+        created = client.post(
+            f"/projects/{project_id}/trigger/pipeline",
+            json={"token": "T", "ref": ref, **body},
+            headers=AUTH_HEADERS,
+        )
+        ids.append(created.json()["id"])
+
+    by_project = client.get("/_mock/pipelines", params={"project_id": 1, "ref": "main"}, headers=AUTH_HEADERS)
+    assert [item["id"] for item in by_project.json()] == ids[:2]
+
+    failed = client.get("/_mock/pipelines", params={"status": "failed"}, headers=AUTH_HEADERS)
+    assert [item["id"] for item in failed.json()] == [ids[1]]
+
+    by_scenario = client.get("/_mock/pipelines", params={"scenario_id": 0}, headers=AUTH_HEADERS)
+    assert [item["id"] for item in by_scenario.json()] == [ids[0], ids[2], ids[3]]
+
+    first_page = client.get("/_mock/pipelines", params={"per_page": 3}, headers=AUTH_HEADERS)
+    assert [item["id"] for item in first_page.json()] == ids[:3]
+    next_page = client.get(
+        "/_mock/pipelines",
+        params={"per_page": 3, "id_after": first_page.json()[-1]["id"]},
+        headers=AUTH_HEADERS,
+    )
+    assert [item["id"] for item in next_page.json()] == ids[3:]
+
+    future = client.get("/_mock/pipelines", params={"created_after": "2999-01-01T00:00:00Z"}, headers=AUTH_HEADERS)
+    assert future.json() == []
+
+
+def test_batch_trigger_reports_per_item_errors(client):
+    response = client.post(
+        "/_mock/pipelines:batch",
+        json=[
+            {"project_id": 10, "token": "T", "ref": "main", "scenario_id": 0},
+            {"project_id": 10, "token": "T"},
+            {"project_id": 11, "token": "T", "ref": "dev", "scenario_id": 12345},
+            {"project_id": 11, "token": "T", "ref": "dev", "terminal_after_seconds": 0, "variables": {"A": "1"}},
+        ],
+        headers=AUTH_HEADERS,
+    )
+    assert response.status_code == 200
+    results = response.json()
+    assert [item["status"] for item in results] == [201, 422, 404, 201]
+    assert results[0]["pipeline"]["scenario_id"] == 0
+    assert results[1]["detail"] == "token and ref are required"
+    assert results[3]["pipeline"]["variables"] == {"A": "1"}
+    assert results[3]["pipeline"]["id"] > results[0]["pipeline"]["id"]
+
+    listed = client.get("/_mock/pipelines", headers=AUTH_HEADERS)
+    assert [item["id"] for item in listed.json()] == [results[0]["pipeline"]["id"], results[3]["pipeline"]["id"]]
+
+
+def test_long_poll_returns_on_transition(client):
+    created = client.post(
+        "/projects/9/trigger/pipeline",
+        json={"token": "T", "ref": "main", "terminal_after_seconds": 1, "terminal_status": "failed"},
+        headers=AUTH_HEADERS,
+    )
+    pipeline_id = created.json()["id"]
+
+    started = time.monotonic()
+    poll = client.get(f"/projects/9/pipelines/{pipeline_id}", params={"wait": 10}, headers=AUTH_HEADERS)
+    elapsed = time.monotonic() - started
+    assert poll.json()["status"] == "failed"
+    assert elapsed < 5
+
+
+def test_long_poll_times_out_while_running(client):
+    created = client.post(
+        "/projects/9/trigger/pipeline",
+        json={"token": "T", "ref": "main", "scenario_id": 0},
+        headers=AUTH_HEADERS,
+    )
+    pipeline_id = created.json()["id"]
+
+    started = time.monotonic()
+    poll = client.get(f"/projects/9/pipelines/{pipeline_id}", params={"wait": 0.2}, headers=AUTH_HEADERS)
+    assert poll.json()["status"] == "running"
+    assert time.monotonic() - started >= 0.2
+
+
+def test_scenario_update_reschedules_deadlines(client, db_session):
+    client.post(
+        "/_mock/scenarios",
+        json={"scenario_id": 901, "name": "stuck", "terminal_after_seconds": None, "never_complete": True},
+        headers=AUTH_HEADERS,
+    )
+    created = client.post(
+        "/projects/5/trigger/pipeline",
+        json={"token": "T", "ref": "main", "scenario_id": 901},
+        headers=AUTH_HEADERS,
+    )
+    pipeline_id = created.json()["id"]
+    assert db_session.get(Pipeline, pipeline_id).terminal_at is None
+
+    running = client.get("/_mock/pipelines", params={"project_id": 5, "status": "running"}, headers=AUTH_HEADERS)
+    assert [item["id"] for item in running.json()] == [pipeline_id]
+
+    client.put(
+        "/_mock/scenarios/901",
+        json={"scenario_id": 901, "name": "fail in 1m", "terminal_after_seconds": 60, "terminal_status": "failed"},
+        headers=AUTH_HEADERS,
+    )
+    stored = db_session.get(Pipeline, pipeline_id)
+    assert stored.terminal_at == stored.created_at + timedelta(seconds=60)
+
+    client.delete("/_mock/scenarios/901", headers=AUTH_HEADERS)
+    db_session.expire_all()
+    stored = db_session.get(Pipeline, pipeline_id)
+    assert stored.terminal_at == stored.created_at
+    succeeded = client.get("/_mock/pipelines", params={"project_id": 5, "status": "success"}, headers=AUTH_HEADERS)
+    assert [item["id"] for item in succeeded.json()] == [pipeline_id]
+
+
+def test_materialize_statuses_persists_due_pipelines(client, db_session):
+    from app.logic import now_utc
+    from app.storage import get_storage
+
+    due = client.post(
+        "/projects/6/trigger/pipeline",
+        json={"token": "T", "ref": "main", "terminal_after_seconds": 0, "terminal_status": "canceled"},
+        headers=AUTH_HEADERS,
+    ).json()
+    pending = client.post(
+        "/projects/6/trigger/pipeline",
+        json={"token": "T", "ref": "main", "scenario_id": 0},
+        headers=AUTH_HEADERS,
+    ).json()
+
+    flipped = client.portal.call(get_storage().materialize_statuses, now_utc())
+    assert flipped == 1
+    assert db_session.get(Pipeline, due["id"]).status == "canceled"
+    assert db_session.get(Pipeline, pending["id"]).status == "running"
+
+
+def test_bulk_compute_statuses_with_and_without_numpy(monkeypatch):
+    from app import logic
+
+    args = ([100.0, 100.0, 100.0, 50.0], [10, 0, 60, 0], [False, False, False, True], [1, 2, 1, 1], 130.0)
+    vectorised = list(logic.bulk_compute_statuses(*args))
+    monkeypatch.setattr(logic, "np", None)
+    fallback = list(logic.bulk_compute_statuses(*args))
+    assert vectorised == fallback == [1, 2, 0, 0]
+
+
+def test_pipeline_listing_matches_single_pipeline_rendering(client):
+    from app.schemas import Pipeline as PipelineSchema
+
+    bodies = [
+        {"ref": "feature/ünïcode \"quoted\"", "variables": {"B": "2", "A": "é"}, "terminal_after_seconds": 0},
+        {"ref": "main", "scenario_id": 0},
+        {"ref": "main", "terminal_after_seconds": 3600, "terminal_status": "canceled"},
+    ]
+    for body in bodies:
+        client.post("/projects/11/trigger/pipeline", json={"token": "T", **body}, headers=AUTH_HEADERS)
+
+    listed = client.get("/_mock/pipelines", params={"project_id": 11}, headers=AUTH_HEADERS)
+    assert len(listed.json()) == 3
+    for item in listed.json():
+        # Compare byte-for-byte against the schema's own serialisation.
+        expected = PipelineSchema.model_validate(item).model_dump_json()
+        assert expected in listed.text
+    assert [item["status"] for item in listed.json()] == ["success", "running", "running"]
+
+
+def _fastapi_rendering(model) -> bytes:
+    # What ``response_model`` + ``JSONResponse`` produced for these routes.
+    return json.dumps(model.model_dump(mode="json"), ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_pipeline_responses_are_byte_compatible(client, monkeypatch, use_orjson):
+    from app import serialization
+    from app.logic import pipeline_to_dict
+    from app.schemas import BatchTriggerResult
+    from app.schemas import Pipeline as PipelineSchema
+    from app.storage import get_storage
+
+    if not use_orjson:
+        monkeypatch.setattr(serialization, "orjson", None)
+    serialization.variables_fragment.cache_clear()
+
+    triggered = client.post(
+        "/projects/12/trigger/pipeline",
+        json={"token": "T", "ref": "rel/ü\"\\\n", "variables": {"Z": " \x01", "A": "é"}, "scenario_id": 3},
+        headers=AUTH_HEADERS,
+    )
+    pipeline = client.portal.call(get_storage().get_pipeline, triggered.json()["id"])
+    expected = PipelineSchema.model_validate(pipeline_to_dict(pipeline, "http://testserver", status="running"))
+    assert triggered.content == _fastapi_rendering(expected)
+
+    polled = client.get(f"/projects/12/pipelines/{pipeline.id}", headers=AUTH_HEADERS)
+    pipeline = client.portal.call(get_storage().get_pipeline, pipeline.id)
+    assert polled.content == _fastapi_rendering(PipelineSchema.model_validate(pipeline_to_dict(pipeline, "http://testserver")))
+
+    batch = client.post(
+        "/_mock/pipelines:batch",
+        json=[{"project_id": 12, "token": "T", "ref": "main", "terminal_after_seconds": 0}, {"project_id": 12, "ref": "main"}],
+        headers=AUTH_HEADERS,
+    )
+    created = client.portal.call(get_storage().get_pipeline, batch.json()[0]["pipeline"]["id"])
+    results = [
+        BatchTriggerResult(status=201, pipeline=pipeline_to_dict(created, "http://testserver", status="running")),
+        BatchTriggerResult(status=422, detail="token and ref are required"),
+    ]
+    assert batch.content == b"[" + b",".join(_fastapi_rendering(result) for result in results) + b"]"
+
+
+def test_export_and_import_round_trip(any_client, monkeypatch, trigger):
+    from app.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "allow_reset", True)
+    trigger(any_client, 1, scenario_id=3, variables={"K": "ü"})
+    trigger(any_client, 2, ref="dev", terminal_after_seconds=0, terminal_status="failed")
+    trigger(any_client, 2, ref="dev", scenario_id=0)
+    any_client.delete("/_mock/pipelines/1", headers=AUTH_HEADERS)
+
+    exported = any_client.get("/_mock/pipelines/export", headers=AUTH_HEADERS)
+    assert exported.headers["content-type"] == "application/x-ndjson"
+    listing = any_client.get("/_mock/pipelines", headers=AUTH_HEADERS).json()
+    assert [json.loads(line) for line in exported.text.splitlines()] == listing
+    assert any_client.get("/_mock/pipelines/export", params={"project_id": 2, "status": "failed"}, headers=AUTH_HEADERS).text.count("\n") == 1
+
+    any_client.post("/_mock/reset", headers=AUTH_HEADERS)
+    # Pieces that split lines and multi-byte characters.
+    pieces = (exported.content[index : index + 7] for index in range(0, len(exported.content), 7))
+    imported = any_client.post("/_mock/pipelines/import", content=pieces, headers=AUTH_HEADERS)
+    assert imported.json() == {"imported": 2}
+    assert any_client.get("/_mock/pipelines/export", headers=AUTH_HEADERS).content == exported.content
+    assert any_client.get("/projects/2/pipelines/3", headers=AUTH_HEADERS).json() == listing[1]
+    assert trigger(any_client, 9).json()["id"] == 4
+
+
+def test_import_is_all_or_nothing(any_client, trigger):
+    trigger(any_client, 1, scenario_id=0)
+
+    def post(*lines: dict, **params) -> object:
+        body = "\n".join(json.dumps(line) for line in lines) + "\n\n"
+        return any_client.post("/_mock/pipelines/import", content=body, params=params, headers=AUTH_HEADERS)
+
+    good = {"project_id": 5, "ref": "main", "terminal_after_seconds": 60}
+    assert post(good, {"project_id": 5}).json() == {"detail": "Line 2: project_id and ref are required"}
+    assert post(good, {**good, "scenario_id": 12345}).json() == {"detail": "Line 2: Scenario not found"}
+    assert any_client.post("/_mock/pipelines/import", content=b"{", headers=AUTH_HEADERS).json() == {"detail": "Line 1: invalid JSON"}
+    assert post(good, {**good, "id": 1}).status_code == 409
+    assert post(good, {**good, "created_at": "yesterday"}).status_code == 422
+    assert [item["id"] for item in any_client.get("/_mock/pipelines", headers=AUTH_HEADERS).json()] == [1]
+
+    aged = {**good, "created_at": (datetime.now(timezone.utc) - timedelta(minutes=10)).isoformat()}
+    assert post(aged, good, {**good, "id": 1}, keep_ids=False).json() == {"imported": 3}
+    statuses = {item["id"]: item["status"] for item in any_client.get("/_mock/pipelines", params={"project_id": 5}, headers=AUTH_HEADERS).json()}
+    assert statuses == {2: "success", 3: "running", 4: "running"}
+    assert post({**good, "id": 10}, good).json() == {"imported": 2}
+    assert [item["id"] for item in any_client.get("/_mock/pipelines", params={"id_after": 4}, headers=AUTH_HEADERS).json()] == [10, 11]
+
+
+def test_listing_filters_by_variables(any_client, monkeypatch, trigger):
+    from app.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "allow_reset", True)
+    form = {"token": "T", "ref": "main", "variables[DEPLOY_ENV]": "staging", "variables[BUILD_ID]": "1234"}
+    any_client.post("/projects/1/trigger/pipeline", data=form, headers=AUTH_HEADERS)
+    any_client.post("/projects/2/trigger/pipeline", data={**form, "variables[BUILD_ID]": "99"}, headers=AUTH_HEADERS)
+    trigger(any_client, 2, variables={"DEPLOY_ENV": "staging"})
+    trigger(any_client, 2)
+
+    def ids(**params) -> list[int]:
+        return [item["id"] for item in any_client.get("/_mock/pipelines", params=params, headers=AUTH_HEADERS).json()]
+
+    assert ids(**{"variables[DEPLOY_ENV]": "staging"}) == [1, 2, 3]
+    assert ids(**{"variables[DEPLOY_ENV]": "staging", "variables[BUILD_ID]": "1234"}) == [1]
+    assert ids(**{"variables[DEPLOY_ENV]": "staging", "project_id": 2, "per_page": 1}) == [2]
+    assert ids(**{"variables[DEPLOY_ENV]": "production"}) == []
+    exported = any_client.get("/_mock/pipelines/export", params={"variables[BUILD_ID]": "99"}, headers=AUTH_HEADERS)
+    assert [json.loads(line)["id"] for line in exported.text.splitlines()] == [2]
+
+    any_client.delete("/_mock/pipelines/1", headers=AUTH_HEADERS)
+    assert ids(**{"variables[BUILD_ID]": "1234"}) == []
+    line = {"project_id": 3, "ref": "main", "variables": {"BUILD_ID": "1234"}}
+    any_client.post("/_mock/pipelines/import", content=json.dumps(line), headers=AUTH_HEADERS)
+    assert ids(**{"variables[BUILD_ID]": "1234"}) == [5]
+    any_client.post("/_mock/reset", headers=AUTH_HEADERS)
+    assert ids(**{"variables[DEPLOY_ENV]": "staging"}) == []
+
+
+def test_variable_lookups_use_the_side_table_index(client, tmp_path):
+    import sqlite3
+
+    from app.database import get_engine
+    from app.storage.sql import _migrate
+
+    client.post("/projects/1/trigger/pipeline", json={"token": "T", "ref": "main", "variables": {"K": "v"}}, headers=AUTH_HEADERS)
+    connection = sqlite3.connect(tmp_path / "test.db")
+    plan = connection.execute(
+        "EXPLAIN QUERY PLAN SELECT pipeline_id FROM pipeline_variables WHERE key = 'K' AND value = 'v'"
+    ).fetchall()
+    assert "USING COVERING INDEX ix_pipeline_variables_key_value" in plan[0][-1]
+
+    # Database files from before the side table are filled in on migration.
+    connection.execute("DELETE FROM pipeline_variables")
+    connection.commit()
+    _migrate(get_engine())
+    assert connection.execute("SELECT * FROM pipeline_variables").fetchall() == [(1, "K", "v")]
+    connection.close()
+
+
+def test_stalled_import_upload_does_not_block_writes(client):
+    import asyncio
+
+    import httpx
+
+    async def scenario() -> None:
+        release = asyncio.Event()
+
+        async def body():
+            yield b'{"project_id": 1, "ref": "main"}\n'
+            await release.wait()
+            yield b'{"project_id": 1, "ref": "dev"}\n'
+
+        transport = httpx.ASGITransport(app=client.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as http:
+            upload = asyncio.create_task(http.post("/_mock/pipelines/import", content=body(), headers=AUTH_HEADERS))
+            await asyncio.sleep(0.1)
+            trigger = http.post("/projects/2/trigger/pipeline", json={"token": "T", "ref": "main"}, headers=AUTH_HEADERS)
+            assert (await asyncio.wait_for(trigger, 1)).json()["id"] == 1
+            release.set()
+            assert (await upload).json() == {"imported": 2}
+
+    client.portal.call(scenario)
+    assert [item["ref"] for item in client.get("/_mock/pipelines", params={"project_id": 1}, headers=AUTH_HEADERS).json()] == ["main", "dev"]
+
+
+def test_memory_import_keeps_listings_in_id_order(memory_client):
+    client = memory_client
+    for _ in range(5):
+        client.post("/projects/1/trigger/pipeline", json={"token": "T", "ref": "main", "variables": {"K": "v"}}, headers=AUTH_HEADERS)
+    client.delete("/_mock/pipelines/2", headers=AUTH_HEADERS)
+    lines = [{"id": 2, "project_id": 1, "ref": "main", "variables": {"K": "v"}}, {"id": 7, "project_id": 1, "ref": "main"}, {"id": 6, "project_id": 1, "ref": "main"}]
+    client.post("/_mock/pipelines/import", content="\n".join(map(json.dumps, lines)), headers=AUTH_HEADERS)
+
+    def ids(**params) -> list[int]:
+        return [item["id"] for item in client.get("/_mock/pipelines", params=params, headers=AUTH_HEADERS).json()]
+
+    assert ids() == [1, 2, 3, 4, 5, 6, 7]
+    assert ids(per_page=2, id_after=1) == [2, 3]
+    assert ids(project_id=1, **{"variables[K]": "v"}) == [1, 2, 3, 4, 5]
+
+
+def test_import_numbers_rows_after_ids_of_later_chunks(any_client, monkeypatch):
+    monkeypatch.setattr("app.routes.pipelines.BATCH_SIZE", 1)
+    lines = [{"project_id": 1, "ref": "main"}, {"id": 1, "project_id": 1, "ref": "main"}, {"id": 5, "project_id": 2, "ref": "main"}]
+    imported = any_client.post("/_mock/pipelines/import", content="\n".join(map(json.dumps, lines)), headers=AUTH_HEADERS)
+    assert imported.json() == {"imported": 3}
+    listed = any_client.get("/_mock/pipelines", headers=AUTH_HEADERS).json()
+    assert [(item["id"], item["project_id"]) for item in listed] == [(1, 1), (5, 2), (6, 1)]
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from app.logic import now_utc
+from app.tasks import get_retention
+
+AUTH_HEADERS = {"PRIVATE-TOKEN": "TEST_TOKEN"}
+
+
+def _ids(client) -> list[int]:
+    return [item["id"] for item in client.get("/_mock/pipelines", headers=AUTH_HEADERS).json()]
+
+
+def test_retention_prunes_finished_pipelines_in_batches(any_client, trigger):
+    retention = get_retention()
+    retention.policy.max_per_project = 2
+    retention.policy.max_age_seconds = 3600
+    retention.batch_size = 1
+
+    old = [trigger(any_client, 1, terminal_after_seconds=0).json()["id"] for _ in range(2)]
+    never = trigger(any_client, 1, scenario_id=0).json()["id"]
+    newest = [trigger(any_client, 1, terminal_after_seconds=0).json()["id"] for _ in range(2)]
+    other = trigger(any_client, 2, terminal_after_seconds=0).json()["id"]
+
+    ran = any_client.post("/_mock/retention:run", headers=AUTH_HEADERS)
+    assert ran.status_code == 200
+    assert ran.json()["policy"] == {"max_age_seconds": 3600, "max_per_project": 2, "max_rows": 0}
+    assert ran.json()["pipelines_deleted"] == len(old)
+    # Over the per-project cap, but still running.
+    assert _ids(any_client) == [never, *newest, other]
+
+    any_client.portal.call(retention.run_once, now_utc() + timedelta(hours=2))
+    assert _ids(any_client) == [never]
+    assert any_client.get("/_mock/retention", headers=AUTH_HEADERS).json()["runs"] == 2
+
+
+def test_retention_caps_total_rows(memory_client, trigger):
+    retention = get_retention()
+    retention.policy.max_rows = 2
+    ids = [trigger(memory_client, project_id, terminal_after_seconds=0).json()["id"] for project_id in (1, 2, 3)]
+
+    memory_client.portal.call(retention.run_once)
+    assert _ids(memory_client) == ids[1:]
+
+
+def test_compaction_returns_space_to_the_filesystem(client, db_session):
+    assert db_session.execute(text("PRAGMA auto_vacuum")).scalar() == 2
+    payload = [
+        {"project_id": 1, "token": "T", "ref": "main", "terminal_after_seconds": 0, "variables": {"BLOB": "x" * 2000}}
+        for _ in range(200)
+    ]
+    assert client.post("/_mock/pipelines:batch", json=payload, headers=AUTH_HEADERS).status_code == 200
+    pages = db_session.execute(text("PRAGMA page_count")).scalar()
+
+    retention = get_retention()
+    retention.policy.max_per_project = 1
+    client.portal.call(retention.run_once)
+
+    assert retention.metrics.pipelines_deleted == 199
+    assert retention.metrics.bytes_reclaimed > 0
+    assert db_session.execute(text("PRAGMA page_count")).scalar() < pages
+
+
+def test_reset_requires_allow_reset(client):
+    assert client.post("/_mock/reset", headers=AUTH_HEADERS).status_code == 403
+
+
+def test_reset_restores_initial_state(any_client, monkeypatch, trigger):
+    from app.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "allow_reset", True)
+    defaults = any_client.get("/_mock/scenarios", headers=AUTH_HEADERS).json()
+    any_client.post(
+        "/_mock/scenarios",
+        json={"scenario_id": 900, "name": "custom", "terminal_after_seconds": 5},
+        headers=AUTH_HEADERS,
+    )
+    for _ in range(3):
+        assert trigger(any_client, 1, scenario_id=900).status_code == 201
+
+    assert any_client.post("/_mock/reset", headers=AUTH_HEADERS).status_code == 204
+    assert _ids(any_client) == []
+    assert any_client.get("/_mock/scenarios", headers=AUTH_HEADERS).json() == defaults
+    assert trigger(any_client, 1, scenario_id=1).json()["id"] == 1
+
+
+def test_reset_answers_without_waiting_for_compaction(client, monkeypatch):
+    import asyncio
+    import threading
+
+    from app.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "allow_reset", True)
+    retention = get_retention()
+    release = threading.Event()
+
+    async def stalled_compact() -> int:
+        assert await asyncio.to_thread(release.wait, 5)
+        return 4096
+
+    monkeypatch.setattr(retention.storage, "compact", stalled_compact)
+    assert client.post("/_mock/reset", headers=AUTH_HEADERS).status_code == 204
+    assert retention.metrics.bytes_reclaimed == 0
+
+    release.set()
+    client.portal.call(retention.close)
+    assert retention.metrics.bytes_reclaimed == 4096
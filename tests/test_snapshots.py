@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+AUTH_HEADERS = {"PRIVATE-TOKEN": "TEST_TOKEN"}
+
+
+def _state(client) -> tuple[list[dict], list[dict]]:
+    pipelines = client.get("/_mock/pipelines", headers=AUTH_HEADERS).json()
+    scenarios = client.get("/_mock/scenarios", headers=AUTH_HEADERS).json()
+    return pipelines, scenarios
+
+
+def test_restore_returns_to_the_snapshot(any_client, monkeypatch, trigger):
+    from app.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "allow_reset", True)
+    any_client.post("/_mock/scenarios", json={"scenario_id": 900, "name": "custom", "terminal_after_seconds": 5}, headers=AUTH_HEADERS)
+    any_client.put("/_mock/scenarios/1", json={"scenario_id": 1, "name": "edited", "terminal_after_seconds": 1}, headers=AUTH_HEADERS)
+    for project_id in (1, 1, 2):
+        trigger(any_client, project_id, scenario_id=900, variables={"K": "v"})
+    any_client.delete("/_mock/scenarios/2", headers=AUTH_HEADERS)
+    before = _state(any_client)
+
+    snapshot = any_client.get("/_mock/snapshot", headers=AUTH_HEADERS)
+    assert snapshot.status_code == 200
+    assert snapshot.headers["content-type"] == "application/octet-stream"
+
+    trigger(any_client, 3, scenario_id=1)
+    any_client.delete("/_mock/scenarios/900", headers=AUTH_HEADERS)
+    any_client.put("/_mock/scenarios/1", json={"scenario_id": 1, "name": "changed again"}, headers=AUTH_HEADERS)
+    any_client.delete("/_mock/pipelines/1", headers=AUTH_HEADERS)
+
+    assert any_client.post("/_mock/restore", content=snapshot.content, headers=AUTH_HEADERS).status_code == 204
+    assert _state(any_client) == before
+    assert any_client.get("/projects/1/pipelines/1", headers=AUTH_HEADERS).json()["scenario_id"] == 900
+    assert trigger(any_client, 1, scenario_id=1).json()["id"] == 4
+
+
+def test_restore_rejects_foreign_blobs(client, monkeypatch):
+    from app.config import get_settings
+    from app.storage import MemoryStorage
+
+    sql_snapshot = client.get("/_mock/snapshot", headers=AUTH_HEADERS).content
+    memory_snapshot = client.portal.call(MemoryStorage(seeded=True).snapshot)
+    assert client.post("/_mock/restore", content=sql_snapshot, headers=AUTH_HEADERS).status_code == 403
+
+    monkeypatch.setattr(get_settings(), "allow_reset", True)
+    for blob in (b"", b"not a snapshot", sql_snapshot[:100], memory_snapshot):
+        assert client.post("/_mock/restore", content=blob, headers=AUTH_HEADERS).status_code == 422
+    monkeypatch.setattr("app.storage.sql._schema_fingerprint", lambda: 1)
+    assert client.post("/_mock/restore", content=sql_snapshot, headers=AUTH_HEADERS).status_code == 422
+
+
+def test_namespaces_restore_each_others_snapshots(client, monkeypatch):
+    from app.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "allow_reset", True)
+    namespace = {**AUTH_HEADERS, "X-Mock-Namespace": "fixture"}
+    client.post("/projects/5/trigger/pipeline", json={"token": "T", "ref": "main", "scenario_id": 0}, headers=namespace)
+    snapshot = client.get("/_mock/snapshot", headers=namespace).content
+
+    for name in ("test-1", "test-2"):
+        headers = {**AUTH_HEADERS, "X-Mock-Namespace": name}
+        assert client.post("/_mock/restore", content=snapshot, headers=headers).status_code == 204
+        assert [item["id"] for item in client.get("/_mock/pipelines", headers=headers).json()] == [1]
+    assert client.get("/_mock/pipelines", headers=AUTH_HEADERS).json() == []
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+AUTH_HEADERS = {"PRIVATE-TOKEN": "TEST_TOKEN"}
+
+
+def test_stats_group_computed_statuses(any_client, trigger):
+    any_client.post(
+        "/_mock/scenarios",
+        json={
+            "scenario_id": 920,
+            "name": "queued for a minute",
+            "timeline": {"stages": [{"name": "test", "jobs": [{"name": "unit", "queued_seconds": 60, "duration_seconds": 5}]}]},
+        },
+        headers=AUTH_HEADERS,
+    )
+    for project_id, body in [
+        (1, {"terminal_after_seconds": 0, "terminal_status": "failed"}),
+        (1, {"terminal_after_seconds": 10}),
+        (1, {"terminal_after_seconds": 600}),
+        (2, {"scenario_id": 0}),
+        (2, {"scenario_id": 920}),
+    ]:
+        assert trigger(any_client, project_id, **body).status_code == 201
+
+    stats = any_client.get("/_mock/stats", headers=AUTH_HEADERS)
+    assert stats.status_code == 200
+    payload = stats.json()
+    assert payload["total"] == 5
+    assert payload["by_status"] == {"failed": 1, "running": 3, "pending": 1}
+    assert payload["by_project"] == [
+        {"project_id": 1, "total": 3, "by_status": {"failed": 1, "running": 2}},
+        {"project_id": 2, "total": 2, "by_status": {"running": 1, "pending": 1}},
+    ]
+    by_scenario = {item["scenario_id"]: item["by_status"] for item in payload["by_scenario"]}
+    assert by_scenario == {None: {"failed": 1, "running": 2}, 0: {"running": 1}, 920: {"pending": 1}}
+
+    buckets = {bucket["lt_seconds"]: bucket["count"] for bucket in payload["time_to_terminal"]["buckets"]}
+    assert buckets[15] == 1  # inline, 10s
+    assert buckets[300] == 1  # timeline, 65s
+    assert buckets[900] == 1  # inline, 600s
+    assert sum(buckets.values()) == 3
+    assert payload["time_to_terminal"]["never"] == 1
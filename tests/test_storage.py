@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+AUTH_HEADERS = {"PRIVATE-TOKEN": "TEST_TOKEN"}
+
+
+def test_memory_backend_trigger_poll_and_list(memory_client):
+    created = memory_client.post(
+        "/projects/3/trigger/pipeline",
+        json={"token": "T", "ref": "main", "terminal_after_seconds": 0, "terminal_status": "failed"},
+        headers=AUTH_HEADERS,
+    )
+    assert created.status_code == 201
+    pipeline_id = created.json()["id"]
+
+    poll = memory_client.get(f"/projects/3/pipelines/{pipeline_id}", headers=AUTH_HEADERS)
+    assert poll.status_code == 200
+    assert poll.json()["status"] == "failed"
+
+    wrong_project = memory_client.get(f"/projects/4/pipelines/{pipeline_id}", headers=AUTH_HEADERS)
+    assert wrong_project.status_code == 404
+
+    memory_client.post(
+        "/projects/4/trigger/pipeline",
+        json={"token": "T", "ref": "main", "scenario_id": 0},
+        headers=AUTH_HEADERS,
+    )
+    listed = memory_client.get("/_mock/pipelines", params={"project_id": 3}, headers=AUTH_HEADERS)
+    assert [item["id"] for item in listed.json()] == [pipeline_id]
+
+    deleted = memory_client.delete(f"/_mock/pipelines/{pipeline_id}", headers=AUTH_HEADERS)
+    assert deleted.status_code == 204
+    assert memory_client.get(f"/projects/3/pipelines/{pipeline_id}", headers=AUTH_HEADERS).status_code == 404
+
+
+def test_memory_backend_scenario_updates_apply_to_pipelines(memory_client):
+    scenarios = memory_client.get("/_mock/scenarios", headers=AUTH_HEADERS)
+    assert len(scenarios.json()) == 103
+
+    memory_client.post(
+        "/_mock/scenarios",
+        json={"scenario_id": 900, "name": "stuck", "terminal_after_seconds": None, "never_complete": True},
+        headers=AUTH_HEADERS,
+    )
+    created = memory_client.post(
+        "/projects/1/trigger/pipeline",
+        json={"token": "T", "ref": "main", "scenario_id": 900},
+        headers=AUTH_HEADERS,
+    )
+    pipeline_id = created.json()["id"]
+    assert memory_client.get(f"/projects/1/pipelines/{pipeline_id}", headers=AUTH_HEADERS).json()["status"] == "running"
+
+    memory_client.put(
+        "/_mock/scenarios/900",
+        json={"scenario_id": 900, "name": "fail now", "terminal_after_seconds": 0, "terminal_status": "failed"},
+        headers=AUTH_HEADERS,
+    )
+    assert memory_client.get(f"/projects/1/pipelines/{pipeline_id}", headers=AUTH_HEADERS).json()["status"] == "failed"
+
+    assert memory_client.delete("/_mock/scenarios/900", headers=AUTH_HEADERS).status_code == 204
+    detached = memory_client.get(f"/projects/1/pipelines/{pipeline_id}", headers=AUTH_HEADERS).json()
+    assert detached["scenario_id"] is None
+
+
+def test_sql_backend_serves_scenarios_from_cache(client):
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    client.get("/_mock/scenarios", headers=AUTH_HEADERS)  # warm the cache
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        created = client.post(
+            "/projects/1/trigger/pipeline",
+            json={"token": "T", "ref": "main", "scenario_id": 1},
+            headers=AUTH_HEADERS,
+        )
+        pipeline_id = created.json()["id"]
+        client.get(f"/projects/1/pipelines/{pipeline_id}", headers=AUTH_HEADERS)
+        client.get("/_mock/pipelines", headers=AUTH_HEADERS)
+        client.get("/_mock/scenarios", headers=AUTH_HEADERS)
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+    assert statements
+    assert not [statement for statement in statements if "scenarios" in statement]
+
+    client.put(
+        "/_mock/scenarios/1",
+        json={"scenario_id": 1, "name": "renamed", "terminal_after_seconds": 0, "terminal_status": "failed"},
+        headers=AUTH_HEADERS,
+    )
+    scenarios = {item["scenario_id"]: item for item in client.get("/_mock/scenarios", headers=AUTH_HEADERS).json()}
+    assert scenarios[1]["name"] == "renamed"
+    assert client.get(f"/projects/1/pipelines/{pipeline_id}", headers=AUTH_HEADERS).json()["status"] == "failed"
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Generator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app.storage import MemoryStorage
+from app.storage.memory import built_in_scenarios
+from app.tasks import get_retention
+
+AUTH_HEADERS = {"PRIVATE-TOKEN": "TEST_TOKEN"}
+TRIGGER = {"token": "T", "ref": "main", "scenario_id": 3}
+
+
+def _in(namespace: str) -> dict[str, str]:
+    return {**AUTH_HEADERS, "X-Mock-Namespace": namespace}
+
+
+@pytest.fixture()
+def small_client(tmp_path, monkeypatch) -> Generator[TestClient, None, None]:
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+    monkeypatch.setenv("MOCK_TOKEN", "TEST_TOKEN")
+    monkeypatch.setenv("MOCK_TENANT_CAPACITY", "2")
+
+    from app.config import get_settings
+
+    get_settings.cache_clear()
+
+    from app.main import create_app
+
+    with TestClient(create_app()) as test_client:
+        yield test_client
+
+
+def test_namespaces_isolate_pipelines_and_id_sequences(client):
+    default = client.post("/projects/1/trigger/pipeline", json=TRIGGER, headers=AUTH_HEADERS).json()
+    first = client.post("/projects/1/trigger/pipeline", json=TRIGGER, headers=_in("job-1")).json()
+    second = client.post("/ns/job-2/projects/1/trigger/pipeline", json=TRIGGER, headers=AUTH_HEADERS).json()
+    assert default["id"] == first["id"] == second["id"] == 1
+    assert second["web_url"] == "http://testserver/ns/job-2/projects/1/pipelines/1"
+
+    client.post("/projects/1/trigger/pipeline", json=TRIGGER, headers=_in("job-1"))
+    listed = client.get("/_mock/pipelines", headers=_in("job-1")).json()
+    assert [item["id"] for item in listed] == [1, 2]
+    assert len(client.get("/ns/job-2/_mock/pipelines", headers=AUTH_HEADERS).json()) == 1
+    assert len(client.get("/_mock/pipelines", headers=AUTH_HEADERS).json()) == 1
+
+    assert client.get("/ns/job-1/projects/1/pipelines/2", headers=AUTH_HEADERS).status_code == 200
+    assert client.get("/ns/job-2/projects/1/pipelines/2", headers=AUTH_HEADERS).status_code == 404
+
+    # Prefixed requests are labelled with their route, like header-selected ones.
+    metrics = client.get("/_mock/metrics", headers=AUTH_HEADERS).text
+    assert 'route="/projects/{project_id}/trigger/pipeline",status="201"} 4' in metrics
+    assert 'route="/projects/{project_id}/pipelines/{pipeline_id}",status="404"} 1' in metrics
+    assert 'route="unmatched"' not in metrics
+
+
+def test_namespaces_share_built_in_scenarios_copy_on_write(client):
+    assert len(client.get("/_mock/scenarios", headers=_in("a")).json()) == 103
+    renamed = {"scenario_id": 1, "name": "tenant a", "terminal_after_seconds": 0, "terminal_status": "failed"}
+    assert client.put("/_mock/scenarios/1", json=renamed, headers=_in("a")).status_code == 200
+    assert client.delete("/_mock/scenarios/2", headers=_in("a")).status_code == 204
+
+    def scenarios(headers: dict[str, str]) -> dict[int, dict]:
+        return {item["scenario_id"]: item for item in client.get("/_mock/scenarios", headers=headers).json()}
+
+    assert scenarios(_in("a"))[1]["name"] == "tenant a" and 2 not in scenarios(_in("a"))
+    assert scenarios(_in("b"))[1]["name"] == "after 1 second" and 2 in scenarios(_in("b"))
+    assert scenarios(AUTH_HEADERS)[1]["name"] == "after 1 second"
+    assert built_in_scenarios()[1].name == "after 1 second"
+
+
+def test_new_memory_storage_shares_the_seeded_scenarios():
+    async def scenario() -> None:
+        storage = MemoryStorage(seeded=True)
+        assert len(await storage.list_scenarios()) == 103
+        assert await storage.get_scenario(500) is built_in_scenarios()[500]
+        assert not storage._scenarios
+
+        await storage.update_scenario(500, {"terminal_after_seconds": 1})
+        assert (await storage.get_scenario(500)).terminal_after_seconds == 1
+        assert built_in_scenarios()[500].terminal_after_seconds == 300
+
+    asyncio.run(scenario())
+
+
+def test_idle_namespaces_are_evicted_least_recently_used_first(small_client):
+    small_client.post("/projects/1/trigger/pipeline", json=TRIGGER, headers=_in("a"))
+    small_client.post("/projects/1/trigger/pipeline", json=TRIGGER, headers=_in("b"))
+    small_client.get("/_mock/pipelines", headers=_in("a"))  # "b" is now the least recently used
+    small_client.post("/projects/1/trigger/pipeline", json=TRIGGER, headers=_in("c"))
+
+    assert small_client.get("/projects/1/pipelines/1", headers=_in("a")).status_code == 200
+    assert small_client.get("/projects/1/pipelines/1", headers=_in("b")).status_code == 404
+    metrics = small_client.get("/_mock/metrics", headers=AUTH_HEADERS).text
+    assert "mock_tenants 2" in metrics
+    assert "mock_tenant_evictions_total 2" in metrics
+
+
+def test_each_namespace_has_its_own_clock(client):
+    frozen = client.post("/_mock/clock", json={"freeze": True}, headers=_in("a")).json()
+    assert frozen["mode"] == "virtual"
+    assert client.get("/_mock/clock", headers=AUTH_HEADERS).json()["mode"] == "wall"
+    assert client.get("/_mock/clock", headers=_in("b")).json()["mode"] == "wall"
+
+    created = client.post("/projects/1/trigger/pipeline", json={**TRIGGER, "scenario_id": 500}, headers=_in("a")).json()
+    client.post("/_mock/clock", json={"advance_seconds": 300}, headers=_in("a"))
+    assert client.get(f"/projects/1/pipelines/{created['id']}", headers=_in("a")).json()["status"] == "success"
+
+
+def test_namespaced_retention_leaves_the_default_store_alone(client):
+    # Namespaces follow the process-wide policy.
+    get_retention().policy.max_rows = 1
+    finished = {"token": "T", "ref": "main", "terminal_after_seconds": 0}
+    for headers in (AUTH_HEADERS, AUTH_HEADERS, _in("a"), _in("a"), _in("a")):
+        client.post("/projects/1/trigger/pipeline", json=finished, headers=headers)
+
+    ran = client.post("/ns/a/_mock/retention:run", headers=AUTH_HEADERS).json()
+    assert (ran["runs"], ran["pipelines_deleted"]) == (1, 2)
+    assert [item["id"] for item in client.get("/ns/a/_mock/pipelines", headers=AUTH_HEADERS).json()] == [3]
+    assert [item["id"] for item in client.get("/_mock/pipelines", headers=AUTH_HEADERS).json()] == [1, 2]
+    assert client.get("/_mock/retention", headers=AUTH_HEADERS).json()["runs"] == 0
+    assert "mock_retention_pipelines_deleted_total 2" in client.get("/_mock/metrics", headers=_in("a")).text
+
+
+@pytest.mark.parametrize("path, headers", [("/ns/bad.name/_mock/scenarios", AUTH_HEADERS), ("/_mock/scenarios", _in("x" * 65))])
+def test_invalid_namespace_names_are_rejected(client, path, headers):
+    response = client.get(path, headers=headers)
+    assert response.status_code == 400
+    assert "Namespace" in response.json()["detail"]
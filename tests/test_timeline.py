@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import json
+from datetime import timedelta
+
+from app.models import Pipeline
+from app.timeline import compile_timeline
+
+AUTH_HEADERS = {"PRIVATE-TOKEN": "TEST_TOKEN"}
+
+TIMELINE = {
+    "created_seconds": 2,
+    "stages": [
+        {
+            "name": "build",
+            "jobs": [
+                {"name": "compile", "queued_seconds": 3, "duration_seconds": 10},
+                {"name": "lint", "duration_seconds": 4, "status": "failed", "allow_failure": True},
+            ],
+        },
+        {"name": "test", "jobs": [{"name": "unit", "queued_seconds": 1, "duration_seconds": 5, "status": "failed"}]},
+        {"name": "deploy", "jobs": [{"name": "production", "duration_seconds": 5}]},
+    ],
+}
+
+
+def test_compiled_timeline_transitions():
+    timeline = compile_timeline(json.dumps(TIMELINE))
+
+    assert timeline.offsets == (0.0, 2.0, 15.0, 16.0, 21.0)
+    assert timeline.states == ("created", "running", "pending", "running", "failed")
+    assert [timeline.status_at(elapsed) for elapsed in (-1, 1.9, 2, 15.5, 20.9, 21, 1e9)] == [
+        "created",
+        "created",
+        "running",
+        "pending",
+        "running",
+        "failed",
+        "failed",
+    ]
+    compile_job, lint, unit, production = timeline.jobs
+    assert compile_job.status_at(3) == "pending"
+    assert lint.status_at(10) == "failed"
+    assert unit.status_at(14) == "created"
+    # A failed stage skips everything after it.
+    assert production.states == ("created", "skipped")
+    assert production.started is None
+
+
+def test_timeline_scenario_drives_pipeline_and_jobs(client, db_session):
+    created = client.post(
+        "/_mock/scenarios",
+        json={"scenario_id": 910, "name": "staged", "timeline": TIMELINE},
+        headers=AUTH_HEADERS,
+    )
+    assert created.status_code == 201
+    assert created.json()["terminal_after_seconds"] == 21
+    assert created.json()["terminal_status"] == "failed"
+
+    triggered = client.post(
+        "/projects/9/trigger/pipeline",
+        json={"token": "T", "ref": "main", "scenario_id": 910},
+        headers=AUTH_HEADERS,
+    )
+    assert triggered.json()["status"] == "created"
+    pipeline_id = triggered.json()["id"]
+
+    pipeline = db_session.get(Pipeline, pipeline_id)
+    pipeline.created_at = pipeline.created_at - timedelta(seconds=15.5)
+    db_session.commit()
+
+    poll = client.get(f"/projects/9/pipelines/{pipeline_id}", headers=AUTH_HEADERS)
+    assert poll.json()["status"] == "pending"
+    pending = client.get("/_mock/pipelines", params={"project_id": 9, "status": "pending"}, headers=AUTH_HEADERS)
+    assert [item["id"] for item in pending.json()] == [pipeline_id]
+    running = client.get("/_mock/pipelines", params={"project_id": 9, "status": "running"}, headers=AUTH_HEADERS)
+    assert running.json() == []
+
+    jobs = client.get(f"/projects/9/pipelines/{pipeline_id}/jobs", headers=AUTH_HEADERS)
+    assert jobs.status_code == 200
+    by_name = {job["name"]: job for job in jobs.json()}
+    assert [job["stage"] for job in jobs.json()] == ["build", "build", "test", "deploy"]
+    assert by_name["compile"]["status"] == "success"
+    assert by_name["compile"]["duration"] == 10
+    assert by_name["compile"]["queued_duration"] == 3
+    assert by_name["unit"]["status"] == "pending"
+    assert by_name["unit"]["started_at"] is None
+    assert by_name["production"]["status"] == "created"
+    assert by_name["unit"]["pipeline"]["status"] == "pending"
+    assert by_name["unit"]["id"] == pipeline_id * 1000 + 3
+
+
+def test_pipeline_without_timeline_has_no_jobs(client):
+    triggered = client.post(
+        "/projects/9/trigger/pipeline",
+        json={"token": "T", "ref": "main", "scenario_id": 1},
+        headers=AUTH_HEADERS,
+    )
+    jobs = client.get(f"/projects/9/pipelines/{triggered.json()['id']}/jobs", headers=AUTH_HEADERS)
+    assert jobs.json() == []
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+from app.storage.cache import MISSING, VerdictCache
+
+AUTH_HEADERS = {"PRIVATE-TOKEN": "TEST_TOKEN"}
+
+
+def test_trigger_tokens_are_created_listed_and_revoked(any_client, trigger):
+    created = any_client.post("/projects/1/triggers", json={"description": "deploy"}, headers=AUTH_HEADERS)
+    assert created.status_code == 201
+    secret = created.json()["token"]
+    assert secret.startswith("glptt-") and len(secret) == 46
+
+    listed = any_client.get("/projects/1/triggers", headers=AUTH_HEADERS).json()
+    assert [(item["id"], item["description"], item["token"]) for item in listed] == [(created.json()["id"], "deploy", secret[:4])]
+    assert any_client.get("/projects/2/triggers", headers=AUTH_HEADERS).json() == []
+    assert any_client.post("/projects/2/triggers", json={"token": secret}, headers=AUTH_HEADERS).status_code == 409
+
+    assert trigger(any_client, 1, headers=None, token=secret).status_code == 201
+    assert any_client.post("/projects/1/trigger/pipeline", data={"token": secret, "ref": "main"}).status_code == 201
+    assert trigger(any_client, 1, token="wrong").json() == {"detail": "Invalid trigger token"}
+    assert trigger(any_client, 2, headers=None, token=secret).status_code == 401  # another project's token
+    assert trigger(any_client, 2, token=secret).status_code == 201  # project 2 has no tokens
+
+    assert any_client.delete(f"/projects/2/triggers/{created.json()['id']}", headers=AUTH_HEADERS).status_code == 404
+    assert any_client.delete(f"/projects/1/triggers/{created.json()['id']}", headers=AUTH_HEADERS).status_code == 204
+    assert trigger(any_client, 1, headers=None, token=secret).status_code == 401
+    assert trigger(any_client, 1, token=secret).status_code == 201
+
+
+def test_unauthenticated_triggers_are_refused_before_validation(client):
+    url = "/projects/1/trigger/pipeline"
+    json_body = {"content-type": "application/json"}
+    assert client.post(url, content=b"{not json", headers=json_body).status_code == 401
+    assert client.post(url, content=b"plain text", headers={"content-type": "text/plain"}).status_code == 401
+    assert client.post(url, json={"ref": "main", "variables": "not an object"}).status_code == 401
+    assert client.post(url, content=b"{not json", headers={**json_body, **AUTH_HEADERS}).json() == {"detail": "Invalid JSON body"}
+    assert client.post(url, json={"ref": "main", "variables": "not an object"}, headers=AUTH_HEADERS).status_code == 422
+
+
+def test_token_checks_are_cached_until_tokens_change(client, trigger):
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    client.post("/projects/1/triggers", json={"token": "good"}, headers=AUTH_HEADERS)
+    statements: list[str] = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(Engine, "before_cursor_execute", record)
+    try:
+        for _ in range(3):
+            assert trigger(client, 1, headers=None, token="good").status_code == 201
+            assert trigger(client, 1, headers=None, token="bad").status_code == 401
+        assert trigger(client, 2, token="any").status_code == 201
+        assert trigger(client, 2, token="any").status_code == 201
+    finally:
+        event.remove(Engine, "before_cursor_execute", record)
+    assert len([statement for statement in statements if "trigger_tokens" in statement]) == 3
+
+    client.post("/projects/1/triggers", json={"token": "bad"}, headers=AUTH_HEADERS)
+    assert trigger(client, 1, headers=None, token="bad").status_code == 201
+
+
+def test_snapshots_and_reset_cover_trigger_tokens(client, monkeypatch, trigger):
+    from app.config import get_settings
+
+    monkeypatch.setattr(get_settings(), "allow_reset", True)
+    client.post("/projects/1/triggers", json={"token": "kept"}, headers=AUTH_HEADERS)
+    snapshot = client.get("/_mock/snapshot", headers=AUTH_HEADERS).content
+
+    client.post("/_mock/reset", headers=AUTH_HEADERS)
+    assert client.get("/projects/1/triggers", headers=AUTH_HEADERS).json() == []
+    assert trigger(client, 1, headers=None, token="kept").status_code == 401
+
+    client.post("/_mock/restore", content=snapshot, headers=AUTH_HEADERS)
+    assert trigger(client, 1, headers=None, token="kept").status_code == 201
+
+
+def test_verdict_cache_expires_and_evicts_least_recently_used(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("app.storage.cache.time.monotonic", lambda: now[0])
+    cache = VerdictCache(capacity=2, ttl=10)
+    cache.put("a", True)
+    cache.put("b", None)
+    assert cache.get("a") is True and cache.get("b") is None
+    cache.get("a")
+    cache.put("c", False)  # "b" is the least recently used
+    assert cache.get("b") is MISSING and len(cache) == 2
+
+    now[0] += 10
+    assert cache.get("a") is MISSING and cache.get("c") is MISSING
+    for disabled in (VerdictCache(capacity=0), VerdictCache(ttl=0)):
+        disabled.put("a", True)
+        assert disabled.get("a") is MISSING
@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from app.config import Settings
+
+AUTH_HEADERS = {"PRIVATE-TOKEN": "TEST_TOKEN"}
+ROOT = Path(__file__).resolve().parents[1]
+
+# Another worker process, writing through its own SqlStorage.
+_OTHER_WORKER = """
+import asyncio, sys
+from app.storage.sql import SqlStorage
+
+async def main():
+    storage = SqlStorage(sys.argv[1], shared=True)
+    await storage.update_scenario(1, {"name": "renamed elsewhere"})
+
+asyncio.run(main())
+"""
+
+# Another worker process, revoking project 1's trigger token.
+_REVOKING_WORKER = """
+import asyncio, sys
+from app.storage.sql import SqlStorage
+
+async def main():
+    storage = SqlStorage(sys.argv[1], shared=True)
+    [token] = await storage.list_trigger_tokens(1)
+    await storage.delete_trigger_token(1, token.id)
+
+asyncio.run(main())
+"""
+
+
+def test_scenario_changes_in_another_process_invalidate_the_cache(client):
+    from app.config import get_settings
+    from app.storage import get_storage
+
+    storage = get_storage()
+    client.portal.call(storage.poll_external_changes)
+    client.get("/_mock/scenarios", headers=AUTH_HEADERS)  # warm the cache
+    assert client.portal.call(storage.poll_external_changes).scenarios is False
+
+    subprocess.run([sys.executable, "-c", _OTHER_WORKER, get_settings().database_url], cwd=ROOT, check=True)
+
+    changes = client.portal.call(storage.poll_external_changes)
+    assert changes.pipelines and changes.scenarios
+    scenarios = {item["scenario_id"]: item for item in client.get("/_mock/scenarios", headers=AUTH_HEADERS).json()}
+    assert scenarios[1]["name"] == "renamed elsewhere"
+    # Nothing committed since: the next poll is a single PRAGMA.
+    changes = client.portal.call(storage.poll_external_changes)
+    assert not changes.pipelines and not changes.scenarios
+
+
+def test_tokens_revoked_in_another_process_stop_working(client):
+    from app.config import get_settings
+    from app.storage import get_storage
+
+    storage = get_storage()
+    client.post("/projects/1/triggers", json={"token": "revoked-elsewhere"}, headers=AUTH_HEADERS)
+    client.portal.call(storage.poll_external_changes)
+    trigger = {"token": "revoked-elsewhere", "ref": "main"}
+    assert client.post("/projects/1/trigger/pipeline", json=trigger).status_code == 201  # verdict now cached
+
+    subprocess.run([sys.executable, "-c", _REVOKING_WORKER, get_settings().database_url], cwd=ROOT, check=True)
+
+    client.portal.call(storage.poll_external_changes)
+    assert client.post("/projects/1/trigger/pipeline", json=trigger).status_code == 401
+
+
+def test_shared_storage_reloads_on_unknown_scenario(client):
+    from app.storage import get_storage
+
+    storage = get_storage()
+    client.get("/_mock/scenarios", headers=AUTH_HEADERS)
+    storage._scenario_cache.fill({}, storage._scenario_cache.version)  # stale copy, as if written elsewhere
+    assert client.portal.call(storage.get_scenario, 1) is None
+    storage.shared = True
+    assert client.portal.call(storage.get_scenario, 1).scenario_id == 1
+
+
+@pytest.mark.parametrize("database_url", ["memory://", "sqlite://", "sqlite:///:memory:"])
+def test_launcher_rejects_unshareable_databases(database_url):
+    from app.launcher import check_shared_database
+
+    with pytest.raises(ValueError):
+        check_shared_database(Settings(database_url=database_url))
+
+
+def test_launcher_accepts_sqlite_files(tmp_path):
+    from app.launcher import check_shared_database
+
+    check_shared_database(Settings(database_url=f"sqlite:///{tmp_path / 'shared.db'}"))
+
+
+def test_only_one_worker_claims_maintenance(tmp_path, monkeypatch):
+    from app import tasks
+
+    settings = Settings(database_url=f"sqlite:///{tmp_path / 'shared.db'}", workers=2)
+    monkeypatch.setattr(tasks, "_maintenance_lock", None)
+    assert tasks.claim_maintenance(settings)
+    held = tasks._maintenance_lock
+    try:
+        # A second claim through a fresh descriptor, as another process would make.
+        monkeypatch.setattr(tasks, "_maintenance_lock", None)
+        assert not tasks.claim_maintenance(settings)
+        assert tasks.claim_maintenance(Settings(database_url=settings.database_url, workers=1))
+    finally:
+        os.close(held)